@@ -0,0 +1,137 @@
+'''
+Compare ways of reading and joining a year of collisions
+
+    python -m benchmarks.bench_join --accidents 20000
+
+iterrows + .loc  the DataFrame join from_dir originally did
+grouped          csv.DictReader rows grouped by accident_index in one pass
+typed columnar   typed csv columns linked with CSR offsets (from_dir)
+'''
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+from collections import defaultdict
+
+import pandas as pd
+from pandas import DataFrame
+
+from road_collisions_uk.models.collision import (
+    Collision,
+    Collisions
+)
+from road_collisions_uk.models.vehicle import Vehicles
+from road_collisions_uk.models.casualty import Casualties
+
+from benchmarks.generate import generate
+
+
+TABLES = ('accident', 'vehicle', 'casualty')
+
+
+def read_rows(dirpath):
+    rows = []
+    for table in TABLES:
+        with open(os.path.join(dirpath, f'{table}.csv')) as csvfile:
+            rows.append(list(csv.DictReader(csvfile)))
+    return rows
+
+
+def iterrows_join(dirpath):
+    accident_rows, vehicle_rows, casualty_rows = read_rows(dirpath)
+    accident_df = DataFrame(accident_rows).set_index('accident_reference')
+    vehicle_df = DataFrame(vehicle_rows).set_index('accident_reference')
+    casualty_df = DataFrame(casualty_rows).set_index('accident_reference')
+
+    collisions = Collisions()
+    for index, row in accident_df.iterrows():
+        accident_vehicles = vehicle_df.loc[index]
+        accident_casualties = casualty_df.loc[index]
+
+        if isinstance(accident_vehicles, pd.core.series.Series):
+            vehicles = Vehicles.parse(accident_vehicles.to_dict())
+        else:
+            vehicles = Vehicles.parse(accident_vehicles.to_dict(orient='records'))
+
+        if isinstance(accident_casualties, pd.core.series.Series):
+            casualties = Casualties.parse(accident_casualties.to_dict())
+        else:
+            casualties = Casualties.parse(accident_casualties.to_dict(orient='records'))
+
+        row_data = row.to_dict()
+        row_data.update({
+            'accident_index': index,
+            'vehicles': vehicles,
+            'casualties': casualties
+        })
+        collisions.append(Collision(**row_data))
+
+    return collisions
+
+
+def grouped_join(dirpath):
+    accident_rows, vehicle_rows, casualty_rows = read_rows(dirpath)
+
+    vehicles_by_accident = defaultdict(list)
+    for row in vehicle_rows:
+        vehicles_by_accident[row['accident_index']].append(row)
+    casualties_by_accident = defaultdict(list)
+    for row in casualty_rows:
+        casualties_by_accident[row['accident_index']].append(row)
+
+    collisions = Collisions()
+    for row in accident_rows:
+        row['vehicles'] = Vehicles.parse(vehicles_by_accident.get(row['accident_index'], []))
+        row['casualties'] = Casualties.parse(casualties_by_accident.get(row['accident_index'], []))
+        collisions.append(Collision(**row))
+    return collisions
+
+
+def typed_columnar(dirpath):
+    from road_collisions_uk.ingest import read_table
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+    return ColumnarCollisions.from_columns(
+        *[
+            read_table([os.path.join(dirpath, f'{table}.csv')], table)
+            for table in TABLES
+        ]
+    )
+
+
+def typed_objects(dirpath):
+    return typed_columnar(dirpath).to_collisions()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accidents', type=int, default=20000)
+    parser.add_argument('--skip-iterrows', action='store_true')
+    args = parser.parse_args()
+
+    dirpath = tempfile.mkdtemp()
+    try:
+        generate(dirpath, args.accidents, years=(2020,))
+
+        funcs = [
+            ('iterrows + .loc', iterrows_join),
+            ('grouped', grouped_join),
+            ('typed columnar', typed_columnar),
+            ('typed -> objects', typed_objects),
+        ]
+        if args.skip_iterrows:
+            funcs = funcs[1:]
+
+        for name, func in funcs:
+            start = time.perf_counter()
+            collisions = func(dirpath)
+            elapsed = time.perf_counter() - start
+            print(f'{name:<18} {len(collisions):>8} collisions {elapsed:8.2f}s')
+    finally:
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
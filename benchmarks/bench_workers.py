@@ -0,0 +1,53 @@
+'''
+Time Collisions.from_dir with different numbers of worker processes
+
+    python -m benchmarks.bench_workers --years 8 --per-year 20000 --workers 1 4 16
+
+Each year is three tasks, one per table, so --years 1 --workers 1 3 shows
+the scaling of a single year load.
+'''
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from road_collisions_uk.models.collision import Collisions
+
+from benchmarks.generate import generate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=8)
+    parser.add_argument('--per-year', type=int, default=20000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    dirpath = tempfile.mkdtemp()
+    try:
+        generate(
+            os.path.join(dirpath, 'uk'),
+            args.years * args.per_year,
+            years=range(2020 - args.years, 2020)
+        )
+        # Partition up front so it isn't counted against the first run
+        Collisions._prepare_dir(dirpath, region='uk')
+
+        print(f'cpus available: {os.cpu_count()}')
+        for workers in args.workers:
+            start = time.perf_counter()
+            collisions = Collisions.from_dir(
+                dirpath,
+                region='uk',
+                columnar=True,
+                workers=workers
+            )
+            elapsed = time.perf_counter() - start
+            print(f'workers={workers:<3} {len(collisions):>9} collisions {elapsed:8.2f}s')
+    finally:
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
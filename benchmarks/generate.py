@@ -0,0 +1,216 @@
+'''
+Generate synthetic accident, vehicle and casualty csvs with the real DfT
+column layout at any scale, without downloading the real data
+
+    python -m benchmarks.generate /tmp/collisions --accidents 1000000
+
+Values are drawn from roughly realistic ranges with a fixed seed so runs
+are comparable. Rows are generated and written a chunk at a time so 10M
+accidents don't need to fit in memory at once.
+'''
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.models.schema import (
+    ACCIDENT_CSV_COLUMNS,
+    CASUALTY_CSV_COLUMNS,
+    VEHICLE_CSV_COLUMNS
+)
+
+
+DEFAULT_YEARS = (2016, 2017, 2018, 2019, 2020)
+
+CHUNK_SIZE = 200000
+
+# Fraction of accidents with no location
+NULL_LOCATION_RATE = 0.01
+
+TIMES = np.array(
+    ['%02d:%02d' % (m // 60, m % 60) for m in range(24 * 60)],
+    dtype=object
+)
+
+LSOAS = np.array(['E0%07d' % (i) for i in range(2000)], dtype=object)
+
+DISTRICTS = np.array(['E0%07d' % (9000001 + i) for i in range(300)], dtype=object)
+
+MAKE_MODELS = np.array(
+    ['FORD FOCUS', 'VAUXHALL CORSA', 'FORD FIESTA', 'VOLKSWAGEN GOLF', '-1'],
+    dtype=object
+)
+
+
+def get_dates(year):
+    days = np.arange(f'{year}-01-01', f'{year + 1}-01-01', dtype='datetime64[D]')
+    return np.array(
+        [d.strftime('%d/%m/%Y') for d in days.tolist()],
+        dtype=object
+    )
+
+
+def small_ints(rng, n, low=-1, high=10):
+    return rng.integers(low, high, size=n)
+
+
+def accident_frame(rng, year, start, n):
+    '''
+    Accidents start:start + n of a year
+
+    :return: (DataFrame, vehicles per accident, casualties per accident)
+    '''
+    num = np.arange(start, start + n)
+    references = np.char.mod('%09d', num).astype(object)
+    num_vehicles = rng.choice([1, 2, 3, 4], size=n, p=[0.3, 0.55, 0.1, 0.05])
+    num_casualties = rng.choice([1, 2, 3], size=n, p=[0.75, 0.2, 0.05])
+
+    eastings = rng.integers(100000, 650000, size=n)
+    northings = rng.integers(10000, 1200000, size=n)
+    null_location = rng.random(n) < NULL_LOCATION_RATE
+
+    def nullable(values):
+        values = values.astype(object)
+        values[null_location] = 'NULL'
+        return values
+
+    dates = get_dates(year)
+    districts = rng.integers(0, len(DISTRICTS), size=n)
+
+    columns = {
+        'accident_index': str(year) + references,
+        'accident_year': np.full(n, year),
+        'accident_reference': references,
+        'location_easting_osgr': nullable(eastings),
+        'location_northing_osgr': nullable(northings),
+        'longitude': nullable(np.round(-6 + eastings / 100000, 6)),
+        'latitude': nullable(np.round(50 + northings / 100000, 6)),
+        'police_force': rng.integers(1, 99, size=n),
+        'accident_severity': rng.choice([1, 2, 3], size=n, p=[0.02, 0.2, 0.78]),
+        'number_of_vehicles': num_vehicles,
+        'number_of_casualties': num_casualties,
+        'date': dates[rng.integers(0, len(dates), size=n)],
+        'day_of_week': rng.integers(1, 8, size=n),
+        'time': TIMES[rng.integers(0, len(TIMES), size=n)],
+        'local_authority_district': districts + 1,
+        'local_authority_ons_district': DISTRICTS[districts],
+        'local_authority_highway': DISTRICTS[districts],
+        'first_road_number': rng.integers(0, 9999, size=n),
+        'second_road_number': rng.integers(-1, 9999, size=n),
+        'speed_limit': rng.choice([20, 30, 40, 50, 60, 70], size=n),
+        'lsoa_of_accident_location': LSOAS[rng.integers(0, len(LSOAS), size=n)],
+    }
+    for name in ACCIDENT_CSV_COLUMNS:
+        if name not in columns:
+            columns[name] = small_ints(rng, n)
+
+    return (
+        pd.DataFrame(columns, columns=ACCIDENT_CSV_COLUMNS),
+        num_vehicles,
+        num_casualties
+    )
+
+
+def child_frame(rng, accidents, counts, columns, reference_field):
+    '''
+    Vehicle or casualty rows, counts[i] of them for accident i
+    '''
+    n = int(counts.sum())
+    parents = np.repeat(np.arange(len(accidents)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+
+    data = {
+        'accident_index': accidents['accident_index'].to_numpy()[parents],
+        'accident_year': accidents['accident_year'].to_numpy()[parents],
+        'accident_reference': accidents['accident_reference'].to_numpy()[parents],
+        reference_field: np.arange(n) - starts + 1,
+    }
+    if reference_field == 'casualty_reference':
+        data['vehicle_reference'] = np.ones(n, dtype=np.int64)
+        data['age_of_casualty'] = rng.integers(-1, 95, size=n)
+        data['casualty_severity'] = rng.choice([1, 2, 3], size=n, p=[0.01, 0.15, 0.84])
+    else:
+        data['age_of_driver'] = rng.integers(-1, 95, size=n)
+        data['engine_capacity_cc'] = rng.integers(-1, 5000, size=n)
+        data['generic_make_model'] = MAKE_MODELS[rng.integers(0, len(MAKE_MODELS), size=n)]
+
+    for name in columns:
+        if name not in data:
+            data[name] = small_ints(rng, n)
+
+    return pd.DataFrame(data, columns=columns)
+
+
+def generate(dirpath, accidents, years=DEFAULT_YEARS, seed=0, chunk_size=CHUNK_SIZE):
+    '''
+    Write accident.csv, vehicle.csv and casualty.csv to dirpath
+
+    :param accidents: total number of accidents, split evenly across years
+    :kwarg years: accident years to spread the accidents over
+    :kwarg seed: seed of the random values
+    :return: {table: number of rows written}
+    '''
+    os.makedirs(dirpath, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    years = list(years)
+    per_year = [
+        accidents // len(years) + (1 if i < accidents % len(years) else 0)
+        for i in range(len(years))
+    ]
+
+    paths = {
+        table: os.path.join(dirpath, f'{table}.csv')
+        for table in ('accident', 'vehicle', 'casualty')
+    }
+    files = {table: open(path, 'w', newline='') for table, path in paths.items()}
+    rows = {table: 0 for table in paths}
+    try:
+        for table, columns in (
+            ('accident', ACCIDENT_CSV_COLUMNS),
+            ('vehicle', VEHICLE_CSV_COLUMNS),
+            ('casualty', CASUALTY_CSV_COLUMNS),
+        ):
+            files[table].write(','.join(columns) + '\n')
+
+        for year, year_accidents in zip(years, per_year):
+            for start in range(0, year_accidents, chunk_size):
+                n = min(chunk_size, year_accidents - start)
+                accident_df, num_vehicles, num_casualties = accident_frame(rng, year, start, n)
+                vehicle_df = child_frame(
+                    rng, accident_df, num_vehicles, VEHICLE_CSV_COLUMNS, 'vehicle_reference'
+                )
+                casualty_df = child_frame(
+                    rng, accident_df, num_casualties, CASUALTY_CSV_COLUMNS, 'casualty_reference'
+                )
+
+                for table, df in (
+                    ('accident', accident_df),
+                    ('vehicle', vehicle_df),
+                    ('casualty', casualty_df),
+                ):
+                    df.to_csv(files[table], header=False, index=False)
+                    rows[table] += len(df)
+    finally:
+        for f in files.values():
+            f.close()
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('dirpath')
+    parser.add_argument('--accidents', type=int, default=100000)
+    parser.add_argument('--years', type=int, nargs='+', default=list(DEFAULT_YEARS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rows = generate(args.dirpath, args.accidents, years=args.years, seed=args.seed)
+    for table, count in rows.items():
+        print(f'{table:<9} {count:>10} rows')
+
+
+if __name__ == '__main__':
+    main()
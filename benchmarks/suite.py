@@ -0,0 +1,247 @@
+'''
+Time the load, filter, serialize and parse hot paths on synthetic data and
+compare them against stored baselines
+
+    python -m benchmarks.suite --accidents 100000
+    python -m benchmarks.suite --accidents 100000 --save-baseline
+    python -m benchmarks.suite --accidents 1000000 --cases from_dir_columnar filter_columnar
+
+Each case runs in a fresh process so its peak RSS is its own. Baselines
+are kept per number of accidents in benchmarks/baselines.json (or
+--baseline). They depend on the machine, so none are committed and the
+file is gitignored: record one with --save-baseline on the machine, say
+on the base branch, then run without it after a change to compare. The
+exit status is 1 if any case is slower or uses more memory than its
+baseline allows.
+'''
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from road_collisions_uk.instrumentation import get_peak_rss
+from road_collisions_uk.models.collision import (
+    Collision,
+    Collisions
+)
+
+from benchmarks.generate import generate
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+# How much slower / bigger than the baseline a case can be
+TIME_TOLERANCE = 0.25
+RSS_TOLERANCE = 0.25
+
+# serialize / parse are timed on at most this many collisions
+SERIALIZE_LIMIT = 100000
+
+FILTERS = {
+    'speed_limit__gte': 40,
+    'accident_severity__in': [1, 2],
+    'date__range': ('01/03/2018', '30/09/2019'),
+}
+
+
+def load(data_dir, columnar):
+    return Collisions.from_dir(data_dir, region='uk', columnar=columnar)
+
+
+def case_from_dir_columnar(data_dir):
+    start = time.perf_counter()
+    collisions = load(data_dir, True)
+    return time.perf_counter() - start, len(collisions)
+
+
+def case_from_dir_objects(data_dir):
+    start = time.perf_counter()
+    collisions = load(data_dir, False)
+    return time.perf_counter() - start, len(collisions)
+
+
+def case_filter_columnar(data_dir):
+    collisions = load(data_dir, True)
+    start = time.perf_counter()
+    filtered = collisions.filter(**FILTERS)
+    return time.perf_counter() - start, len(filtered)
+
+
+def case_filter_objects(data_dir):
+    collisions = load(data_dir, False)
+    start = time.perf_counter()
+    filtered = collisions.filter(**FILTERS)
+    return time.perf_counter() - start, len(filtered)
+
+
+def case_serialize(data_dir):
+    collisions = load(data_dir, True)[:SERIALIZE_LIMIT].to_collisions()
+    start = time.perf_counter()
+    serialized = collisions.serialize()
+    return time.perf_counter() - start, len(serialized)
+
+
+def case_parse(data_dir):
+    serialized = load(data_dir, True)[:SERIALIZE_LIMIT].serialize()
+    start = time.perf_counter()
+    parsed = [Collision.parse(data) for data in serialized]
+    return time.perf_counter() - start, len(parsed)
+
+
+def case_parse_many(data_dir):
+    serialized = load(data_dir, True)[:SERIALIZE_LIMIT].serialize()
+    start = time.perf_counter()
+    parsed = Collisions.parse_many(serialized)
+    return time.perf_counter() - start, len(parsed)
+
+
+CASES = {
+    'from_dir_columnar': case_from_dir_columnar,
+    'from_dir_objects': case_from_dir_objects,
+    'filter_columnar': case_filter_columnar,
+    'filter_objects': case_filter_objects,
+    'serialize': case_serialize,
+    'parse': case_parse,
+    'parse_many': case_parse_many,
+}
+
+
+def run_case(name, data_dir):
+    seconds, count = CASES[name](data_dir)
+    return {
+        'seconds': seconds,
+        'peak_rss': get_peak_rss(),
+        'count': count,
+    }
+
+
+def run_isolated(name, data_dir):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_case, name, data_dir).result()
+
+
+def run(data_dir, cases, repeat=1):
+    '''
+    Run each case repeat times, keeping the fastest time and the largest
+    peak RSS
+
+    :return: {case: {'seconds', 'peak_rss', 'count'}}
+    '''
+    results = {}
+    for name in cases:
+        runs = [run_isolated(name, data_dir) for _ in range(repeat)]
+        results[name] = {
+            'seconds': min(r['seconds'] for r in runs),
+            'peak_rss': max(r['peak_rss'] for r in runs),
+            'count': runs[0]['count'],
+        }
+    return results
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, rss_tolerance=RSS_TOLERANCE):
+    '''
+    :return: list of regression messages, empty if none
+    '''
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if result['seconds'] > expected['seconds'] * (1 + time_tolerance):
+            regressions.append(
+                '%s took %.3fs, baseline %.3fs' % (name, result['seconds'], expected['seconds'])
+            )
+        if result['peak_rss'] > expected['peak_rss'] * (1 + rss_tolerance):
+            regressions.append(
+                '%s peak RSS %.1fMB, baseline %.1fMB' % (
+                    name,
+                    result['peak_rss'] / 2 ** 20,
+                    expected['peak_rss'] / 2 ** 20
+                )
+            )
+        if result['count'] != expected['count']:
+            regressions.append(
+                '%s gave %s results, baseline %s' % (name, result['count'], expected['count'])
+            )
+    return regressions
+
+
+def read_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_baselines(path, baselines):
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accidents', type=int, default=10000)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--data-dir', help='reuse generated data from here rather than a temp dir')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE)
+    parser.add_argument('--rss-tolerance', type=float, default=RSS_TOLERANCE)
+    args = parser.parse_args()
+
+    dirpath = args.data_dir or tempfile.mkdtemp()
+    try:
+        if not os.path.exists(os.path.join(dirpath, 'uk', 'accident.csv')):
+            print(f'Generating {args.accidents} accidents')
+            generate(os.path.join(dirpath, 'uk'), args.accidents)
+        # Partition up front so it isn't counted against the first case
+        Collisions._prepare_dir(dirpath, region='uk')
+
+        results = run(dirpath, args.cases, repeat=args.repeat)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(dirpath)
+
+    for name, result in results.items():
+        print(
+            f'{name:<18} {result["count"]:>9} {result["seconds"]:9.3f}s '
+            f'{result["peak_rss"] / 2 ** 20:9.1f}MB peak RSS'
+        )
+
+    baselines = read_baselines(args.baseline)
+    key = str(args.accidents)
+
+    if args.save_baseline:
+        baselines[key] = dict(baselines.get(key, {}), **results)
+        write_baselines(args.baseline, baselines)
+        print(f'Saved baseline to {args.baseline}')
+        return
+
+    if key not in baselines:
+        print(
+            f'No baseline for {args.accidents} accidents in {args.baseline}, '
+            'record one with --save-baseline'
+        )
+        return
+
+    regressions = compare(
+        results,
+        baselines[key],
+        time_tolerance=args.time_tolerance,
+        rss_tolerance=args.rss_tolerance
+    )
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if regressions:
+        sys.exit(1)
+    print('No regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,20 @@ from setuptools import (
 
 INSTALL_REQUIRES = (
     'boto3',
+    'numpy',
+    'pandas',
     'road-collisions-base'
 )
 
+EXTRAS_REQUIRE = {
+    # Faster csv parsing, and Parquet / Arrow export
+    'arrow': ['pyarrow'],
+    # Faster NDJSON export
+    'json': ['orjson'],
+    # instrumentation.tqdm_progress
+    'progress': ['tqdm'],
+}
+
 setup(
     name='road_collisions_uk',
     version='0.0.3',
@@ -18,6 +29,7 @@ setup(
     packages=find_packages('src'),
     package_dir={'': 'src'},
     install_requires=INSTALL_REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
     entry_points={
         'console_scripts': [
             'load_road_collisions_uk = road_collisions_uk.bin.load:main',
@@ -1,3 +0,0 @@
-from road_collisions_uk.download import ensure_data_downloaded
-
-ensure_data_downloaded()
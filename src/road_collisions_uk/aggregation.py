@@ -0,0 +1,218 @@
+'''
+Vectorized group by over the columns of ColumnarCollisions
+
+    collisions.groupby('police_force').agg(
+        collisions='count',
+        casualties=('number_of_casualties', 'sum'),
+    )
+    collisions.groupby('accident_year').breakdown('accident_severity')
+    collisions.groupby('vehicle_type').agg(collisions=('accident_index', 'nunique'))
+    collisions.groupby('weekday', 'hour').count()
+
+Grouping on a Vehicle or Casualty field groups the vehicles / casualties,
+with the fields of the collision they belong to available alongside.
+Names shared by Vehicle and Casualty such as vehicle_reference need a
+vehicle. or casualty. prefix.
+
+On a list backed Collisions only the columns a grouping uses are built
+from the Collision objects, on each groupby call.
+'''
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.timeseries import TIME_FIELDS
+from road_collisions_uk.utils import decode_strings
+
+
+LEVELS = ('collision', 'vehicle', 'casualty')
+
+AGGREGATIONS = ('count', 'sum', 'mean', 'min', 'max', 'nunique')
+
+
+class GroupBy():
+
+    def __init__(self, collisions, fields, level=None):
+        from road_collisions_uk.models.columnar import ColumnarCollisions
+
+        if not isinstance(collisions, ColumnarCollisions):
+            # Only the columns grouped on and aggregated are built
+            collisions = ColumnarCollisions.over_collisions(collisions)
+        self.collisions = collisions
+        self.fields = list(fields)
+
+        resolved = [self._resolve(field) for field in self.fields]
+        child_levels = {table for table, _ in resolved if table != 'collision'}
+        if level is None:
+            if len(child_levels) > 1:
+                raise ValueError('Cannot group on vehicle and casualty fields together')
+            level = child_levels.pop() if child_levels else 'collision'
+        if level not in LEVELS:
+            raise ValueError('Unknown level %s' % (level))
+        if child_levels - {level}:
+            raise ValueError('Cannot group on %s fields at %s level' % (child_levels, level))
+        self.level = level
+
+        self._parents = None
+        if level != 'collision':
+            offsets = getattr(collisions, f'{level}_offsets')
+            self._parents = np.repeat(
+                np.arange(len(collisions), dtype=np.int64),
+                np.diff(offsets)
+            )
+
+        codes = []
+        uniques = []
+        for field in self.fields:
+            field_codes, field_uniques = pd.factorize(
+                self.get_column(field),
+                sort=True,
+                use_na_sentinel=False
+            )
+            codes.append(field_codes)
+            uniques.append(field_uniques)
+
+        if codes:
+            dims = [max(len(u), 1) for u in uniques]
+            group_ids = np.ravel_multi_index(codes, dims)
+            group_ids, self.group_index = np.unique(group_ids, return_inverse=True)
+            self.keys = [
+                u[c] for u, c in zip(uniques, np.unravel_index(group_ids, dims))
+            ]
+        else:
+            self.group_index = np.zeros(self.num_rows, dtype=np.int64)
+            self.keys = []
+        self.group_index = self.group_index.reshape(-1)
+        self.num_groups = len(self.keys[0]) if self.keys else 1
+
+    @property
+    def num_rows(self):
+        if self._parents is None:
+            return len(self.collisions)
+        return len(self._parents)
+
+    def _resolve(self, field):
+        '''
+        :return: (table, column name)
+        '''
+        if '.' in field:
+            table, name = field.split('.', 1)
+            table = {'vehicles': 'vehicle', 'casualties': 'casualty'}.get(table, table)
+            if table not in LEVELS:
+                raise ValueError('Unknown table %s' % (table))
+            return table, name
+
+        if field in self.collisions.columns or field in TIME_FIELDS:
+            return 'collision', field
+
+        tables = [
+            table for table, columns in (
+                ('vehicle', self.collisions.vehicle_columns),
+                ('casualty', self.collisions.casualty_columns),
+            ) if field in columns
+        ]
+        if len(tables) > 1:
+            raise ValueError(
+                '%s is on both vehicles and casualties, use vehicle.%s or casualty.%s' % (field, field, field)
+            )
+        if not tables:
+            raise ValueError('Unknown field %s' % (field))
+        return tables[0], field
+
+    def get_column(self, field):
+        '''
+        Get a field's values for each row being grouped
+        '''
+        table, name = self._resolve(field)
+        if table == 'collision':
+            if name in TIME_FIELDS:
+                column = self.collisions.get_time_column(name)
+            else:
+                column = decode_strings(self.collisions.columns[name])
+            if self._parents is not None:
+                column = column[self._parents]
+            return column
+
+        if table != self.level:
+            raise ValueError(
+                'Cannot use %s when grouping %ss, pass level=\'%s\'' % (field, self.level, table)
+            )
+        return decode_strings(getattr(self.collisions, f'{table}_columns')[name])
+
+    def _index(self):
+        if not self.fields:
+            return pd.RangeIndex(1)
+        if len(self.fields) == 1:
+            return pd.Index(self.keys[0], name=self.fields[0])
+        return pd.MultiIndex.from_arrays(self.keys, names=self.fields)
+
+    def _aggregate(self, field, func):
+        if func == 'count':
+            return np.bincount(self.group_index, minlength=self.num_groups)
+
+        values = self.get_column(field)
+
+        if func == 'nunique':
+            value_codes, value_uniques = pd.factorize(values, use_na_sentinel=False)
+            num_values = max(len(value_uniques), 1)
+            pairs = np.unique(self.group_index * num_values + value_codes)
+            return np.bincount(pairs // num_values, minlength=self.num_groups)
+
+        if values.dtype == object:
+            raise ValueError('Cannot %s %s' % (func, field))
+
+        valid = ~np.isnan(values) if values.dtype.kind == 'f' else np.ones(len(values), dtype=bool)
+        group_index = self.group_index[valid]
+        values = values[valid]
+
+        if func in {'sum', 'mean'}:
+            sums = np.bincount(group_index, weights=values, minlength=self.num_groups)
+            if func == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    return sums / np.bincount(group_index, minlength=self.num_groups)
+            if values.dtype.kind in 'iu':
+                return sums.astype(np.int64)
+            return sums
+
+        if func in {'min', 'max'}:
+            result = np.full(self.num_groups, np.nan)
+            ufunc = np.fmin if func == 'min' else np.fmax
+            ufunc.at(result, group_index, values.astype(np.float64))
+            return result
+
+        raise ValueError('Unknown aggregation %s, expected one of %s' % (func, AGGREGATIONS))
+
+    def agg(self, **aggregations):
+        '''
+        Aggregate each group
+
+        :kwargs: output column name to 'count' or (field, aggregation)
+            where aggregation is one of count, sum, mean, min, max, nunique
+        :return: pandas DataFrame indexed by the group keys
+        '''
+        data = {}
+        for name, spec in aggregations.items():
+            if isinstance(spec, str):
+                field, func = None, spec
+            else:
+                field, func = spec
+            data[name] = self._aggregate(field, func)
+        return pd.DataFrame(data, index=self._index())
+
+    def count(self):
+        return pd.Series(self._aggregate(None, 'count'), index=self._index(), name='count')
+
+    def sum(self, field):
+        return pd.Series(self._aggregate(field, 'sum'), index=self._index(), name=field)
+
+    def breakdown(self, field):
+        '''
+        Count the rows of each value of field in each group, for example
+        the number of fatal, serious and slight collisions
+
+        :return: pandas DataFrame with a column per value of field
+        '''
+        breakdown = GroupBy(self.collisions, self.fields + [field], level=self.level)
+        counts = breakdown.count()
+        if not self.fields:
+            return counts.to_frame().T.reset_index(drop=True)
+        return counts.unstack(field, fill_value=0)
@@ -0,0 +1,290 @@
+'''
+Load collisions from asyncio code, overlapping downloads with extracting
+and parsing
+
+    collisions = await Collisions.aload()
+
+The archives in the bucket are downloaded max_downloads at a time. As
+each one lands it is extracted, the tables in it are partitioned and
+the requested years read into columns, up to max_workers at a time, while
+the other downloads carry on. Once every table is read they're joined.
+
+Downloaded archives wait in a queue of at most max_pending to be
+processed. When the queue is full, downloads wait rather than piling up
+on disk ahead of the parsing.
+
+All the blocking work, S3 calls included, runs in an executor so the
+event loop stays free for whatever else it's serving.
+'''
+import asyncio
+import glob
+import os
+
+from road_collisions_base import logger
+
+from road_collisions_uk.download import (
+    BUCKET,
+    DATA_DIR,
+    download_object,
+    get_s3_client,
+    is_downloaded,
+    is_offline,
+    list_objects,
+    write_listing
+)
+from road_collisions_uk.ingest import read_table
+from road_collisions_uk.instrumentation import LoadStats
+from road_collisions_uk.query import KEY_INDEXES
+from road_collisions_uk.partitions import (
+    TABLES,
+    get_partition_paths,
+    get_source_path,
+    is_partitioned,
+    partition_table
+)
+from road_collisions_uk.utils import (
+    extract_tgz,
+    get_manifest_path,
+    read_json
+)
+
+
+MAX_DOWNLOADS = 4
+
+MAX_WORKERS = 2
+
+MAX_PENDING = 2
+
+ARCHIVE_EXTENSIONS = {'.tgz', '.gz'}
+
+# Tells a worker there's nothing more to process
+_DONE = object()
+
+
+def get_archive_tables(archive_path):
+    '''
+    The tables whose csvs an extracted archive holds
+    '''
+    manifest = read_json(get_manifest_path(archive_path)) or {}
+    tables = []
+    for member in manifest.get('members', {}):
+        table = os.path.splitext(os.path.basename(member))[0]
+        if table in TABLES:
+            tables.append(table)
+    return tables
+
+
+def read_partitions(data_dir, table, year, stats):
+    '''
+    Partition a table if its csv changed and read the requested years
+    '''
+    if not is_partitioned(data_dir, table):
+        with stats.stage('partition') as stage:
+            stage.add_rows(partition_table(data_dir, table))
+            stage.update()
+
+    paths = get_partition_paths(data_dir, table, year=year)
+    with stats.stage('read_csv', total=len(paths)) as stage:
+        return read_table(paths, table, stage=stage)
+
+
+def process_archive(data_dir, path, year, stats):
+    '''
+    Extract an archive and read the tables in it, run in the executor
+
+    :return: {table: columns}
+    '''
+    if os.path.splitext(path)[-1] not in ARCHIVE_EXTENSIONS:
+        return {}
+
+    with stats.stage('extract') as stage:
+        if extract_tgz(path):
+            stage.update()
+
+    return {
+        table: read_partitions(data_dir, table, year, stats)
+        for table in get_archive_tables(path)
+    }
+
+
+async def _download_worker(loop, executor, s3, bucket, data_dir, objects, fetched, stats):
+    while True:
+        try:
+            obj = objects.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        filepath = os.path.join(data_dir, obj['Key'])
+        downloaded = await loop.run_in_executor(executor, is_downloaded, filepath, obj)
+        if not downloaded:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            logger.info('Downloading %s', obj['Key'])
+            with stats.stage('download') as stage:
+                await loop.run_in_executor(
+                    executor,
+                    lambda: download_object(s3, obj, filepath, bucket=bucket)
+                )
+                stage.add_bytes(obj['Size'])
+                stage.update()
+
+        # Waits here when processing is max_pending behind
+        await fetched.put(filepath)
+
+
+async def _process_worker(loop, executor, data_dir, year, fetched, tables, stats):
+    while True:
+        path = await fetched.get()
+        if path is _DONE:
+            return
+        # Archives are processed on several executor threads at once, so
+        # each gets its own stats, merged here on the loop's thread
+        archive_stats = LoadStats()
+        archive_tables = await loop.run_in_executor(
+            executor, process_archive, data_dir, path, year, archive_stats
+        )
+        stats.merge(archive_stats)
+        for table, columns in archive_tables.items():
+            if table in tables:
+                # Both would have been extracted over the same csv
+                raise ValueError(
+                    'More than one archive in %s has %s.csv, %s is one' % (data_dir, table, path)
+                )
+            tables[table] = columns
+
+
+async def _gather(*coroutines):
+    '''
+    Run coroutines together, cancelling the rest if one fails
+    '''
+    tasks = [asyncio.ensure_future(c) for c in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def aload_dir(
+    data_dir=DATA_DIR,
+    year=None,
+    columnar=False,
+    compact=False,
+    download=None,
+    bucket=BUCKET,
+    s3=None,
+    max_downloads=MAX_DOWNLOADS,
+    max_workers=MAX_WORKERS,
+    max_pending=MAX_PENDING,
+    indexes=KEY_INDEXES,
+    executor=None,
+    progress=None
+):
+    '''
+    Download, extract and read collisions concurrently
+
+    :kwarg year: None for all years, an int or an iterable of ints
+    :kwarg columnar: return a ColumnarCollisions rather than objects
+    :kwarg compact: see ColumnarCollisions.compact
+    :kwarg download: fetch new / changed objects from S3 first, on
+        unless ROAD_COLLISIONS_OFFLINE is set
+    :kwarg max_downloads: how many objects to download at once
+    :kwarg max_workers: how many archives to extract / read at once
+    :kwarg max_pending: how many downloaded archives can wait to be
+        processed before downloads wait
+    :kwarg indexes: fields to build indexes on, see Collisions.from_dir
+    :kwarg executor: concurrent.futures executor to run the blocking work
+        in, defaults to the loop's default executor
+    :kwarg progress: see road_collisions_uk.instrumentation
+    :return: Collisions with load_stats
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    loop = asyncio.get_running_loop()
+    stats = LoadStats(progress=progress)
+    os.makedirs(data_dir, exist_ok=True)
+
+    if download is None:
+        download = not is_offline()
+
+    listing = []
+    if download:
+        if s3 is None:
+            s3 = await loop.run_in_executor(executor, get_s3_client)
+        with stats.stage('list'):
+            listing = await loop.run_in_executor(
+                executor,
+                lambda: list(list_objects(s3, bucket=bucket))
+            )
+    else:
+        listing = [
+            {'Key': os.path.relpath(filename, data_dir)}
+            for filename in sorted(glob.iglob(f'{data_dir}/**', recursive=True))
+            if os.path.splitext(filename)[-1] in ARCHIVE_EXTENSIONS
+        ]
+
+    objects = asyncio.Queue()
+    for obj in listing:
+        objects.put_nowait(obj)
+    fetched = asyncio.Queue(maxsize=max(max_pending, 1))
+    tables = {}
+
+    async def fetch_all():
+        if download:
+            await _gather(*[
+                _download_worker(loop, executor, s3, bucket, data_dir, objects, fetched, stats)
+                for _ in range(max(max_downloads, 1))
+            ])
+        else:
+            while not objects.empty():
+                await fetched.put(os.path.join(data_dir, objects.get_nowait()['Key']))
+        for _ in range(max(max_workers, 1)):
+            await fetched.put(_DONE)
+
+    await _gather(
+        fetch_all(),
+        *[
+            _process_worker(loop, executor, data_dir, year, fetched, tables, stats)
+            for _ in range(max(max_workers, 1))
+        ]
+    )
+
+    if download:
+        await loop.run_in_executor(executor, write_listing, data_dir, listing)
+
+    # Tables already extracted before, rather than from an archive this time
+    for table in TABLES:
+        if table not in tables:
+            if not os.path.exists(get_source_path(data_dir, table)):
+                raise FileNotFoundError('No %s data in %s' % (table, data_dir))
+            tables[table] = await loop.run_in_executor(
+                executor, read_partitions, data_dir, table, year, stats
+            )
+
+    def join():
+        with stats.stage('join') as stage:
+            collisions = ColumnarCollisions.from_columns(
+                tables['accident'],
+                tables['vehicle'],
+                tables['casualty']
+            )
+            stage.add_rows(len(collisions))
+        if compact:
+            with stats.stage('compact') as stage:
+                collisions = collisions.compact()
+                stage.add_rows(len(collisions))
+        if indexes:
+            with stats.stage('index') as stage:
+                collisions.create_index(*indexes)
+                stage.add_rows(len(collisions))
+        if not columnar:
+            with stats.stage('construct', total=len(collisions)) as stage:
+                collisions = collisions.to_collisions(progress=stage.update)
+                stage.add_rows(len(collisions))
+        return collisions
+
+    collisions = await loop.run_in_executor(executor, join)
+
+    stats.finish()
+    stats.log()
+    collisions.load_stats = stats
+    return collisions
@@ -5,6 +5,7 @@ from road_collisions_uk.models.collision import Collisions
 
 def main():
     print('NOTE: Since UK data is so large, only loading data from 2020')
+    print('Use Collisions.map_reduce_all for statistics over every year')
     collisions = Collisions.load_all(year=2020)
 
     logger.info('Loaded %s collisions', (len(collisions)))
@@ -0,0 +1,188 @@
+'''
+Map / reduce over collisions a chunk at a time, for statistics over more
+years than fit in memory at once
+
+    def severity_counts(collisions):
+        return collisions.groupby('accident_severity').count()
+
+    counts = Collisions.map_reduce('/opt/road_collisions/', severity_counts, region='uk')
+
+Chunks are read from the year partitions one at a time, either a year
+per chunk or a fixed number of collisions, so memory is bounded by about
+a year of collisions (per worker) whatever the number of years.
+
+Each chunk's map result is folded into the running result with
+reduce_func as soon as it is ready, so only one intermediate result is
+kept. The default, combine, adds numbers, arrays, pandas Series /
+DataFrames, Counters and dicts of them.
+'''
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.ingest import load_dir
+from road_collisions_uk.partitions import (
+    get_partition_years,
+    get_years
+)
+
+
+def combine(a, b):
+    '''
+    Add two map results together, dicts and tuples are combined key by
+    key / item by item and lists are concatenated
+    '''
+    if a is None:
+        return b
+    if b is None:
+        return a
+
+    if isinstance(a, pd.Series) and isinstance(b, pd.Series):
+        combined = a.add(b, fill_value=0)
+        if a.dtype.kind in 'iu' and b.dtype.kind in 'iu':
+            combined = combined.astype(np.int64)
+        return combined
+    if isinstance(a, pd.DataFrame) and isinstance(b, pd.DataFrame):
+        return a.add(b, fill_value=0)
+    if isinstance(a, Counter):
+        combined = Counter(a)
+        combined.update(b)
+        return combined
+    if isinstance(a, dict):
+        combined = dict(a)
+        for key, value in b.items():
+            combined[key] = combine(combined.get(key), value)
+        return combined
+    if isinstance(a, tuple):
+        return tuple(combine(x, y) for x, y in zip(a, b))
+    return a + b
+
+
+def _get_years(data_dir, year):
+    years = get_partition_years(data_dir, 'accident')
+    requested = get_years(year)
+    if requested is not None:
+        requested = set(requested)
+        years = [y for y in years if y in requested]
+    return years
+
+
+def _load_year(data_dir, year, compact):
+    collisions = load_dir(data_dir, year=year)
+    if compact:
+        collisions = collisions.compact()
+    return collisions
+
+
+def _split(collisions, chunk_size):
+    for start in range(0, len(collisions), chunk_size):
+        yield collisions.view(start, start + chunk_size)
+
+
+def iter_year_chunks(data_dir, chunk_size=None, year=None, compact=False):
+    '''
+    Yield ColumnarCollisions chunks from the partitions of data_dir
+
+    :param data_dir: dir holding the partitioned csvs
+    :kwarg chunk_size: None for a chunk per year, otherwise chunks of this
+        many collisions, which can span years
+    :kwarg year: None for all years, an int or an iterable of ints
+    :kwarg compact: compact each year as it's read, see
+        ColumnarCollisions.compact
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1')
+
+    pending = []
+    pending_length = 0
+    for partition_year in _get_years(data_dir, year):
+        collisions = _load_year(data_dir, partition_year, compact)
+        if chunk_size is None:
+            yield collisions
+            continue
+
+        start = 0
+        while start < len(collisions):
+            stop = min(start + chunk_size - pending_length, len(collisions))
+            pending.append(collisions.view(start, stop))
+            pending_length += stop - start
+            start = stop
+            if pending_length == chunk_size:
+                yield pending[0] if len(pending) == 1 else ColumnarCollisions.concat(pending)
+                pending = []
+                pending_length = 0
+
+    if pending:
+        yield pending[0] if len(pending) == 1 else ColumnarCollisions.concat(pending)
+
+
+def _fold(values, reduce_func):
+    result = None
+    for i, value in enumerate(values):
+        result = value if i == 0 else reduce_func(result, value)
+    return result
+
+
+def _map_year(data_dir, year, map_func, reduce_func, chunk_size, compact):
+    '''
+    Map / reduce the chunks of one year, run in the worker processes
+    '''
+    collisions = _load_year(data_dir, year, compact)
+    chunks = [collisions] if chunk_size is None else _split(collisions, chunk_size)
+    return _fold(map(map_func, chunks), reduce_func)
+
+
+def map_reduce_dir(
+    data_dir,
+    map_func,
+    reduce_func=combine,
+    chunk_size=None,
+    year=None,
+    compact=False,
+    workers=None
+):
+    '''
+    Call map_func on each chunk of the collisions in data_dir and fold
+    the results together with reduce_func
+
+    :param data_dir: dir holding the partitioned csvs
+    :param map_func: function of a ColumnarCollisions chunk
+    :kwarg reduce_func: function of two map results giving their
+        combination, should be associative. Defaults to combine
+    :kwarg chunk_size: None for a chunk per year, otherwise chunks of this
+        many collisions. With workers chunks don't span years
+    :kwarg year: None for all years, an int or an iterable of ints
+    :kwarg compact: compact each year as it's read
+    :kwarg workers: if more than 1, map each year in a pool of this many
+        processes, map_func and reduce_func then need to be picklable
+    :return: the combined result, None if there are no collisions
+    '''
+    if workers is not None and workers > 1:
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1')
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return _fold(
+                pool.map(
+                    _map_year,
+                    repeat(data_dir),
+                    _get_years(data_dir, year),
+                    repeat(map_func),
+                    repeat(reduce_func),
+                    repeat(chunk_size),
+                    repeat(compact)
+                ),
+                reduce_func
+            )
+
+    return _fold(
+        map(
+            map_func,
+            iter_year_chunks(data_dir, chunk_size=chunk_size, year=year, compact=compact)
+        ),
+        reduce_func
+    )
@@ -1,43 +1,330 @@
+import datetime
+import hashlib
 import os
+import threading
+import time
 
-import boto3
-from botocore import UNSIGNED
-from botocore.client import Config
+from concurrent.futures import ThreadPoolExecutor
 
+from road_collisions_base import logger
 
-def download_data():
-    os.makedirs(
-        '/opt/road_collisions/uk',
-        exist_ok=True
-    )
+from road_collisions_uk.utils import (
+    atomic_write_json,
+    read_json
+)
+
+
+BUCKET = 'road-collisions-uk'
+DATA_DIR = '/opt/road_collisions/uk'
+
+# Objects bigger than this are fetched as concurrent ranged GETs
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024 * 1024
+
+MAX_WORKERS = 8
+CHUNK_WORKERS = 4
+
+DOWNLOAD_SUFFIX = '.download.json'
+
+# A listing of the bucket younger than this is trusted rather than
+# listing the bucket again
+LISTING_FILENAME = '.listing.json'
+LISTING_TTL = int(os.environ.get('ROAD_COLLISIONS_LISTING_TTL', 24 * 60 * 60))
+
+# Data dirs that have been checked already by this process
+_ensured = set()
 
-    s3 = boto3.client(
+
+def is_offline():
+    return os.environ.get('ROAD_COLLISIONS_OFFLINE', '').lower() in {'1', 'true', 'yes'}
+
+
+def get_s3_client():
+    # Imported here since boto3 is slow to import and only needed when
+    # actually talking to S3
+    import boto3
+    from botocore import UNSIGNED
+    from botocore.client import Config
+
+    return boto3.client(
         's3',
         region_name='eu-west-1',
         config=Config(signature_version=UNSIGNED)
     )
 
+
+def list_objects(s3, bucket=BUCKET):
     paginator = s3.get_paginator('list_objects')
-    for result in paginator.paginate(Bucket='road-collisions-uk'):
+    for result in paginator.paginate(Bucket=bucket):
         for key in result.get('Contents', []):
-            if os.path.exists(os.path.join('/opt/road_collisions/uk', key['Key'])):
-                continue
-            s3.download_file(
-                'road-collisions-uk',
-                key['Key'],
-                os.path.join('/opt/road_collisions/uk', key['Key'])
+            yield key
+
+
+def get_etag(obj):
+    return obj['ETag'].strip('"')
+
+
+def md5_hash(filepath, chunk_size=1024 * 1024):
+    md5 = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def etag_matches(filepath, etag):
+    '''
+    Check a file against an S3 ETag. Multipart ETags aren't a hash of the
+    content so those are trusted if the size matched.
+    '''
+    if '-' in etag:
+        return True
+    return md5_hash(filepath) == etag
+
+
+def get_download_record_path(filepath):
+    return filepath + DOWNLOAD_SUFFIX
+
+
+def is_downloaded(filepath, obj):
+    '''
+    Whether filepath is a complete copy of the S3 object described by obj
+    as given in a bucket listing
+    '''
+    if not os.path.exists(filepath):
+        return False
+
+    if os.path.getsize(filepath) != obj['Size']:
+        return False
+
+    record = read_json(get_download_record_path(filepath))
+    if record is not None:
+        return record.get('etag') == get_etag(obj)
+
+    # Downloaded before download records were kept
+    if not etag_matches(filepath, get_etag(obj)):
+        return False
+    write_download_record(filepath, obj)
+    return True
+
+
+def write_download_record(filepath, obj):
+    atomic_write_json(
+        get_download_record_path(filepath),
+        {
+            'etag': get_etag(obj),
+            'size': obj['Size'],
+            'last_modified': obj['LastModified'].timestamp()
+        }
+    )
+
+
+def get_chunks(size, chunk_size):
+    if size == 0:
+        return []
+    return [
+        (i, start, min(start + chunk_size, size) - 1)
+        for i, start in enumerate(range(0, size, chunk_size))
+    ]
+
+
+def download_object(s3, obj, filepath, bucket=BUCKET, chunk_size=None, chunk_workers=CHUNK_WORKERS):
+    '''
+    Download an S3 object to filepath
+
+    The data goes to a .part file next to filepath along with a record of
+    which ranges are done, so a crashed download resumes where it left
+    off if the object's ETag hasn't changed. Every GET is made with
+    IfMatch so ranges of different versions of the object aren't mixed.
+    The file is checked against the listing's size and ETag and only then
+    renamed to filepath.
+    '''
+    size = obj['Size']
+    etag = get_etag(obj)
+
+    if chunk_size is None:
+        chunk_size = size if size <= MULTIPART_THRESHOLD else CHUNK_SIZE
+    chunk_size = max(chunk_size, 1)
+
+    dirpath, filename = os.path.split(filepath)
+    part_path = os.path.join(dirpath, f'.{filename}.part')
+    state_path = part_path + '.json'
+
+    state = read_json(state_path)
+    if (
+        not state or
+        not os.path.exists(part_path) or
+        (state.get('etag'), state.get('size'), state.get('chunk_size')) != (etag, size, chunk_size)
+    ):
+        state = {'etag': etag, 'size': size, 'chunk_size': chunk_size, 'done': []}
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+        atomic_write_json(state_path, state)
+    elif state['done']:
+        logger.info('Resuming download of %s', obj['Key'])
+
+    done = set(state['done'])
+    lock = threading.Lock()
+
+    fd = os.open(part_path, os.O_WRONLY)
+    try:
+        def fetch(chunk):
+            i, start, end = chunk
+            response = s3.get_object(
+                Bucket=bucket,
+                Key=obj['Key'],
+                Range=f'bytes={start}-{end}',
+                IfMatch=obj['ETag']
             )
-            os.utime(
-                os.path.join(
-                    '/opt/road_collisions/uk',
-                    key['Key']
-                ),
-                (
-                    key['LastModified'].timestamp(),
-                    key['LastModified'].timestamp()
+            data = response['Body'].read()
+            if len(data) != end - start + 1:
+                raise IOError(
+                    'Short read of %s bytes %s-%s' % (obj['Key'], start, end)
                 )
+            os.pwrite(fd, data, start)
+            with lock:
+                done.add(i)
+                state['done'] = sorted(done)
+                atomic_write_json(state_path, state)
+
+        chunks = [c for c in get_chunks(size, chunk_size) if c[0] not in done]
+        if len(chunks) > 1 and chunk_workers > 1:
+            with ThreadPoolExecutor(max_workers=chunk_workers) as pool:
+                list(pool.map(fetch, chunks))
+        else:
+            for chunk in chunks:
+                fetch(chunk)
+    finally:
+        os.close(fd)
+
+    if os.path.getsize(part_path) != size or not etag_matches(part_path, etag):
+        os.remove(part_path)
+        os.remove(state_path)
+        raise IOError('Downloaded %s does not match its ETag' % (obj['Key']))
+
+    os.replace(part_path, filepath)
+    os.remove(state_path)
+    write_download_record(filepath, obj)
+    os.utime(
+        filepath,
+        (
+            obj['LastModified'].timestamp(),
+            obj['LastModified'].timestamp()
+        )
+    )
+
+
+def get_listing_path(data_dir):
+    return os.path.join(data_dir, LISTING_FILENAME)
+
+
+def write_listing(data_dir, objects):
+    atomic_write_json(
+        get_listing_path(data_dir),
+        {
+            'listed_at': time.time(),
+            'objects': [
+                {
+                    'Key': obj['Key'],
+                    'Size': obj['Size'],
+                    'ETag': obj['ETag'],
+                    'LastModified': obj['LastModified'].timestamp()
+                } for obj in objects
+            ]
+        }
+    )
+
+
+def read_listing(data_dir, ttl=LISTING_TTL):
+    '''
+    Get the cached bucket listing if it's younger than ttl seconds
+
+    :return: list of objects in the same form as list_objects or None
+    '''
+    listing = read_json(get_listing_path(data_dir))
+    if not listing or time.time() - listing.get('listed_at', 0) > ttl:
+        return None
+
+    return [
+        dict(
+            obj,
+            LastModified=datetime.datetime.fromtimestamp(
+                obj['LastModified'],
+                tz=datetime.timezone.utc
             )
+        ) for obj in listing['objects']
+    ]
+
+
+def download_data(data_dir=DATA_DIR, bucket=BUCKET, max_workers=MAX_WORKERS, s3=None, objects=None):
+    '''
+    Download everything in the bucket to data_dir, skipping files that
+    are already complete
+
+    :kwarg max_workers: how many objects to download at once
+    :kwarg objects: the bucket listing, listed now if not given
+    :return: the keys that were downloaded
+    '''
+    os.makedirs(
+        data_dir,
+        exist_ok=True
+    )
+
+    if s3 is None:
+        s3 = get_s3_client()
+
+    if objects is None:
+        objects = list(list_objects(s3, bucket=bucket))
+
+    missing = [
+        obj for obj in objects
+        if not is_downloaded(os.path.join(data_dir, obj['Key']), obj)
+    ]
+
+    def download(obj):
+        filepath = os.path.join(data_dir, obj['Key'])
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        logger.info('Downloading %s', obj['Key'])
+        download_object(s3, obj, filepath, bucket=bucket)
+        return obj['Key']
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        downloaded = list(pool.map(download, missing))
+
+    write_listing(data_dir, objects)
+
+    return downloaded
+
+
+def ensure_data_downloaded(data_dir=DATA_DIR, offline=None, ttl=LISTING_TTL, s3=None):
+    '''
+    Make sure the data is in data_dir, called when data is first needed
+    rather than on import
+
+    The bucket is only listed if the cached listing is older than ttl or a
+    file in it is missing / incomplete. Offline mode, from the offline
+    kwarg or ROAD_COLLISIONS_OFFLINE=1, never contacts S3 and uses
+    whatever is already in data_dir.
+
+    :return: the keys that were downloaded
+    '''
+    if offline is None:
+        offline = is_offline()
+
+    if offline:
+        logger.debug('Offline, using whatever data is in %s', data_dir)
+        return []
+
+    if data_dir in _ensured:
+        return []
 
+    listing = read_listing(data_dir, ttl=ttl)
+    if listing is not None and all(
+        is_downloaded(os.path.join(data_dir, obj['Key']), obj) for obj in listing
+    ):
+        _ensured.add(data_dir)
+        return []
 
-def ensure_data_downloaded():
-    download_data()
+    downloaded = download_data(data_dir=data_dir, s3=s3)
+    _ensured.add(data_dir)
+    return downloaded
@@ -0,0 +1,313 @@
+'''
+Streaming export to NDJSON, Parquet and Arrow and bulk import back into
+a ColumnarCollisions
+
+NDJSON has one Collision.serialize() shaped object per line, written a
+chunk at a time straight from the columns rather than building every
+dict first. orjson is used when installed.
+
+Parquet and Arrow are written as a dir of three flat tables linked by
+accident_index:
+
+    collision.parquet / collision.arrow
+    vehicle.parquet / vehicle.arrow
+    casualty.parquet / casualty.arrow
+
+Vehicles and casualties are stored in the order of the collisions they
+belong to, each chunk of collisions is a row group / record batch.
+'''
+import gzip
+import json
+import os
+
+import numpy as np
+
+from road_collisions_uk.models.schema import (
+    CASUALTY_SCHEMA,
+    COLLISION_SCHEMA,
+    VEHICLE_SCHEMA
+)
+from road_collisions_uk.utils import decode_strings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# How many collisions are converted / written at a time
+EXPORT_CHUNK_SIZE = 65536
+
+KEY_FIELD = 'accident_index'
+
+TABLES = ('collision', 'vehicle', 'casualty')
+
+FORMAT_EXTENSIONS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError('pyarrow is needed to read / write parquet and arrow')
+
+
+def _to_columnar(collisions):
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    if isinstance(collisions, ColumnarCollisions):
+        return collisions
+    return ColumnarCollisions.from_collisions(collisions)
+
+
+def _open(path, mode):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+if orjson is not None:
+    def dumps(record):
+        return orjson.dumps(record)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def dumps(record):
+        return _encoder.encode(record).encode()
+
+    loads = json.loads
+
+
+def _column_rows(columns, start, stop):
+    from road_collisions_uk.models.columnar import column_values
+
+    names = list(columns.keys())
+    values = [
+        column_values(name, columns[name], start, stop) for name in names
+    ]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def iter_records(collisions, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Yield chunks of Collision.serialize() shaped dicts, built from the
+    columns of a ColumnarCollisions without creating Collision objects
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    if not isinstance(collisions, ColumnarCollisions):
+        chunk = []
+        for collision in collisions:
+            chunk.append(collision.serialize())
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        return
+
+    vehicle_offsets = collisions.vehicle_offsets
+    casualty_offsets = collisions.casualty_offsets
+
+    for start in range(0, len(collisions), chunk_size):
+        stop = min(start + chunk_size, len(collisions))
+        records = _column_rows(collisions.columns, start, stop)
+        vehicle_start = vehicle_offsets[start]
+        vehicles = _column_rows(collisions.vehicle_columns, vehicle_start, vehicle_offsets[stop])
+        casualty_start = casualty_offsets[start]
+        casualties = _column_rows(collisions.casualty_columns, casualty_start, casualty_offsets[stop])
+
+        for i, record in enumerate(records, start):
+            record['casualties'] = casualties[
+                casualty_offsets[i] - casualty_start:casualty_offsets[i + 1] - casualty_start
+            ]
+            record['vehicles'] = vehicles[
+                vehicle_offsets[i] - vehicle_start:vehicle_offsets[i + 1] - vehicle_start
+            ]
+        yield records
+
+
+def write_ndjson(collisions, path, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Write one json object per line, gzipped if path ends in .gz
+
+    :param path: file path or a binary file object
+    :return: the number of collisions written
+    '''
+    if hasattr(path, 'write'):
+        f, close = path, False
+    else:
+        f, close = _open(path, 'wb'), True
+
+    count = 0
+    try:
+        for records in iter_records(collisions, chunk_size=chunk_size):
+            f.write(b''.join(dumps(record) + b'\n' for record in records))
+            count += len(records)
+    finally:
+        if close:
+            f.close()
+    return count
+
+
+def read_ndjson(path, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Bulk import NDJSON written by write_ndjson straight into typed
+    columns, without Collision.parse per line
+
+    :param path: file path or a binary file object
+    :return: ColumnarCollisions
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    if hasattr(path, 'read'):
+        f, close = path, False
+    else:
+        f, close = _open(path, 'rb'), True
+
+    try:
+        return ColumnarCollisions.from_serialized(
+            (loads(line) for line in f if line.strip()),
+            chunk_size=chunk_size
+        )
+    finally:
+        if close:
+            f.close()
+
+
+def _arrow_schema(schema, with_key):
+    fields = []
+    if with_key:
+        fields.append(pyarrow.field(KEY_FIELD, pyarrow.string()))
+    for name, dtype in schema.items():
+        if dtype == object:
+            fields.append(pyarrow.field(name, pyarrow.string()))
+        else:
+            fields.append(pyarrow.field(name, pyarrow.from_numpy_dtype(dtype)))
+    return pyarrow.schema(fields)
+
+
+def _arrow_chunk(columns, arrow_schema, start, stop, keys=None):
+    arrays = []
+    for field in arrow_schema:
+        if keys is not None and field.name == KEY_FIELD:
+            column = keys
+        else:
+            column = decode_strings(columns[field.name][start:stop])
+        arrays.append(pyarrow.array(column, type=field.type, from_pandas=True))
+    return pyarrow.Table.from_arrays(arrays, schema=arrow_schema)
+
+
+def _table_writer(fmt, path, arrow_schema):
+    if fmt == 'parquet':
+        return pyarrow.parquet.ParquetWriter(path, arrow_schema)
+    return pyarrow.ipc.new_file(path, arrow_schema)
+
+
+def get_table_path(dirpath, table, fmt):
+    return os.path.join(dirpath, table + FORMAT_EXTENSIONS[fmt])
+
+
+def write_tables(collisions, dirpath, fmt='parquet', chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Write collisions, vehicles and casualties as three flat tables
+    linked by accident_index
+
+    :param dirpath: dir to write the tables to
+    :kwarg fmt: parquet or arrow (the Arrow IPC file format)
+    :return: the number of collisions written
+    '''
+    _require_pyarrow()
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError('Unknown format %s, expected one of %s' % (fmt, list(FORMAT_EXTENSIONS)))
+
+    collisions = _to_columnar(collisions)
+    os.makedirs(dirpath, exist_ok=True)
+
+    tables = {
+        'collision': (collisions.columns, COLLISION_SCHEMA, None),
+        'vehicle': (collisions.vehicle_columns, VEHICLE_SCHEMA, collisions.vehicle_offsets),
+        'casualty': (collisions.casualty_columns, CASUALTY_SCHEMA, collisions.casualty_offsets),
+    }
+    keys = collisions.columns[KEY_FIELD]
+
+    for table, (columns, schema, offsets) in tables.items():
+        arrow_schema = _arrow_schema(
+            {k: v for k, v in schema.items() if k != KEY_FIELD},
+            with_key=True
+        )
+        writer = _table_writer(fmt, get_table_path(dirpath, table, fmt), arrow_schema)
+        try:
+            for start in range(0, max(len(collisions), 1), chunk_size):
+                stop = min(start + chunk_size, len(collisions))
+                if offsets is None:
+                    chunk = _arrow_chunk(columns, arrow_schema, start, stop)
+                else:
+                    chunk = _arrow_chunk(
+                        columns,
+                        arrow_schema,
+                        offsets[start],
+                        offsets[stop],
+                        keys=np.repeat(keys[start:stop], np.diff(offsets[start:stop + 1]))
+                    )
+                writer.write_table(chunk)
+        finally:
+            writer.close()
+
+    return len(collisions)
+
+
+def _read_table(path, fmt):
+    if fmt == 'parquet':
+        return pyarrow.parquet.read_table(path)
+    with pyarrow.memory_map(path) as source:
+        return pyarrow.ipc.open_file(source).read_all()
+
+
+def _table_columns(table, schema):
+    columns = {}
+    for name, dtype in list(schema.items()) + [(KEY_FIELD, np.dtype(object))]:
+        values = table.column(name).to_numpy()
+        if dtype == object:
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            columns[name] = column
+        else:
+            columns[name] = np.array(values, dtype=dtype)
+    return columns
+
+
+def read_tables(dirpath, fmt='parquet'):
+    '''
+    Bulk import tables written by write_tables into a ColumnarCollisions
+
+    :kwarg fmt: parquet or arrow
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    _require_pyarrow()
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError('Unknown format %s, expected one of %s' % (fmt, list(FORMAT_EXTENSIONS)))
+
+    return ColumnarCollisions.from_columns(
+        *[
+            _table_columns(
+                _read_table(get_table_path(dirpath, table, fmt), fmt),
+                schema
+            ) for table, schema in (
+                ('collision', COLLISION_SCHEMA),
+                ('vehicle', VEHICLE_SCHEMA),
+                ('casualty', CASUALTY_SCHEMA),
+            )
+        ]
+    )
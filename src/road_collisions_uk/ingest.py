@@ -0,0 +1,188 @@
+'''
+Read the csvs straight into typed columns using pandas' C parser, or
+pyarrow's when it's installed, with the dtypes from models/schema.py
+rather than building a dict per row and calling int() per cell
+'''
+import os
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.instrumentation import LoadStats
+from road_collisions_uk.partitions import get_partition_paths
+from road_collisions_uk.models.schema import (
+    CASUALTY_SCHEMA,
+    COLLISION_SCHEMA,
+    NULLABLE_FIELDS,
+    VEHICLE_SCHEMA
+)
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    DEFAULT_ENGINE = 'pyarrow'
+except ImportError:
+    pyarrow = None
+    DEFAULT_ENGINE = 'c'
+
+
+KEY_FIELD = 'accident_index'
+
+SCHEMAS = {
+    'accident': COLLISION_SCHEMA,
+    'vehicle': VEHICLE_SCHEMA,
+    'casualty': CASUALTY_SCHEMA,
+}
+
+
+def get_read_dtypes(schema):
+    '''
+    The dtypes to ask the csv parser for. Nullable fields are read as
+    strings and converted after so 'NULL' becomes NaN without treating
+    'NULL' as missing in every other column.
+    '''
+    dtypes = {
+        name: object if name in NULLABLE_FIELDS else dtype
+        for name, dtype in schema.items()
+    }
+    dtypes[KEY_FIELD] = object
+    return dtypes
+
+
+def _read_csv_pandas(path, dtypes):
+    df = pd.read_csv(
+        path,
+        usecols=list(dtypes.keys()),
+        dtype=dtypes,
+        keep_default_na=False,
+        na_filter=False,
+        float_precision='round_trip',
+        engine='c'
+    )
+    return {name: df[name].to_numpy(dtype=dtype) for name, dtype in dtypes.items()}
+
+
+def _read_csv_pyarrow(path, dtypes):
+    column_types = {
+        name: pyarrow.string() if dtype == object else pyarrow.from_numpy_dtype(dtype)
+        for name, dtype in dtypes.items()
+    }
+    table = pyarrow.csv.read_csv(
+        path,
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=list(dtypes.keys()),
+            null_values=[],
+            strings_can_be_null=False
+        )
+    )
+    return {
+        name: table.column(name).to_numpy() for name in dtypes.keys()
+    }
+
+
+def read_csv(path, schema, engine=None):
+    '''
+    Read one csv into typed columns
+
+    :param path: path of the csv
+    :param schema: {field: numpy dtype}
+    :kwarg engine: 'c' or 'pyarrow', defaults to pyarrow if installed
+    :return: {field: numpy array}, including accident_index
+    '''
+    dtypes = get_read_dtypes(schema)
+
+    if (engine or DEFAULT_ENGINE) == 'pyarrow':
+        raw = _read_csv_pyarrow(path, dtypes)
+    else:
+        raw = _read_csv_pandas(path, dtypes)
+
+    columns = {}
+    for name, dtype in dtypes.items():
+        if name in NULLABLE_FIELDS:
+            columns[name] = np.array(
+                pd.to_numeric(pd.Series(raw[name], dtype=object), errors='coerce'),
+                dtype=np.float64
+            )
+        elif dtype == object:
+            column = np.empty(len(raw[name]), dtype=object)
+            column[:] = raw[name]
+            columns[name] = column
+        else:
+            columns[name] = np.array(raw[name], dtype=dtype)
+    return columns
+
+
+def empty_columns(schema):
+    columns = {
+        name: np.empty(0, dtype=dtype) for name, dtype in schema.items()
+    }
+    columns[KEY_FIELD] = np.empty(0, dtype=object)
+    return columns
+
+
+def read_table(paths, table, engine=None, stage=None):
+    '''
+    Read and concatenate the csvs of a table into typed columns
+
+    :param paths: csv paths, such as the year partitions of the table
+    :param table: accident, vehicle or casualty
+    :kwarg stage: StageStats to count the rows / bytes / files read in
+    :return: {field: numpy array}, including accident_index
+    '''
+    schema = SCHEMAS[table]
+    parts = []
+    for path in paths:
+        parts.append(read_csv(path, schema, engine=engine))
+        if stage is not None:
+            stage.add_rows(len(parts[-1][KEY_FIELD]))
+            stage.add_bytes(os.path.getsize(path))
+            stage.update()
+    return concat_parts(parts, table)
+
+
+def concat_parts(parts, table):
+    '''
+    Concatenate the columns read from several csvs of a table, in order
+    '''
+    if not parts:
+        return empty_columns(SCHEMAS[table])
+    if len(parts) == 1:
+        return parts[0]
+    return {
+        name: np.concatenate([part[name] for part in parts])
+        for name in parts[0].keys()
+    }
+
+
+def load_dir(data_dir, year=None, engine=None, stats=None):
+    '''
+    Read the year partitions in data_dir into a ColumnarCollisions
+
+    :param data_dir: dir holding the partitioned csvs
+    :kwarg year: None for all years, an int or an iterable of ints
+    :kwarg engine: csv parser to use, 'c' or 'pyarrow'
+    :kwarg stats: LoadStats to record the read_csv / join stages in
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    if stats is None:
+        stats = LoadStats()
+
+    paths = {
+        table: get_partition_paths(data_dir, table, year=year)
+        for table in ('accident', 'vehicle', 'casualty')
+    }
+
+    with stats.stage('read_csv', total=sum(len(p) for p in paths.values())) as stage:
+        tables = [
+            read_table(table_paths, table, engine=engine, stage=stage)
+            for table, table_paths in paths.items()
+        ]
+
+    with stats.stage('join') as stage:
+        collisions = ColumnarCollisions.from_columns(*tables)
+        stage.add_rows(
+            len(collisions) + collisions.vehicle_offsets[-1] + collisions.casualty_offsets[-1]
+        )
+    return collisions
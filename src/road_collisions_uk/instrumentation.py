@@ -0,0 +1,234 @@
+'''
+Per stage timings, row throughput and memory of a load
+
+    collisions = Collisions.from_dir(dirpath, progress=tqdm_progress())
+    print(collisions.load_stats)
+    collisions.load_stats.stages['read_csv'].rows_per_second
+
+The stages of from_dir are extract, partition, read_csv, join, compact
+(only with compact=True), index (building the indexes asked for) and
+construct (building Collision objects, skipped for columnar loads).
+
+Each stage records peak_rss_delta, how much it raised the process's peak
+RSS (0 when it stayed under the peak of something before it), and rss,
+the RSS when it last finished. load_stats.peak_rss is the peak of the
+whole process when the load finished.
+
+A progress callback is called as progress(stage, done, total) when a
+stage starts, as it advances and when it finishes. total is None when
+not known up front.
+'''
+import os
+import sys
+import time
+
+from contextlib import contextmanager
+
+from road_collisions_base import logger
+
+
+def get_peak_rss():
+    '''
+    Peak resident set size of this process in bytes, None where it can't
+    be read such as on Windows
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def get_rss():
+    '''
+    Current resident set size of this process in bytes, None where
+    /proc isn't available
+    '''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StageStats():
+
+    def __init__(self, name, progress=None):
+        self.name = name
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.calls = 0
+        self.peak_rss_delta = None
+        self.rss = None
+        self.total = None
+        self.done = 0
+        self._progress = progress
+
+    def __repr__(self):
+        return 'StageStats(%s, %.3fs, %s rows)' % (self.name, self.seconds, self.rows)
+
+    @property
+    def rows_per_second(self):
+        if not self.seconds:
+            return None
+        return self.rows / self.seconds
+
+    def add_rows(self, rows):
+        self.rows += int(rows)
+
+    def add_bytes(self, num_bytes):
+        self.bytes += int(num_bytes)
+
+    def update(self, done=1):
+        '''
+        Advance the stage's progress by done units
+        '''
+        self.done += done
+        if self._progress is not None:
+            self._progress(self.name, self.done, self.total)
+
+    def merge(self, other):
+        self.seconds += other.seconds
+        self.rows += other.rows
+        self.bytes += other.bytes
+        self.calls += other.calls
+        self.done += other.done
+        if other.total is not None:
+            self.total = (self.total or 0) + other.total
+        # Other processes' peaks don't add to this one's
+        if other.peak_rss_delta is not None:
+            self.peak_rss_delta = max(self.peak_rss_delta or 0, other.peak_rss_delta)
+
+    def serialize(self):
+        return {
+            'seconds': self.seconds,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'calls': self.calls,
+            'rows_per_second': self.rows_per_second,
+            'peak_rss_delta': self.peak_rss_delta,
+            'rss': self.rss,
+        }
+
+
+class LoadStats():
+    '''
+    Stats of the stages of a load, available as collisions.load_stats
+    once the load finishes
+    '''
+
+    def __init__(self, progress=None):
+        self.stages = {}
+        self.progress = progress
+        self.started = time.perf_counter()
+        self.finished = None
+        self.peak_rss = None
+
+    def __repr__(self):
+        return 'LoadStats(%s)' % (
+            ', '.join('%s=%.3fs' % (name, s.seconds) for name, s in self.stages.items())
+        )
+
+    @property
+    def total_seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def get_stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = StageStats(name, progress=self.progress)
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name, total=None):
+        '''
+        Time a stage, entering the same stage again adds to it
+
+        :kwarg total: how many units the stage's progress counts up to
+        '''
+        stage = self.get_stage(name)
+        if total is not None:
+            stage.total = (stage.total or 0) + total
+        stage.calls += 1
+        logger.debug('Starting %s', name)
+        if self.progress is not None:
+            self.progress(name, stage.done, stage.total)
+
+        start = time.perf_counter()
+        start_peak = get_peak_rss()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start
+            if start_peak is not None:
+                stage.peak_rss_delta = (
+                    (stage.peak_rss_delta or 0) + get_peak_rss() - start_peak
+                )
+            stage.rss = get_rss()
+            if self.progress is not None:
+                self.progress(name, stage.done, stage.total)
+
+    def merge(self, other):
+        '''
+        Add the stages of another load, such as one done in a worker
+        process, to this one
+        '''
+        for name, stage in other.stages.items():
+            merged = self.get_stage(name)
+            merged.merge(stage)
+            if self.progress is not None:
+                self.progress(name, merged.done, merged.total)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        self.peak_rss = get_peak_rss()
+
+    def log(self):
+        for name, stage in self.stages.items():
+            logger.info(
+                '%-10s %8.3fs %10s rows%s',
+                name,
+                stage.seconds,
+                stage.rows,
+                ' %12.0f rows/s' % (stage.rows_per_second) if stage.rows_per_second else ''
+            )
+        peak_rss = self.peak_rss or get_peak_rss()
+        logger.info(
+            'Loaded in %.3fs%s',
+            self.total_seconds,
+            ', peak RSS %.1fMB' % (peak_rss / 2 ** 20) if peak_rss else ''
+        )
+
+    def serialize(self):
+        return {
+            'total_seconds': self.total_seconds,
+            'peak_rss': self.peak_rss,
+            'stages': {
+                name: stage.serialize() for name, stage in self.stages.items()
+            }
+        }
+
+
+def tqdm_progress(**kwargs):
+    '''
+    A progress callback showing a tqdm bar per stage, needs tqdm installed
+
+    :kwargs: passed to each tqdm bar
+    '''
+    from tqdm import tqdm
+
+    bars = {}
+
+    def progress(stage, done, total):
+        bar = bars.get(stage)
+        if bar is None:
+            bar = bars[stage] = tqdm(desc=stage, total=total, **kwargs)
+        if total is not None and bar.total != total:
+            bar.total = total
+        bar.update(done - bar.n)
+        if total is not None and done >= total:
+            bar.close()
+
+    return progress
@@ -0,0 +1,645 @@
+'''
+Labels of the STATS19 integer codes of Collision, Vehicle and Casualty
+fields
+
+    decode('weather_conditions', 2)
+    collision.get_label('weather_conditions')
+    collisions.decode('vehicle_type')
+    collisions.to_dataframe('vehicle', labels=True)
+
+Each coded field has a LookupTable of its labels indexed by code, so
+decoding a whole column is one take from that array rather than a dict
+lookup per value. Labels are interned so every decoded value of a label
+is the same str. Codes with no label decode to None.
+
+Labels are from the DfT Road Safety Open Data guide. Codes that are
+looked up elsewhere such as local_authority_district aren't included.
+'''
+import sys
+
+from functools import lru_cache
+
+import numpy as np
+
+
+MISSING_CODE = -1
+
+MISSING_LABEL = 'Data missing or out of range'
+
+UNKNOWN_SELF_REPORTED = 'unknown (self reported)'
+
+NOT_AT_JUNCTION = 'Not at junction or within 20 metres'
+
+SEVERITY_LABELS = {
+    1: 'Fatal',
+    2: 'Serious',
+    3: 'Slight',
+}
+
+ROAD_CLASS_LABELS = {
+    1: 'Motorway',
+    2: 'A(M)',
+    3: 'A',
+    4: 'B',
+    5: 'C',
+    6: 'Unclassified',
+}
+
+AGE_BAND_LABELS = {
+    1: '0 - 5',
+    2: '6 - 10',
+    3: '11 - 15',
+    4: '16 - 20',
+    5: '21 - 25',
+    6: '26 - 35',
+    7: '36 - 45',
+    8: '46 - 55',
+    9: '56 - 65',
+    10: '66 - 75',
+    11: 'Over 75',
+}
+
+HOME_AREA_TYPE_LABELS = {
+    1: 'Urban area',
+    2: 'Small town',
+    3: 'Rural',
+}
+
+IMD_DECILE_LABELS = {
+    1: 'Most deprived 10%',
+    2: 'More deprived 10-20%',
+    3: 'More deprived 20-30%',
+    4: 'More deprived 30-40%',
+    5: 'More deprived 40-50%',
+    6: 'Less deprived 40-50%',
+    7: 'Less deprived 30-40%',
+    8: 'Less deprived 20-30%',
+    9: 'Less deprived 10-20%',
+    10: 'Least deprived 10%',
+}
+
+DIRECTION_LABELS = {
+    0: 'Parked',
+    1: 'North',
+    2: 'North East',
+    3: 'East',
+    4: 'South East',
+    5: 'South',
+    6: 'South West',
+    7: 'West',
+    8: 'North West',
+    9: UNKNOWN_SELF_REPORTED,
+}
+
+COLLISION_LABELS = {
+    'police_force': {
+        1: 'Metropolitan Police',
+        3: 'Cumbria',
+        4: 'Lancashire',
+        5: 'Merseyside',
+        6: 'Greater Manchester',
+        7: 'Cheshire',
+        10: 'Northumbria',
+        11: 'Durham',
+        12: 'North Yorkshire',
+        13: 'West Yorkshire',
+        14: 'South Yorkshire',
+        16: 'Humberside',
+        17: 'Cleveland',
+        20: 'West Midlands',
+        21: 'Staffordshire',
+        22: 'West Mercia',
+        23: 'Warwickshire',
+        30: 'Derbyshire',
+        31: 'Nottinghamshire',
+        32: 'Lincolnshire',
+        33: 'Leicestershire',
+        34: 'Northamptonshire',
+        35: 'Cambridgeshire',
+        36: 'Norfolk',
+        37: 'Suffolk',
+        40: 'Bedfordshire',
+        41: 'Hertfordshire',
+        42: 'Essex',
+        43: 'Thames Valley',
+        44: 'Hampshire',
+        45: 'Surrey',
+        46: 'Kent',
+        47: 'Sussex',
+        48: 'City of London',
+        50: 'Devon and Cornwall',
+        52: 'Avon and Somerset',
+        53: 'Gloucestershire',
+        54: 'Wiltshire',
+        55: 'Dorset',
+        60: 'North Wales',
+        61: 'Gwent',
+        62: 'South Wales',
+        63: 'Dyfed-Powys',
+        91: 'Northern',
+        92: 'Grampian',
+        93: 'Tayside',
+        94: 'Fife',
+        95: 'Lothian and Borders',
+        96: 'Central',
+        97: 'Strathclyde',
+        98: 'Dumfries and Galloway',
+        99: 'Police Scotland',
+    },
+    'accident_severity': SEVERITY_LABELS,
+    'first_road_class': ROAD_CLASS_LABELS,
+    'road_type': {
+        1: 'Roundabout',
+        2: 'One way street',
+        3: 'Dual carriageway',
+        6: 'Single carriageway',
+        7: 'Slip road',
+        9: 'Unknown',
+        12: 'One way street/Slip road',
+    },
+    'junction_detail': {
+        0: NOT_AT_JUNCTION,
+        1: 'Roundabout',
+        2: 'Mini-roundabout',
+        3: 'T or staggered junction',
+        5: 'Slip road',
+        6: 'Crossroads',
+        7: 'More than 4 arms (not roundabout)',
+        8: 'Private drive or entrance',
+        9: 'Other junction',
+        99: UNKNOWN_SELF_REPORTED,
+    },
+    'junction_control': {
+        0: NOT_AT_JUNCTION,
+        1: 'Authorised person',
+        2: 'Auto traffic signal',
+        3: 'Stop sign',
+        4: 'Give way or uncontrolled',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'second_road_class': {
+        **ROAD_CLASS_LABELS,
+        0: NOT_AT_JUNCTION,
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'pedestrian_crossing_human_control': {
+        0: 'None within 50 metres',
+        1: 'Control by school crossing patrol',
+        2: 'Control by other authorised person',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'pedestrian_crossing_physical_facilities': {
+        0: 'No physical crossing facilities within 50 metres',
+        1: 'Zebra',
+        4: 'Pelican, puffin, toucan or similar non-junction pedestrian light crossing',
+        5: 'Pedestrian phase at traffic signal junction',
+        7: 'Footbridge or subway',
+        8: 'Central refuge',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'light_conditions': {
+        1: 'Daylight',
+        4: 'Darkness - lights lit',
+        5: 'Darkness - lights unlit',
+        6: 'Darkness - no lighting',
+        7: 'Darkness - lighting unknown',
+    },
+    'weather_conditions': {
+        1: 'Fine no high winds',
+        2: 'Raining no high winds',
+        3: 'Snowing no high winds',
+        4: 'Fine + high winds',
+        5: 'Raining + high winds',
+        6: 'Snowing + high winds',
+        7: 'Fog or mist',
+        8: 'Other',
+        9: 'Unknown',
+    },
+    'road_surface_conditions': {
+        1: 'Dry',
+        2: 'Wet or damp',
+        3: 'Snow',
+        4: 'Frost or ice',
+        5: 'Flood over 3cm. deep',
+        6: 'Oil or diesel',
+        7: 'Mud',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'special_conditions_at_site': {
+        0: 'None',
+        1: 'Auto traffic signal - out',
+        2: 'Auto signal part defective',
+        3: 'Road sign or marking defective or obscured',
+        4: 'Roadworks',
+        5: 'Road surface defective',
+        6: 'Oil or diesel',
+        7: 'Mud',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'carriageway_hazards': {
+        0: 'None',
+        1: 'Vehicle load on road',
+        2: 'Other object on road',
+        3: 'Previous accident',
+        4: 'Dog on road',
+        5: 'Other animal on road',
+        6: 'Pedestrian in carriageway - not injured',
+        7: 'Any animal in carriageway (except ridden horse)',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'urban_or_rural_area': {
+        1: 'Urban',
+        2: 'Rural',
+        3: 'Unallocated',
+    },
+    'did_police_officer_attend_scene_of_accident': {
+        1: 'Yes',
+        2: 'No',
+        3: 'No - accident was reported using a self completion form (self rep only)',
+    },
+    'trunk_road_flag': {
+        1: 'Trunk (Roads managed by Highways England)',
+        2: 'Non-trunk',
+    },
+}
+
+VEHICLE_LABELS = {
+    'vehicle_type': {
+        1: 'Pedal cycle',
+        2: 'Motorcycle 50cc and under',
+        3: 'Motorcycle 125cc and under',
+        4: 'Motorcycle over 125cc and up to 500cc',
+        5: 'Motorcycle over 500cc',
+        8: 'Taxi/Private hire car',
+        9: 'Car',
+        10: 'Minibus (8 - 16 passenger seats)',
+        11: 'Bus or coach (17 or more pass seats)',
+        16: 'Ridden horse',
+        17: 'Agricultural vehicle',
+        18: 'Tram',
+        19: 'Van / Goods 3.5 tonnes mgw or under',
+        20: 'Goods over 3.5t. and under 7.5t',
+        21: 'Goods 7.5 tonnes mgw and over',
+        22: 'Mobility scooter',
+        23: 'Electric motorcycle',
+        90: 'Other vehicle',
+        97: 'Motorcycle - unknown cc',
+        98: 'Goods vehicle - unknown weight',
+        99: 'Unknown vehicle type (self rep only)',
+    },
+    'towing_and_articulation': {
+        0: 'No tow/articulation',
+        1: 'Articulated vehicle',
+        2: 'Double or multiple trailer',
+        3: 'Caravan',
+        4: 'Single trailer',
+        5: 'Other tow',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'vehicle_manoeuvre': {
+        1: 'Reversing',
+        2: 'Parked',
+        3: 'Waiting to go - held up',
+        4: 'Slowing or stopping',
+        5: 'Moving off',
+        6: 'U-turn',
+        7: 'Turning left',
+        8: 'Waiting to turn left',
+        9: 'Turning right',
+        10: 'Waiting to turn right',
+        11: 'Changing lane to left',
+        12: 'Changing lane to right',
+        13: 'Overtaking moving vehicle - offside',
+        14: 'Overtaking static vehicle - offside',
+        15: 'Overtaking - nearside',
+        16: 'Going ahead left-hand bend',
+        17: 'Going ahead right-hand bend',
+        18: 'Going ahead other',
+        99: UNKNOWN_SELF_REPORTED,
+    },
+    'vehicle_direction_from': DIRECTION_LABELS,
+    'vehicle_direction_to': DIRECTION_LABELS,
+    'vehicle_location_restricted_lane': {
+        0: 'On main c\'way - not in restricted lane',
+        1: 'Tram/Light rail track',
+        2: 'Bus lane',
+        3: 'Busway (including guided busway)',
+        4: 'Cycle lane (on main carriageway)',
+        5: 'Cycleway or shared use footway (not part of  main carriageway)',
+        6: 'On lay-by or hard shoulder',
+        7: 'Entering lay-by or hard shoulder',
+        8: 'Leaving lay-by or hard shoulder',
+        9: 'Footway (pavement)',
+        10: 'Not on carriageway',
+        99: UNKNOWN_SELF_REPORTED,
+    },
+    'junction_location': {
+        0: 'Not at or within 20 metres of junction',
+        1: 'Approaching junction or waiting/parked at junction approach',
+        2: 'Cleared junction or waiting/parked at junction exit',
+        3: 'Leaving roundabout',
+        4: 'Entering roundabout',
+        5: 'Leaving main road',
+        6: 'Entering main road',
+        7: 'Entering from slip road',
+        8: 'Mid Junction - on roundabout or on main road',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'skidding_and_overturning': {
+        0: 'None',
+        1: 'Skidded',
+        2: 'Skidded and overturned',
+        3: 'Jackknifed',
+        4: 'Jackknifed and overturned',
+        5: 'Overturned',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'hit_object_in_carriageway': {
+        0: 'None',
+        1: 'Previous accident',
+        2: 'Road works',
+        4: 'Parked vehicle',
+        5: 'Bridge (roof)',
+        6: 'Bridge (side)',
+        7: 'Bollard or refuge',
+        8: 'Open door of vehicle',
+        9: 'Central island of roundabout',
+        10: 'Kerb',
+        11: 'Other object',
+        12: 'Any animal (except ridden horse)',
+        99: UNKNOWN_SELF_REPORTED,
+    },
+    'vehicle_leaving_carriageway': {
+        0: 'Did not leave carriageway',
+        1: 'Nearside',
+        2: 'Nearside and rebounded',
+        3: 'Straight ahead at junction',
+        4: 'Offside on to central reservation',
+        5: 'Offside on to centrl res + rebounded',
+        6: 'Offside - crossed central reservation',
+        7: 'Offside',
+        8: 'Offside and rebounded',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'hit_object_off_carriageway': {
+        0: 'None',
+        1: 'Road sign or traffic signal',
+        2: 'Lamp post',
+        3: 'Telegraph or electricity pole',
+        4: 'Tree',
+        5: 'Bus stop or bus shelter',
+        6: 'Central crash barrier',
+        7: 'Near/Offside crash barrier',
+        8: 'Submerged in water',
+        9: 'Entered ditch',
+        10: 'Other permanent object',
+        11: 'Wall or fence',
+        99: UNKNOWN_SELF_REPORTED,
+    },
+    'first_point_of_impact': {
+        0: 'Did not impact',
+        1: 'Front',
+        2: 'Back',
+        3: 'Offside',
+        4: 'Nearside',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'vehicle_left_hand_drive': {
+        1: 'No',
+        2: 'Yes',
+        9: 'Unknown',
+    },
+    'journey_purpose_of_driver': {
+        1: 'Journey as part of work',
+        2: 'Commuting to/from work',
+        3: 'Taking pupil to/from school',
+        4: 'Pupil riding to/from school',
+        5: 'Other',
+        6: 'Not known',
+        15: 'Other/Not known (2005-10)',
+    },
+    'sex_of_driver': {
+        1: 'Male',
+        2: 'Female',
+        3: 'Not known',
+    },
+    'age_band_of_driver': AGE_BAND_LABELS,
+    'propulsion_code': {
+        1: 'Petrol',
+        2: 'Heavy oil',
+        3: 'Electric',
+        4: 'Steam',
+        5: 'Gas',
+        6: 'Petrol/Gas (LPG)',
+        7: 'Gas/Bi-fuel',
+        8: 'Hybrid electric',
+        9: 'Gas Diesel',
+        10: 'New fuel technology',
+        11: 'Fuel cells',
+        12: 'Electric diesel',
+    },
+    'driver_imd_decile': IMD_DECILE_LABELS,
+    'driver_home_area_type': HOME_AREA_TYPE_LABELS,
+}
+
+CASUALTY_LABELS = {
+    'casualty_class': {
+        1: 'Driver or rider',
+        2: 'Passenger',
+        3: 'Pedestrian',
+    },
+    'sex_of_casualty': {
+        1: 'Male',
+        2: 'Female',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'age_band_of_casualty': AGE_BAND_LABELS,
+    'casualty_severity': SEVERITY_LABELS,
+    'pedestrian_location': {
+        0: 'Not a Pedestrian',
+        1: 'Crossing on pedestrian crossing facility',
+        2: 'Crossing in zig-zag approach lines',
+        3: 'Crossing in zig-zag exit lines',
+        4: 'Crossing elsewhere within 50m. of pedestrian crossing',
+        5: 'In carriageway, crossing elsewhere',
+        6: 'On footway or verge',
+        7: 'On refuge, central island or central reservation',
+        8: 'In centre of carriageway - not on refuge, island or central reservation',
+        9: 'In carriageway, not crossing',
+        10: 'Unknown or other',
+    },
+    'pedestrian_movement': {
+        0: 'Not a Pedestrian',
+        1: 'Crossing from driver\'s nearside',
+        2: 'Crossing from nearside - masked by parked or stationary vehicle',
+        3: 'Crossing from driver\'s offside',
+        4: 'Crossing from offside - masked by  parked or stationary vehicle',
+        5: 'In carriageway, stationary - not crossing  (standing or playing)',
+        6: 'In carriageway, stationary - not crossing  (standing or playing) - masked by parked or stationary vehicle',
+        7: 'Walking along in carriageway, facing traffic',
+        8: 'Walking along in carriageway, back to traffic',
+        9: 'Unknown or other',
+    },
+    'car_passenger': {
+        0: 'Not car passenger',
+        1: 'Front seat passenger',
+        2: 'Rear seat passenger',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'bus_or_coach_passenger': {
+        0: 'Not a bus or coach passenger',
+        1: 'Boarding',
+        2: 'Alighting',
+        3: 'Standing passenger',
+        4: 'Seated passenger',
+        9: UNKNOWN_SELF_REPORTED,
+    },
+    'pedestrian_road_maintenance_worker': {
+        0: 'No / Not applicable',
+        1: 'Yes',
+        2: 'Not Known',
+    },
+    'casualty_type': {
+        0: 'Pedestrian',
+        1: 'Cyclist',
+        2: 'Motorcycle 50cc and under rider or passenger',
+        3: 'Motorcycle 125cc and under rider or passenger',
+        4: 'Motorcycle over 125cc and up to 500cc rider or  passenger',
+        5: 'Motorcycle over 500cc rider or passenger',
+        8: 'Taxi/Private hire car occupant',
+        9: 'Car occupant',
+        10: 'Minibus (8 - 16 passenger seats) occupant',
+        11: 'Bus or coach occupant (17 or more pass seats)',
+        16: 'Horse rider',
+        17: 'Agricultural vehicle occupant',
+        18: 'Tram occupant',
+        19: 'Van / Goods vehicle (3.5 tonnes mgw or under) occupant',
+        20: 'Goods vehicle (over 3.5t. and under 7.5t.) occupant',
+        21: 'Goods vehicle (7.5 tonnes mgw and over) occupant',
+        22: 'Mobility scooter rider',
+        23: 'Electric motorcycle rider or passenger',
+        90: 'Other vehicle occupant',
+        97: 'Motorcycle - unknown cc rider or passenger',
+        98: 'Goods vehicle (unknown weight) occupant',
+        99: 'Unknown vehicle type (self rep only)',
+    },
+    'casualty_home_area_type': HOME_AREA_TYPE_LABELS,
+    'casualty_imd_decile': IMD_DECILE_LABELS,
+}
+
+LABELS = dict(COLLISION_LABELS, **VEHICLE_LABELS, **CASUALTY_LABELS)
+
+CODED_FIELDS = frozenset(LABELS)
+
+
+class LookupTable():
+    '''
+    The labels of a field's codes as arrays indexed by code - offset
+
+    Both arrays have one extra trailing slot for codes with no label, so
+    out of range codes are pointed at it and decoding stays a single take.
+    '''
+
+    def __init__(self, field, labels):
+        self.field = field
+        labels = dict(labels)
+        labels.setdefault(MISSING_CODE, MISSING_LABEL)
+
+        self.codes = np.array(sorted(labels), dtype=np.int64)
+        self.offset = int(self.codes[0])
+        size = int(self.codes[-1]) - self.offset + 1
+
+        # Categories in code order, one per distinct label
+        self.categories = []
+        category_codes = {}
+        for code in self.codes.tolist():
+            label = sys.intern(labels[code])
+            if label not in category_codes:
+                category_codes[label] = len(self.categories)
+                self.categories.append(label)
+
+        self.labels = np.full(size + 1, None, dtype=object)
+        self.category_codes = np.full(size + 1, -1, dtype=np.int64)
+        for code, label in labels.items():
+            label = sys.intern(label)
+            self.labels[code - self.offset] = label
+            self.category_codes[code - self.offset] = category_codes[label]
+
+    def __repr__(self):
+        return 'LookupTable(%s, %s codes)' % (self.field, len(self.codes))
+
+    def __getitem__(self, code):
+        return self.decode_one(code)
+
+    def _positions(self, column):
+        positions = np.asarray(column)
+        if positions.dtype.kind == 'f':
+            positions = np.where(np.isnan(positions), MISSING_CODE, positions)
+        positions = positions.astype(np.int64) - self.offset
+        out_of_range = (positions < 0) | (positions >= len(self.labels) - 1)
+        positions[out_of_range] = len(self.labels) - 1
+        return positions
+
+    def decode_one(self, code):
+        if code is None:
+            return None
+        position = int(code) - self.offset
+        if position < 0 or position >= len(self.labels) - 1:
+            return None
+        return self.labels[position]
+
+    def decode(self, column):
+        '''
+        :param column: array of codes
+        :return: object array of labels, None where a code has no label
+        '''
+        return self.labels.take(self._positions(column))
+
+    def categorical(self, column):
+        '''
+        :param column: array of codes
+        :return: pandas Categorical of the labels, NaN where a code has
+            no label
+        '''
+        import pandas as pd
+
+        return pd.Categorical.from_codes(
+            self.category_codes.take(self._positions(column)),
+            categories=self.categories,
+            validate=False
+        )
+
+
+def is_coded(field):
+    return field in CODED_FIELDS
+
+
+@lru_cache(maxsize=None)
+def get_lookup_table(field):
+    '''
+    :return: LookupTable of a coded field, built once
+    '''
+    if field not in LABELS:
+        raise ValueError('%s is not a coded field' % (field))
+    return LookupTable(field, LABELS[field])
+
+
+def decode(field, code):
+    '''
+    Label of a single code, None if the code has no label
+    '''
+    return get_lookup_table(field).decode_one(code)
+
+
+def decode_column(field, column):
+    '''
+    Labels of an array of codes
+    '''
+    return get_lookup_table(field).decode(column)
+
+
+def to_categorical(field, column):
+    '''
+    pandas Categorical of the labels of an array of codes
+    '''
+    return get_lookup_table(field).categorical(column)
@@ -1,3 +1,6 @@
+from road_collisions_uk.labels import decode
+
+
 class Casualties():
 
     def __init__(self, *args, **kwargs):
@@ -85,6 +88,13 @@ class Casualty():
         self.casualty_home_area_type = int(kwargs['casualty_home_area_type'])
         self.casualty_imd_decile = int(kwargs['casualty_imd_decile'])
 
+    def get_label(self, field):
+        '''
+        Label of a coded field such as casualty_type, None if its code has
+        no label
+        '''
+        return decode(field, getattr(self, field))
+
     def serialize(self):
         return {
             'vehicle_reference': self.vehicle_reference,
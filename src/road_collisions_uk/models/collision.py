@@ -1,23 +1,68 @@
-import datetime
 import os
-import glob
 import csv
 
-from pandas import DataFrame
-import pandas as pd
+import numpy as np
 
 from road_collisions_base import logger
 from road_collisions_base.models.raw_collision import RawCollision
 
-from road_collisions_uk.utils import extract_tgz
+from road_collisions_uk.utils import extract_archives
+from road_collisions_uk.instrumentation import LoadStats
+from road_collisions_uk.labels import decode
+from road_collisions_uk.timeseries import (
+    TIME_FIELDS,
+    parse_timestamp
+)
+from road_collisions_uk.query import (
+    KEY_INDEXES,
+    InvertedIndex,
+    lookup_mask,
+    parse_lookups,
+    record_matches
+)
+from road_collisions_uk.partitions import (
+    ensure_partitioned,
+    get_partition_paths
+)
 from road_collisions_uk.models.vehicle import Vehicles
 from road_collisions_uk.models.casualty import Casualties
 
 
+class _SortedGroups():
+    '''
+    Hand out the rows of an iterable sorted by accident_index one
+    accident at a time
+    '''
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._next = next(self._rows, None)
+        self._last_key = None
+
+    def take(self, accident_index):
+        '''
+        Get the rows for accident_index, skipping any rows for accidents
+        before it that had no matching accident
+        '''
+        group = []
+        while self._next is not None and self._next['accident_index'] <= accident_index:
+            key = self._next['accident_index']
+            if self._last_key is not None and key < self._last_key:
+                raise ValueError(
+                    'Rows are not sorted by accident_index at %s' % (key)
+                )
+            self._last_key = key
+            if key == accident_index:
+                group.append(self._next)
+            self._next = next(self._rows, None)
+        return group
+
+
 class Collisions():
 
     def __init__(self, *args, **kwargs):
         self._data = kwargs.get('data', [])
+        self.indexes = {}
 
     def __getitem__(self, i):
         return self._data[i]
@@ -30,145 +75,610 @@ class Collisions():
 
     def append(self, data):
         self._data.append(data)
+        self.indexes = {}
 
     def extend(self, data):
         self._data.extend(data)
+        self.indexes = {}
+
+    def create_index(self, *fields):
+        '''
+        Build inverted indexes used by get / lookup on the given fields,
+        such as accident_index. Saved with snapshots.
+
+        An index holds the fields as they were when it was built. Adding
+        or removing collisions, here or in the list passed as data, has
+        it rebuilt on next use, but changing a Collision's fields in
+        place isn't seen, call create_index again after doing that.
+        filter always reads the fields as they are.
+        '''
+        for field in fields:
+            self.indexes[field] = InvertedIndex(self._column_view().columns[field])
+
+    def get_index(self, field):
+        '''
+        The index on field, built on first use if it wasn't already
+        '''
+        index = self.indexes.get(field)
+        if index is None or index.size != len(self._data):
+            self.create_index(field)
+        return self.indexes[field]
+
+    def get(self, accident_index, default=None):
+        '''
+        Get a collision by accident_index using the accident_index index
+        '''
+        positions = self.get_index('accident_index').get_positions(accident_index)
+        if not len(positions):
+            return default
+        return self._data[int(positions[0])]
+
+    def lookup(self, field, *values):
+        '''
+        Get the collisions with any of the values of an indexed field,
+        such as every collision in an LSOA or local_authority_ons_district,
+        in their original order
+        '''
+        index = self.get_index(field)
+        if len(values) == 1:
+            positions = index.get_positions(values[0])
+        else:
+            positions = np.sort(index.lookup(values))
+        return self._take(positions)
+
+    def _take(self, positions):
+        return Collisions(
+            data=[self._data[i] for i in positions]
+        )
 
     def serialize(self):
         return [
             d.serialize() for d in self
         ]
 
+    def save(self, path):
+        '''
+        Save a binary columnar snapshot that Collisions.load can memory-map
+
+        :param path: dir to write the snapshot to, replaced if it exists
+        '''
+        from road_collisions_uk.snapshot import save_snapshot
+        from road_collisions_uk.models.columnar import ColumnarCollisions
+
+        collisions = self
+        if not isinstance(collisions, ColumnarCollisions):
+            collisions = ColumnarCollisions.from_collisions(self)
+            # From the fields as they are now rather than carried over
+            collisions.create_index(*self.indexes)
+
+        save_snapshot(collisions, path)
+
     @staticmethod
-    def from_dir(dirpath, region=None, year=None):
-        if region is None:
-            search_dir = f'{dirpath}/**'
-        else:
-            search_dir = f'{dirpath}/{region}/**'
+    def load(path, mmap=True):
+        '''
+        Load a snapshot written by Collisions.save
 
-        for filename in glob.iglob(search_dir, recursive=True):
-            if os.path.splitext(filename)[-1] not in {'.tgz', '.gz'}:
-                continue
+        :kwarg mmap: memory-map the columns so processes share the page
+            cache rather than each holding a copy
+        :return: ColumnarCollisions
+        '''
+        from road_collisions_uk.snapshot import load_snapshot
+        return load_snapshot(path, mmap=mmap)
 
-            # TODO: Don't extract every time
-            extract_tgz(filename)
+    def share(self, dirpath=None):
+        '''
+        Publish to shared memory so worker processes can attach without
+        a copy each, see road_collisions_uk.shared
 
-        print('Loading accidents')
+            with collisions.share() as shared:
+                results = shared.map(func)
 
-        accident_data = []
-        with open(os.path.join(dirpath, region, 'accident.csv')) as csvfile:
-            data = csv.DictReader(csvfile)
-            done = 0
-            for row in data:
-                if year is None or int(row['accident_year']) == year:
-                    accident_data.append(row)
-                done += 1
+        :return: SharedCollisions
+        '''
+        from road_collisions_uk.shared import publish
+        return publish(self, dirpath=dirpath)
 
-        accident_df = DataFrame(accident_data)
-        accident_df = accident_df.set_index('accident_reference')
+    def to_ndjson(self, path):
+        '''
+        Stream to newline delimited json, one serialized collision per
+        line. Gzipped if path ends in .gz
 
-        print('Loaded accidents')
+        :return: the number of collisions written
+        '''
+        from road_collisions_uk.export import write_ndjson
+        return write_ndjson(self, path)
 
-        print('Loading casualties')
+    def to_parquet(self, dirpath):
+        '''
+        Write collision, vehicle and casualty parquet files to dirpath
+        linked by accident_index
+        '''
+        from road_collisions_uk.export import write_tables
+        return write_tables(self, dirpath, fmt='parquet')
 
-        casualty_data = []
-        with open(os.path.join(dirpath, region, 'casualty.csv')) as csvfile:
-            data = csv.DictReader(csvfile)
-            done = 0
-            for row in data:
-                if year is None or int(row['accident_year']) == year:
-                    casualty_data.append(row)
-                done += 1
+    def to_arrow(self, dirpath):
+        '''
+        Write collision, vehicle and casualty Arrow IPC files to dirpath
+        linked by accident_index
+        '''
+        from road_collisions_uk.export import write_tables
+        return write_tables(self, dirpath, fmt='arrow')
 
-        casualty_df = DataFrame(casualty_data)
-        casualty_df = casualty_df.set_index('accident_reference')
+    @staticmethod
+    def parse_many(records, columnar=False):
+        '''
+        Build a collection from Collision.serialize() dicts in bulk, the
+        inverse of Collisions.serialize
 
-        print('Loaded casualties')
+        Fields are transposed into typed columns a chunk at a time rather
+        than calling Collision(**data) for every collision, vehicle and
+        casualty.
 
-        print('Loading vehicles')
+        :param records: iterable of serialized collisions
+        :kwarg columnar: return the ColumnarCollisions rather than
+            materializing Collision objects
+        '''
+        from road_collisions_uk.models.columnar import ColumnarCollisions
 
-        vehicle_data = []
-        with open(os.path.join(dirpath, region, 'vehicle.csv')) as csvfile:
-            data = csv.DictReader(csvfile)
-            done = 0
-            for row in data:
-                if year is None or int(row['accident_year']) == year:
-                    vehicle_data.append(row)
-                done += 1
+        collisions = ColumnarCollisions.from_serialized(records)
+        if columnar:
+            return collisions
+        return collisions.to_collisions()
 
-        vehicle_df = DataFrame(vehicle_data)
-        vehicle_df = vehicle_df.set_index('accident_reference')
+    @staticmethod
+    def from_ndjson(path):
+        '''
+        :return: ColumnarCollisions
+        '''
+        from road_collisions_uk.export import read_ndjson
+        return read_ndjson(path)
 
-        print('Loaded vehicles')
+    @staticmethod
+    def from_parquet(dirpath):
+        '''
+        :return: ColumnarCollisions
+        '''
+        from road_collisions_uk.export import read_tables
+        return read_tables(dirpath, fmt='parquet')
 
-        print('Parsing collisions')
-        collisions = Collisions()
-        for index, row in accident_df.iterrows():
-            accident_vehicles = vehicle_df.loc[index]
-            accident_casualties = casualty_df.loc[index]
+    @staticmethod
+    def from_arrow(dirpath):
+        '''
+        :return: ColumnarCollisions
+        '''
+        from road_collisions_uk.export import read_tables
+        return read_tables(dirpath, fmt='arrow')
 
-            if isinstance(accident_vehicles, pd.core.series.Series):
-                vehicles = Vehicles.parse(
-                    accident_vehicles.to_dict()
-                )
-            else:
-                vehicles = Vehicles.parse(
-                    accident_vehicles.to_dict(orient='records')
-                )
+    @staticmethod
+    def _prepare_dir(dirpath, region=None, stats=None):
+        '''
+        Extract any archives and partition the csvs by year
 
-            if isinstance(accident_casualties, pd.core.series.Series):
-                casualties = Casualties.parse(
-                    accident_casualties.to_dict()
-                )
-            else:
-                casualties = Casualties.parse(
-                    accident_casualties.to_dict(orient='records')
+        :kwarg stats: LoadStats to record the extract / partition stages in
+        :return: the dir holding the csvs
+        '''
+        if stats is None:
+            stats = LoadStats()
+
+        data_dir = dirpath if region is None else os.path.join(dirpath, region)
+
+        with stats.stage('extract') as stage:
+            # Archives whose manifest says they're unchanged are skipped
+            stage.update(len(extract_archives(data_dir)))
+
+        with stats.stage('partition') as stage:
+            ensure_partitioned(data_dir, stage=stage)
+
+        return data_dir
+
+    @staticmethod
+    def _iter_csv(paths):
+        for path in paths:
+            with open(path) as csvfile:
+                yield from csv.DictReader(csvfile)
+
+    @staticmethod
+    def _merge_join(accident_rows, vehicle_rows, casualty_rows):
+        '''
+        Join rows that are all sorted by accident_index, only holding one
+        accident's vehicles and casualties at a time
+        '''
+        vehicle_groups = _SortedGroups(vehicle_rows)
+        casualty_groups = _SortedGroups(casualty_rows)
+
+        last_accident_index = None
+        for row in accident_rows:
+            accident_index = row['accident_index']
+            if last_accident_index is not None and accident_index < last_accident_index:
+                raise ValueError(
+                    'Accidents are not sorted by accident_index at %s' % (accident_index)
                 )
+            last_accident_index = accident_index
+
+            row['vehicles'] = Vehicles.parse(vehicle_groups.take(accident_index))
+            row['casualties'] = Casualties.parse(casualty_groups.take(accident_index))
+            yield Collision(
+                **row
+            )
 
-            row_data = row.to_dict()
-            row_data.update({
-                'accident_index': index,
-                'vehicles': vehicles,
-                'casualties': casualties
-            })
+    @staticmethod
+    def iter_from_dir(dirpath, region=None, year=None):
+        '''
+        Yield collisions with their vehicles and casualties one at a time
+        without loading everything first
+
+        The year partitions are sorted by accident_index so the three
+        tables are merge joined as they're read, memory use is that of the
+        current accident rather than of the dataset.
 
-            collisions.append(
-                Collision(
-                    **row_data
+        :kwarg year: None for all years, an int or an iterable of ints
+        '''
+        data_dir = Collisions._prepare_dir(dirpath, region=region)
+
+        accident_paths = get_partition_paths(data_dir, 'accident', year=year)
+        for accident_path in accident_paths:
+            partition_year = int(os.path.splitext(os.path.basename(accident_path))[0])
+
+            yield from Collisions._merge_join(
+                Collisions._iter_csv([accident_path]),
+                Collisions._iter_csv(
+                    get_partition_paths(data_dir, 'vehicle', year=partition_year)
+                ),
+                Collisions._iter_csv(
+                    get_partition_paths(data_dir, 'casualty', year=partition_year)
                 )
             )
 
-        print('Finished parsing collisions')
+    @staticmethod
+    def from_dir(dirpath, region=None, year=None, columnar=False, compact=False, workers=None, indexes=KEY_INDEXES, progress=None):
+        '''
+        Load collisions from the csvs in dirpath (or dirpath/region)
+
+        The csvs are split into per year partitions the first time they are
+        loaded so only the partitions for the requested years are read
+
+        :kwarg year: None for all years, an int or an iterable of ints such
+            as range(2015, 2021)
+        :kwarg columnar: return a ColumnarCollisions which keeps each field
+            in a numpy array rather than one object per collision
+        :kwarg compact: pack coded fields into int8 / int16 columns and
+            share repeated strings, see ColumnarCollisions.compact
+        :kwarg workers: if more than 1, read each table of each year in a
+            pool of this many processes
+        :kwarg indexes: fields to build indexes on as part of the load, by
+            default the keys get / lookup use such as accident_index
+        :kwarg progress: called as progress(stage, done, total) as the load
+            goes, see road_collisions_uk.instrumentation.tqdm_progress
+        :return: Collisions with the timings of each stage as load_stats
+        '''
+        stats = LoadStats(progress=progress)
+
+        data_dir = Collisions._prepare_dir(dirpath, region=region, stats=stats)
+
+        if workers is not None and workers > 1:
+            from road_collisions_uk.parallel import load_parallel
+            collisions = load_parallel(data_dir, year=year, workers=workers, stats=stats)
+        else:
+            from road_collisions_uk.ingest import load_dir
+            collisions = load_dir(data_dir, year=year, stats=stats)
+
+        if compact:
+            with stats.stage('compact') as stage:
+                collisions = collisions.compact()
+                stage.add_rows(len(collisions))
+
+        if indexes:
+            with stats.stage('index') as stage:
+                collisions.create_index(*indexes)
+                stage.add_rows(len(collisions))
+
+        if not columnar:
+            with stats.stage('construct', total=len(collisions)) as stage:
+                collisions = collisions.to_collisions(progress=stage.update)
+                stage.add_rows(len(collisions))
+
+        stats.finish()
+        stats.log()
+        collisions.load_stats = stats
 
         return collisions
 
     def filter(self, **kwargs):
         '''
-        By whatever props that exist
+        By whatever props that exist, with optional lookups such as
+        speed_limit__gte=30 or police_force__in=[1, 2]. See
+        road_collisions_uk.query for the lookups available
+
+        Collision fields and the timestamp / hour / weekday properties
+        are evaluated as vectorized masks over columns built from the
+        objects as they are on each call. Anything else is checked
+        collision by collision on what's left.
         '''
+        from road_collisions_uk.models.schema import COLLISION_SCHEMA
+
         logger.debug('Filtering from %s' % (len(self)))
 
-        filtered = [
-            d for d in self if all(
-                [
-                    getattr(d, attr) == kwargs[attr] for attr in kwargs.keys()
-                ]
-            )
-        ]
+        view = self._column_view()
+        mask = np.ones(len(self), dtype=bool)
+        python_lookups = []
+        for field, lookup, expected in parse_lookups(kwargs):
+            if field not in COLLISION_SCHEMA and field not in TIME_FIELDS:
+                python_lookups.append((field, lookup, expected))
+                continue
+            try:
+                mask &= lookup_mask(
+                    field,
+                    lookup,
+                    expected,
+                    lambda: view._query_column(field)
+                )
+            except (TypeError, ValueError):
+                # Objects with values that don't fit the schema's dtype
+                python_lookups.append((field, lookup, expected))
+
+        filtered = [self._data[i] for i in np.flatnonzero(mask)]
+        if python_lookups:
+            filtered = [
+                d for d in filtered if record_matches(d, python_lookups)
+            ]
 
         return Collisions(
             data=filtered
         )
 
+    def _column_view(self):
+        '''
+        ColumnarCollisions over the objects as they are now that builds
+        only the columns a query reads, see ColumnarCollisions.over_collisions
+        '''
+        from road_collisions_uk.models.columnar import ColumnarCollisions
+        return ColumnarCollisions.over_collisions(self._data)
+
+    def between(self, start, end):
+        '''
+        Collisions from start up to but not including end
+
+        Parses the dates and times of the objects on each call, load with
+        columnar=True to keep them parsed
+
+        :param start: datetime, date or ISO string
+        :param end: datetime, date or ISO string
+        '''
+        return self._take(self._column_view().between_positions(start, end))
+
+    def histogram(self, freq='D', start=None, end=None):
+        '''
+        Count collisions per year, month, week, day or hour, see between
+
+        :kwarg freq: one of Y, M, W, D, h
+        :kwarg start: first bucket, defaults to that of the earliest collision
+        :kwarg end: last bucket, defaults to that of the latest collision
+        :return: pandas Series of counts indexed by the start of each bucket
+        '''
+        return self._column_view().histogram(freq, start=start, end=end)
+
+    def within_bbox(self, min_easting, min_northing, max_easting, max_northing):
+        '''
+        Collisions inside a bounding box of OSGB eastings / northings
+
+        Builds a grid index on the eastings / northings of the objects on
+        each call, load with columnar=True to keep one
+        '''
+        return self._take(
+            self._column_view().spatial_index.within_bbox(
+                min_easting,
+                min_northing,
+                max_easting,
+                max_northing
+            )
+        )
+
+    def within_radius(self, easting, northing, radius):
+        '''
+        Collisions within radius metres of an OSGB easting / northing,
+        see within_bbox
+        '''
+        return self._take(
+            self._column_view().spatial_index.within_radius(easting, northing, radius)
+        )
+
+    def nearest(self, easting, northing, k=1):
+        '''
+        The k collisions nearest an OSGB easting / northing, nearest
+        first, see within_bbox
+        '''
+        return self._take(
+            self._column_view().spatial_index.nearest(easting, northing, k=k)
+        )
+
+    def within_polygon(self, points):
+        '''
+        Collisions inside a polygon given as [(easting, northing), ...],
+        see within_bbox
+        '''
+        return self._take(
+            self._column_view().spatial_index.within_polygon(points)
+        )
+
+    def decode(self, field):
+        '''
+        Labels of a coded Collision, Vehicle or Casualty field, one per
+        collision / vehicle / casualty, see road_collisions_uk.labels
+        '''
+        return self._column_view().decode(field)
+
+    def to_dataframe(self, table='collision', labels=False):
+        '''
+        pandas DataFrame of the collision, vehicle or casualty table,
+        vehicles and casualties have the accident_index they belong to
+
+        :kwarg labels: decode coded fields into categorical columns of
+            their labels
+        '''
+        return self._column_view().to_dataframe(table=table, labels=labels)
+
+    def groupby(self, *fields, level=None):
+        '''
+        Group by collision, vehicle or casualty fields for vectorized
+        aggregation, see road_collisions_uk.aggregation
+
+            collisions.groupby('police_force').agg(
+                casualties=('number_of_casualties', 'sum')
+            )
+
+        :kwarg level: collision, vehicle or casualty, what the rows being
+            grouped are. Worked out from the fields if not given
+        '''
+        from road_collisions_uk.aggregation import GroupBy
+        return GroupBy(self, fields, level=level)
+
     @staticmethod
-    def load_all(year=None):
-        import road_collisions_uk
-        return Collisions.from_dir(
+    def from_store(store_dir, year=None, mmap=True):
+        '''
+        Load a store kept up to date by Collisions.refresh_all /
+        road_collisions_uk.store.refresh_store
+
+        :return: ColumnarCollisions
+        '''
+        from road_collisions_uk.store import load_store
+        return load_store(store_dir, year=year, mmap=mmap)
+
+    @staticmethod
+    def refresh_all(store_dir='/opt/road_collisions/uk_store', year=None, indexes=None):
+        '''
+        Download whatever changed in S3 and rebuild only the years of the
+        store that it affected
+
+        :return: RefreshReport of what was downloaded and rebuilt
+        '''
+        from road_collisions_uk.download import DATA_DIR
+        from road_collisions_uk.store import refresh_store
+        return refresh_store(
+            DATA_DIR,
+            store_dir,
+            year=year,
+            indexes=indexes,
+            download=True
+        )
+
+    @staticmethod
+    def iter_chunks(dirpath, region=None, chunk_size=None, year=None, compact=False):
+        '''
+        Read collisions a chunk at a time so memory is bounded by about a
+        year whatever the number of years, see road_collisions_uk.chunked
+
+        :kwarg chunk_size: None for a chunk per year, otherwise chunks of
+            this many collisions
+        :return: generator of ColumnarCollisions
+        '''
+        from road_collisions_uk.chunked import iter_year_chunks
+        data_dir = Collisions._prepare_dir(dirpath, region=region)
+        return iter_year_chunks(data_dir, chunk_size=chunk_size, year=year, compact=compact)
+
+    @staticmethod
+    def map_reduce(
+        dirpath,
+        map_func,
+        reduce_func=None,
+        region=None,
+        chunk_size=None,
+        year=None,
+        compact=False,
+        workers=None
+    ):
+        '''
+        Call map_func on each chunk of the collisions in dirpath and fold
+        the results with reduce_func, see road_collisions_uk.chunked
+
+            Collisions.map_reduce(
+                dirpath,
+                lambda c: c.groupby('accident_year').count(),
+                region='uk'
+            )
+
+        :kwarg reduce_func: defaults to road_collisions_uk.chunked.combine
+            which adds numbers, arrays, pandas objects and dicts of them
+        :kwarg workers: if more than 1, map each year in a process pool
+        '''
+        from road_collisions_uk.chunked import (
+            combine,
+            map_reduce_dir
+        )
+        data_dir = Collisions._prepare_dir(dirpath, region=region)
+        return map_reduce_dir(
+            data_dir,
+            map_func,
+            reduce_func=reduce_func or combine,
+            chunk_size=chunk_size,
+            year=year,
+            compact=compact,
+            workers=workers
+        )
+
+    @staticmethod
+    def map_reduce_all(map_func, reduce_func=None, chunk_size=None, year=None, compact=False, workers=None):
+        '''
+        Collisions.map_reduce over every year of the downloaded data
+        '''
+        from road_collisions_uk.download import ensure_data_downloaded
+        ensure_data_downloaded()
+        return Collisions.map_reduce(
+            '/opt/road_collisions/',
+            map_func,
+            reduce_func=reduce_func,
+            region='uk',
+            chunk_size=chunk_size,
+            year=year,
+            compact=compact,
+            workers=workers
+        )
+
+    @staticmethod
+    def iter_all(year=None):
+        from road_collisions_uk.download import ensure_data_downloaded
+        ensure_data_downloaded()
+        return Collisions.iter_from_dir(
             '/opt/road_collisions/',
             region='uk',
             year=year
         )
 
+    @staticmethod
+    def load_all(year=None, columnar=False, compact=False, workers=None, indexes=KEY_INDEXES, progress=None):
+        from road_collisions_uk.download import ensure_data_downloaded
+        ensure_data_downloaded()
+        return Collisions.from_dir(
+            '/opt/road_collisions/',
+            region='uk',
+            year=year,
+            columnar=columnar,
+            compact=compact,
+            workers=workers,
+            indexes=indexes,
+            progress=progress
+        )
+
+    @staticmethod
+    async def aload(data_dir='/opt/road_collisions/uk', year=None, columnar=False, compact=False, download=None, **kwargs):
+        '''
+        Load collisions without blocking the event loop, downloading,
+        extracting and reading archives concurrently
+
+            collisions = await Collisions.aload(year=2020)
+
+        :kwargs: see road_collisions_uk.async_load.aload_dir, such as
+            max_downloads, max_pending and s3
+        '''
+        from road_collisions_uk.async_load import aload_dir
+        return await aload_dir(
+            data_dir=data_dir,
+            year=year,
+            columnar=columnar,
+            compact=compact,
+            download=download,
+            **kwargs
+        )
+
 
 class Collision(RawCollision):
 
@@ -213,6 +723,9 @@ class Collision(RawCollision):
 
     def __init__(self, **kwargs):
 
+        # 'NULL' from the csv, None from serialize()
+        has_location = kwargs['latitude'] not in {'NULL', None}
+
         self.accident_index = kwargs['accident_index']
         self.accident_severity = int(kwargs['accident_severity'])
         self.accident_year = int(kwargs['accident_year'])
@@ -224,14 +737,14 @@ class Collision(RawCollision):
         self.first_road_number = int(kwargs['first_road_number'])
         self.junction_control = int(kwargs['junction_control'])
         self.junction_detail = int(kwargs['junction_detail'])
-        self.latitude = float(kwargs['latitude']) if kwargs['latitude'] != 'NULL' else None
+        self.latitude = float(kwargs['latitude']) if has_location else None
         self.light_conditions = int(kwargs['light_conditions'])
         self.local_authority_district = int(kwargs['local_authority_district'])
         self.local_authority_highway = kwargs['local_authority_highway']
         self.local_authority_ons_district = kwargs['local_authority_ons_district']
-        self.location_easting_osgr = int(kwargs['location_easting_osgr']) if kwargs['latitude'] != 'NULL' else None
-        self.location_northing_osgr = int(kwargs['location_northing_osgr']) if kwargs['latitude'] != 'NULL' else None
-        self.longitude = float(kwargs['longitude']) if kwargs['latitude'] != 'NULL' else None
+        self.location_easting_osgr = int(kwargs['location_easting_osgr']) if has_location else None
+        self.location_northing_osgr = int(kwargs['location_northing_osgr']) if has_location else None
+        self.longitude = float(kwargs['longitude']) if has_location else None
         self.lsoa_of_accident_location = kwargs['lsoa_of_accident_location']
         self.number_of_casualties = int(kwargs['number_of_casualties'])
         self.number_of_vehicles = int(kwargs['number_of_vehicles'])
@@ -251,6 +764,11 @@ class Collision(RawCollision):
 
         self.casualties = kwargs['casualties']
         self.vehicles = kwargs['vehicles']
+        # Lists of dicts when built from serialize() output
+        if isinstance(self.casualties, list):
+            self.casualties = Casualties.parse(self.casualties)
+        if isinstance(self.vehicles, list):
+            self.vehicles = Vehicles.parse(self.vehicles)
 
     @staticmethod
     def parse(data):
@@ -272,7 +790,7 @@ class Collision(RawCollision):
 
     @property
     def id(self):
-        return self.data['accident_index']
+        return self.accident_index
 
     @property
     def geo(self):
@@ -280,10 +798,25 @@ class Collision(RawCollision):
 
     @property
     def timestamp(self):
-        return datetime.datetime.strptime(
-            f'{self.date} {self.time}',
-            '%d/%m/%Y %I:%M'
-        )
+        return parse_timestamp(self.date, self.time)
+
+    @property
+    def hour(self):
+        return self.timestamp.hour
+
+    @property
+    def weekday(self):
+        '''
+        Monday is 0
+        '''
+        return self.timestamp.weekday()
+
+    def get_label(self, field):
+        '''
+        Label of a coded field such as weather_conditions, None if its code has
+        no label
+        '''
+        return decode(field, getattr(self, field))
 
     def serialize(self):
         return {
@@ -0,0 +1,919 @@
+import sys
+
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import (
+    islice,
+    starmap
+)
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_base import logger
+
+from road_collisions_uk.models.collision import (
+    Collision,
+    Collisions
+)
+from road_collisions_uk.models.vehicle import (
+    Vehicle,
+    Vehicles
+)
+from road_collisions_uk.models.casualty import (
+    Casualty,
+    Casualties
+)
+from road_collisions_uk.labels import (
+    decode_column,
+    is_coded,
+    to_categorical
+)
+from road_collisions_uk.spatial import GridIndex
+from road_collisions_uk.utils import (
+    decode_strings,
+    gc_paused
+)
+from road_collisions_uk.timeseries import (
+    TIME_FIELDS,
+    get_time_column,
+    histogram,
+    to_timestamp,
+    to_timestamp_column
+)
+from road_collisions_uk.query import (
+    DATE_FIELDS,
+    InvertedIndex,
+    lookup_mask,
+    parse_lookups,
+    record_matches,
+    to_date_column
+)
+from road_collisions_uk.models.schema import (
+    CASUALTY_SCHEMA,
+    COLLISION_SCHEMA,
+    NULLABLE_FIELDS,
+    NULLABLE_INT_FIELDS,
+    VEHICLE_SCHEMA
+)
+
+
+# How many collisions are materialized at a time when iterating
+ITER_CHUNK_SIZE = 4096
+
+TABLES = {
+    'collision': 'columns',
+    'vehicle': 'vehicle_columns',
+    'casualty': 'casualty_columns',
+}
+
+# Narrowest first, int columns are packed into the first that holds them
+COMPACT_INT_DTYPES = (np.int8, np.int16, np.int32)
+
+# How many serialized records are transposed into columns at a time
+PARSE_CHUNK_SIZE = 65536
+
+
+def to_column(values, dtype):
+    '''
+    Convert csv strings / python values to a typed numpy array. 'NULL' and
+    None become NaN in float columns.
+    '''
+    if dtype == object:
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+
+    series = pd.Series(values, dtype=object)
+    if dtype == np.float64:
+        return np.array(pd.to_numeric(series, errors='coerce'), dtype=np.float64)
+
+    return np.array(pd.to_numeric(series), dtype=dtype)
+
+
+class ObjectColumns(Mapping):
+    '''
+    Columns of the fields of some objects, such as the Collision objects
+    of a list backed Collisions, each built from the objects the first
+    time it's used
+    '''
+
+    def __init__(self, get_objects, schema):
+        self._get_objects = get_objects
+        self._schema = schema
+        self._columns = {}
+
+    def __getitem__(self, name):
+        if name not in self._columns:
+            self._columns[name] = to_column(
+                [getattr(o, name) for o in self._get_objects()],
+                self._schema[name]
+            )
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._schema
+
+    def __iter__(self):
+        return iter(self._schema)
+
+    def __len__(self):
+        return len(self._schema)
+
+
+def build_columns(rows, schema):
+    return {
+        name: to_column([row[name] for row in rows], dtype)
+        for name, dtype in schema.items()
+    }
+
+
+def transpose_records(records, schema):
+    '''
+    Turn a list of serialized dicts into typed columns, one itemgetter
+    call per record rather than a constructor call
+    '''
+    names = list(schema.keys())
+    if not records:
+        return {name: to_column([], schema[name]) for name in names}
+
+    columns = {}
+    values = zip(*map(itemgetter(*names), records))
+    for name, column in zip(names, values):
+        dtype = schema[name]
+        if dtype == np.int64:
+            # Already ints once serialized so no string parsing needed
+            columns[name] = np.array(column, dtype=dtype)
+        else:
+            columns[name] = to_column(column, dtype)
+    return columns
+
+
+def concat_columns(parts, schema):
+    if not parts:
+        return {name: to_column([], dtype) for name, dtype in schema.items()}
+    if len(parts) == 1:
+        return parts[0]
+    return {
+        name: np.concatenate([part[name] for part in parts]) for name in schema
+    }
+
+
+def counts_to_offsets(counts):
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def null_missing_locations(columns):
+    '''
+    Collision treats the whole location as missing when latitude is NULL
+    '''
+    missing = np.isnan(columns['latitude'])
+    for name in NULLABLE_FIELDS:
+        columns[name][missing] = np.nan
+    return columns
+
+
+def compact_column(column):
+    '''
+    Pack an int column into the narrowest dtype that holds its range, and
+    make repeated strings of an object column share one str object
+    '''
+    if column.dtype == object:
+        codes, values = pd.factorize(column)
+        if not len(values):
+            # Empty or all missing, nothing to share
+            return column
+        compacted = np.asarray(values, dtype=object)[codes]
+        # factorize turns None into NaN, keep missing values as they were
+        missing = codes < 0
+        compacted[missing] = column[missing]
+        return compacted
+
+    if column.dtype.kind != 'i' or not len(column):
+        return column
+
+    low, high = column.min(), column.max()
+    for dtype in COMPACT_INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return column.astype(dtype)
+    return column
+
+
+def column_nbytes(column):
+    '''
+    Bytes held by a column, including the distinct objects of an object
+    column
+    '''
+    if column.dtype != object:
+        return column.nbytes
+    distinct = {id(value): value for value in column.tolist()}
+    return column.nbytes + sum(sys.getsizeof(value) for value in distinct.values())
+
+
+def link_children(positions, num_parents):
+    '''
+    Get the order to store child rows in and the CSR offsets into them
+
+    :param positions: for each child row the position of its parent or -1
+    :param num_parents: the number of parents
+    :return: (child row order, offsets of length num_parents + 1)
+    '''
+    positions = np.asarray(positions, dtype=np.int64)
+    keep = np.flatnonzero(positions >= 0)
+    order = keep[np.argsort(positions[keep], kind='stable')]
+    offsets = np.zeros(num_parents + 1, dtype=np.int64)
+    np.cumsum(
+        np.bincount(positions[keep], minlength=num_parents),
+        out=offsets[1:]
+    )
+    return order, offsets
+
+
+def take_children(offsets, indices):
+    '''
+    Get the child rows and new offsets for a subset of parents
+
+    :param offsets: CSR offsets of the parents
+    :param indices: the positions of the parents to keep
+    :return: (child row positions, new offsets)
+    '''
+    starts = offsets[indices]
+    counts = offsets[indices + 1] - starts
+    new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+    rows = (
+        np.repeat(starts - new_offsets[:-1], counts) +
+        np.arange(new_offsets[-1], dtype=np.int64)
+    )
+    return rows, new_offsets
+
+
+def column_values(name, column, start, stop):
+    values = decode_strings(column[start:stop]).tolist()
+    if name in NULLABLE_INT_FIELDS:
+        return [None if v != v else int(v) for v in values]
+    if name in NULLABLE_FIELDS:
+        return [None if v != v else v for v in values]
+    return values
+
+
+@lru_cache(maxsize=None)
+def get_builder(cls, names):
+    '''
+    Compile a function that creates an object of cls from a row of values
+    in the order of names, assigning each slot directly rather than a
+    setattr call per field
+    '''
+    for name in names:
+        if not name.isidentifier():
+            raise ValueError('Cannot build %s with field %r' % (cls.__name__, name))
+
+    args = ', '.join(f'v{i}' for i in range(len(names)))
+    lines = [f'def build({args}):', '    obj = new(cls)']
+    lines.extend(f'    obj.{name} = v{i}' for i, name in enumerate(names))
+    lines.append('    return obj')
+
+    namespace = {'new': object.__new__, 'cls': cls}
+    exec('\n'.join(lines), namespace)
+    return namespace['build']
+
+
+def materialize(cls, columns, start, stop):
+    '''
+    Create objects of cls for rows start:stop of columns without going
+    through the __init__ conversions
+    '''
+    names = tuple(columns.keys())
+    values = [
+        column_values(name, columns[name], start, stop) for name in names
+    ]
+    return list(starmap(get_builder(cls, names), zip(*values)))
+
+
+class ColumnarCollisions(Collisions):
+    '''
+    Collisions stored as one typed numpy array per slot
+
+    Vehicles and casualties are stored the same way, ordered by the
+    collision they belong to, with CSR style offsets so the vehicles of
+    collision i are rows vehicle_offsets[i]:vehicle_offsets[i + 1].
+
+    Collision objects are only created when indexed or iterated.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        self.columns = kwargs['columns']
+        self.vehicle_columns = kwargs['vehicle_columns']
+        self.casualty_columns = kwargs['casualty_columns']
+        self.vehicle_offsets = kwargs['vehicle_offsets']
+        self.casualty_offsets = kwargs['casualty_offsets']
+
+        self.indexes = {}
+        self._date_columns = {}
+        self._spatial_index = None
+        self._timestamps = kwargs.get('timestamps')
+        self._time_columns = {}
+        self._timestamp_order = None
+
+    def __len__(self):
+        return len(self.vehicle_offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(np.arange(len(self))[i])
+
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('collision index out of range')
+
+        return self._materialize(i, i + 1)[0]
+
+    def __iter__(self):
+        for start in range(0, len(self), ITER_CHUNK_SIZE):
+            yield from self._materialize(
+                start,
+                min(start + ITER_CHUNK_SIZE, len(self))
+            )
+
+    def append(self, data):
+        raise TypeError(
+            'ColumnarCollisions are immutable, use to_collisions() for a list you can append to'
+        )
+
+    def extend(self, data):
+        raise TypeError(
+            'ColumnarCollisions are immutable, use to_collisions() for a list you can extend'
+        )
+
+    def _materialize(self, start, stop):
+        collisions = materialize(Collision, self.columns, start, stop)
+
+        vehicle_start = self.vehicle_offsets[start]
+        vehicles = materialize(
+            Vehicle,
+            self.vehicle_columns,
+            vehicle_start,
+            self.vehicle_offsets[stop]
+        )
+
+        casualty_start = self.casualty_offsets[start]
+        casualties = materialize(
+            Casualty,
+            self.casualty_columns,
+            casualty_start,
+            self.casualty_offsets[stop]
+        )
+
+        for i, collision in enumerate(collisions, start):
+            collision.vehicles = Vehicles(
+                data=vehicles[
+                    self.vehicle_offsets[i] - vehicle_start:
+                    self.vehicle_offsets[i + 1] - vehicle_start
+                ]
+            )
+            collision.casualties = Casualties(
+                data=casualties[
+                    self.casualty_offsets[i] - casualty_start:
+                    self.casualty_offsets[i + 1] - casualty_start
+                ]
+            )
+
+        return collisions
+
+    def take(self, indices):
+        '''
+        Get a new ColumnarCollisions of the collisions at the given
+        positions, or where a boolean mask is True
+
+        :param indices: array of positions or boolean mask
+        '''
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        indices = indices.astype(np.int64, copy=False)
+
+        vehicle_rows, vehicle_offsets = take_children(self.vehicle_offsets, indices)
+        casualty_rows, casualty_offsets = take_children(self.casualty_offsets, indices)
+
+        return ColumnarCollisions(
+            columns={k: v[indices] for k, v in self.columns.items()},
+            vehicle_columns={k: v[vehicle_rows] for k, v in self.vehicle_columns.items()},
+            casualty_columns={k: v[casualty_rows] for k, v in self.casualty_columns.items()},
+            vehicle_offsets=vehicle_offsets,
+            casualty_offsets=casualty_offsets,
+            timestamps=self._timestamps[indices] if self._timestamps is not None else None
+        )
+
+    def view(self, start, stop):
+        '''
+        Get collisions start:stop as views of these columns rather than
+        copies like take, so memory-mapped columns stay shared
+        '''
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        vehicle_start = self.vehicle_offsets[start]
+        vehicle_stop = self.vehicle_offsets[stop]
+        casualty_start = self.casualty_offsets[start]
+        casualty_stop = self.casualty_offsets[stop]
+
+        return ColumnarCollisions(
+            columns={k: v[start:stop] for k, v in self.columns.items()},
+            vehicle_columns={
+                k: v[vehicle_start:vehicle_stop] for k, v in self.vehicle_columns.items()
+            },
+            casualty_columns={
+                k: v[casualty_start:casualty_stop] for k, v in self.casualty_columns.items()
+            },
+            vehicle_offsets=self.vehicle_offsets[start:stop + 1] - vehicle_start,
+            casualty_offsets=self.casualty_offsets[start:stop + 1] - casualty_start,
+            timestamps=self._timestamps[start:stop] if self._timestamps is not None else None
+        )
+
+    def create_index(self, *fields):
+        '''
+        Build inverted indexes used by equality and `in` filters on the
+        given fields, such as police_force or accident_severity, and by
+        get / lookup on keys such as accident_index. Saved with snapshots.
+        '''
+        for field in fields:
+            self.indexes[field] = InvertedIndex(self.columns[field])
+
+    def get_index(self, field):
+        '''
+        The index on field, built on first use if it wasn't already
+        '''
+        if field not in self.indexes:
+            self.create_index(field)
+        return self.indexes[field]
+
+    def get(self, accident_index, default=None):
+        '''
+        Get a collision by accident_index using the accident_index index
+        '''
+        positions = self.get_index('accident_index').get_positions(accident_index)
+        if not len(positions):
+            return default
+        return self._materialize(int(positions[0]), int(positions[0]) + 1)[0]
+
+    def lookup(self, field, *values):
+        '''
+        Get the collisions with any of the values of an indexed field,
+        such as every collision in an LSOA or local_authority_ons_district,
+        in their original order
+        '''
+        index = self.get_index(field)
+        if len(values) == 1:
+            positions = index.get_positions(values[0])
+        else:
+            positions = np.sort(index.lookup(values))
+        return self.take(positions)
+
+    @property
+    def timestamps(self):
+        '''
+        date and time parsed to datetime64[m], parsed once on first use and
+        kept by take / filter
+        '''
+        if self._timestamps is None:
+            self._timestamps = to_timestamp_column(
+                self.columns['date'],
+                self.columns['time']
+            )
+        return self._timestamps
+
+    def get_time_column(self, field):
+        '''
+        timestamp, hour (0-23) or weekday (Monday is 0), -1 / NaT where
+        the date or time is missing
+        '''
+        if field not in self._time_columns:
+            self._time_columns[field] = get_time_column(self.timestamps, field)
+        return self._time_columns[field]
+
+    def _query_column(self, field):
+        if field in TIME_FIELDS:
+            return self.get_time_column(field)
+        if field not in DATE_FIELDS:
+            return self.columns[field]
+        if field not in self._date_columns:
+            self._date_columns[field] = to_date_column(self.columns[field])
+        return self._date_columns[field]
+
+    def mask(self, **kwargs):
+        '''
+        Get a boolean array of the collisions that match the filters, see
+        road_collisions_uk.query for the lookups available
+
+        Fields that are stored as columns are evaluated over the whole
+        column at once, anything else (properties for example) falls back
+        to checking the collisions that are still left one by one.
+        '''
+        mask = np.ones(len(self), dtype=bool)
+
+        python_lookups = []
+        for field, lookup, expected in parse_lookups(kwargs):
+            if field not in self.columns and field not in TIME_FIELDS:
+                python_lookups.append((field, lookup, expected))
+                continue
+
+            mask &= lookup_mask(
+                field,
+                lookup,
+                expected,
+                lambda: self._query_column(field),
+                index=self.indexes.get(field)
+            )
+
+        if python_lookups:
+            positions = np.flatnonzero(mask)
+            mask[positions] = [
+                record_matches(c, python_lookups) for c in self.take(positions)
+            ]
+
+        return mask
+
+    def filter(self, **kwargs):
+        logger.debug('Filtering from %s' % (len(self)))
+        return self.take(self.mask(**kwargs))
+
+    def between(self, start, end):
+        '''
+        Collisions from start up to but not including end
+
+        :param start: datetime, date or ISO string
+        :param end: datetime, date or ISO string
+        '''
+        return self.take(self.between_positions(start, end))
+
+    def between_positions(self, start, end):
+        '''
+        Positions of the collisions from start up to but not including
+        end, in order
+        '''
+        timestamps = self.timestamps
+        if self._timestamp_order is None:
+            # NaT sorts last so never falls in a window
+            self._timestamp_order = np.argsort(timestamps, kind='stable')
+        ordered = timestamps[self._timestamp_order]
+
+        first, last = np.searchsorted(
+            ordered,
+            np.array([to_timestamp(start), to_timestamp(end)], dtype='datetime64[m]'),
+            side='left'
+        )
+        return np.sort(self._timestamp_order[first:last])
+
+    def histogram(self, freq='D', start=None, end=None):
+        '''
+        Count collisions per year, month, week, day or hour
+
+        :kwarg freq: one of Y, M, W, D, h
+        :kwarg start: first bucket, defaults to that of the earliest collision
+        :kwarg end: last bucket, defaults to that of the latest collision
+        :return: pandas Series of counts indexed by the start of each bucket
+        '''
+        return histogram(self.timestamps, freq, start=start, end=end)
+
+    @property
+    def spatial_index(self):
+        '''
+        Grid index on the OSGB eastings / northings, built on first use
+        '''
+        if self._spatial_index is None:
+            self._spatial_index = GridIndex(
+                self.columns['location_easting_osgr'],
+                self.columns['location_northing_osgr']
+            )
+        return self._spatial_index
+
+    def within_bbox(self, min_easting, min_northing, max_easting, max_northing):
+        '''
+        Collisions inside a bounding box of OSGB eastings / northings
+        '''
+        return self.take(
+            self.spatial_index.within_bbox(
+                min_easting,
+                min_northing,
+                max_easting,
+                max_northing
+            )
+        )
+
+    def within_radius(self, easting, northing, radius):
+        '''
+        Collisions within radius metres of an OSGB easting / northing
+        '''
+        return self.take(
+            self.spatial_index.within_radius(easting, northing, radius)
+        )
+
+    def nearest(self, easting, northing, k=1):
+        '''
+        The k collisions nearest an OSGB easting / northing, nearest first
+        '''
+        return self.take(
+            self.spatial_index.nearest(easting, northing, k=k)
+        )
+
+    def within_polygon(self, points):
+        '''
+        Collisions inside a polygon given as [(easting, northing), ...]
+        '''
+        return self.take(
+            self.spatial_index.within_polygon(points)
+        )
+
+    def _table_columns(self, table):
+        if table not in TABLES:
+            raise ValueError('Unknown table %s, expected one of %s' % (table, list(TABLES)))
+        return getattr(self, TABLES[table])
+
+    def _field_columns(self, field):
+        for columns in (self.columns, self.vehicle_columns, self.casualty_columns):
+            if field in columns:
+                return columns
+        raise ValueError('Unknown field %s' % (field))
+
+    def decode(self, field):
+        '''
+        Labels of a coded Collision, Vehicle or Casualty field as an
+        object array, one take from the field's lookup table
+        '''
+        return decode_column(field, self._field_columns(field)[field])
+
+    def to_dataframe(self, table='collision', labels=False):
+        '''
+        pandas DataFrame of the collision, vehicle or casualty table,
+        vehicles and casualties have the accident_index they belong to
+
+        :kwarg labels: decode coded fields into categorical columns of
+            their labels
+        '''
+        columns = self._table_columns(table)
+        data = {}
+        if table != 'collision':
+            data['accident_index'] = np.repeat(
+                decode_strings(self.columns['accident_index']),
+                np.diff(getattr(self, f'{table}_offsets'))
+            )
+        for name, column in columns.items():
+            if labels and is_coded(name):
+                data[name] = to_categorical(name, column)
+            else:
+                data[name] = decode_strings(column)
+        return pd.DataFrame(data)
+
+    def compact(self):
+        '''
+        Get a copy with int columns packed into int8 / int16 / int32 and
+        repeated strings such as generic_make_model and
+        lsoa_of_accident_location sharing one object per distinct value
+
+        Objects materialized from it share those strings too.
+        '''
+        compacted = ColumnarCollisions(
+            columns={k: compact_column(v) for k, v in self.columns.items()},
+            vehicle_columns={k: compact_column(v) for k, v in self.vehicle_columns.items()},
+            casualty_columns={k: compact_column(v) for k, v in self.casualty_columns.items()},
+            vehicle_offsets=self.vehicle_offsets,
+            casualty_offsets=self.casualty_offsets,
+            timestamps=self._timestamps
+        )
+        compacted.indexes = dict(self.indexes)
+        return compacted
+
+    def memory_usage(self):
+        '''
+        :return: {table: bytes} of the collision, vehicle and casualty
+            columns and the offsets linking them
+        '''
+        usage = {
+            table: sum(column_nbytes(c) for c in self._table_columns(table).values())
+            for table in TABLES
+        }
+        usage['offsets'] = self.vehicle_offsets.nbytes + self.casualty_offsets.nbytes
+        return usage
+
+    @property
+    def bytes_per_collision(self):
+        if not len(self):
+            return 0.0
+        return sum(self.memory_usage().values()) / len(self)
+
+    def to_collisions(self, progress=None):
+        '''
+        Materialize everything into a plain list backed Collisions, with
+        the same indexes
+
+        :kwarg progress: called with how many more collisions were built
+            after each chunk
+        '''
+        data = []
+        with gc_paused():
+            for start in range(0, len(self), ITER_CHUNK_SIZE):
+                chunk = self._materialize(start, min(start + ITER_CHUNK_SIZE, len(self)))
+                data.extend(chunk)
+                if progress is not None:
+                    progress(len(chunk))
+        collisions = Collisions(
+            data=data
+        )
+        # Same rows in the same order, so the indexes still hold
+        collisions.indexes = dict(self.indexes)
+        return collisions
+
+    @staticmethod
+    def concat(parts):
+        '''
+        Join several ColumnarCollisions into one, in the order given
+        '''
+        parts = list(parts)
+        if not parts:
+            return ColumnarCollisions.from_records([], [], [])
+
+        def concat_offsets(name):
+            offsets = [np.zeros(1, dtype=np.int64)]
+            total = 0
+            for part in parts:
+                part_offsets = getattr(part, name)
+                offsets.append(part_offsets[1:] + total)
+                total += part_offsets[-1]
+            return np.concatenate(offsets)
+
+        def concat_column(columns):
+            # Parts from different snapshots can have a string column as
+            # bytes in one and str objects in another
+            if len({c.dtype.kind for c in columns} & {'S', 'O'}) > 1:
+                columns = [decode_strings(c) for c in columns]
+            return np.concatenate(columns)
+
+        def concat_columns(name):
+            columns = [getattr(part, name) for part in parts]
+            return {
+                k: concat_column([c[k] for c in columns])
+                for k in columns[0].keys()
+            }
+
+        return ColumnarCollisions(
+            columns=concat_columns('columns'),
+            vehicle_columns=concat_columns('vehicle_columns'),
+            casualty_columns=concat_columns('casualty_columns'),
+            vehicle_offsets=concat_offsets('vehicle_offsets'),
+            casualty_offsets=concat_offsets('casualty_offsets')
+        )
+
+    @staticmethod
+    def from_columns(columns, vehicle_columns, casualty_columns):
+        '''
+        Build from typed columns such as those from ingest.read_table.
+        vehicle_columns and casualty_columns also need an accident_index
+        column which is used to link them to their accidents.
+        '''
+        columns = null_missing_locations(
+            {name: columns[name] for name in COLLISION_SCHEMA}
+        )
+        accident_index = pd.Index(columns['accident_index'])
+
+        children = {}
+        for name, child_columns, schema in (
+            ('vehicle', vehicle_columns, VEHICLE_SCHEMA),
+            ('casualty', casualty_columns, CASUALTY_SCHEMA),
+        ):
+            order, offsets = link_children(
+                accident_index.get_indexer(child_columns['accident_index']),
+                len(accident_index)
+            )
+            children[name] = (
+                {k: child_columns[k][order] for k in schema},
+                offsets
+            )
+
+        return ColumnarCollisions(
+            columns=columns,
+            vehicle_columns=children['vehicle'][0],
+            casualty_columns=children['casualty'][0],
+            vehicle_offsets=children['vehicle'][1],
+            casualty_offsets=children['casualty'][1]
+        )
+
+    @staticmethod
+    def from_records(accident_rows, vehicle_rows, casualty_rows):
+        '''
+        Build from csv rows as given by csv.DictReader, vehicles and
+        casualties are linked to accidents by accident_index
+        '''
+        def get_columns(rows, schema):
+            columns = build_columns(rows, schema)
+            columns['accident_index'] = to_column(
+                [row['accident_index'] for row in rows],
+                np.dtype(object)
+            )
+            return columns
+
+        return ColumnarCollisions.from_columns(
+            get_columns(accident_rows, COLLISION_SCHEMA),
+            get_columns(vehicle_rows, VEHICLE_SCHEMA),
+            get_columns(casualty_rows, CASUALTY_SCHEMA)
+        )
+
+    @staticmethod
+    def from_serialized(records, chunk_size=PARSE_CHUNK_SIZE):
+        '''
+        Build from Collision.serialize() dicts, such as a cached dump,
+        a chunk at a time without constructing any Collision objects
+
+        :param records: iterable of serialized collisions
+        '''
+        records = iter(records)
+        parts = {'collision': [], 'vehicle': [], 'casualty': []}
+        vehicle_counts = []
+        casualty_counts = []
+
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            vehicles = [r['vehicles'] for r in chunk]
+            casualties = [r['casualties'] for r in chunk]
+            vehicle_counts.extend(map(len, vehicles))
+            casualty_counts.extend(map(len, casualties))
+
+            parts['collision'].append(transpose_records(chunk, COLLISION_SCHEMA))
+            parts['vehicle'].append(
+                transpose_records([v for vs in vehicles for v in vs], VEHICLE_SCHEMA)
+            )
+            parts['casualty'].append(
+                transpose_records([c for cs in casualties for c in cs], CASUALTY_SCHEMA)
+            )
+
+        return ColumnarCollisions(
+            columns=null_missing_locations(
+                concat_columns(parts['collision'], COLLISION_SCHEMA)
+            ),
+            vehicle_columns=concat_columns(parts['vehicle'], VEHICLE_SCHEMA),
+            casualty_columns=concat_columns(parts['casualty'], CASUALTY_SCHEMA),
+            vehicle_offsets=counts_to_offsets(vehicle_counts),
+            casualty_offsets=counts_to_offsets(casualty_counts)
+        )
+
+    @staticmethod
+    def over_collisions(collisions):
+        '''
+        Columns over Collision objects that are built as they're used, so
+        a query on a list backed Collisions pays for the fields it reads
+        rather than transposing every field of every table. Meant for one
+        query, columns already built don't see later changes to the objects.
+        '''
+        collisions = list(collisions)
+        children = {}
+
+        def get_children(name):
+            def get_objects():
+                if name not in children:
+                    children[name] = [o for c in collisions for o in getattr(c, name)]
+                return children[name]
+            return get_objects
+
+        return ColumnarCollisions(
+            columns=ObjectColumns(lambda: collisions, COLLISION_SCHEMA),
+            vehicle_columns=ObjectColumns(get_children('vehicles'), VEHICLE_SCHEMA),
+            casualty_columns=ObjectColumns(get_children('casualties'), CASUALTY_SCHEMA),
+            vehicle_offsets=counts_to_offsets([len(c.vehicles) for c in collisions]),
+            casualty_offsets=counts_to_offsets([len(c.casualties) for c in collisions])
+        )
+
+    @staticmethod
+    def from_collisions(collisions):
+        '''
+        Build from Collision objects, such as a list backed Collisions
+        '''
+        collisions = list(collisions)
+
+        vehicle_offsets = counts_to_offsets([len(c.vehicles) for c in collisions])
+        casualty_offsets = counts_to_offsets([len(c.casualties) for c in collisions])
+
+        def get_rows(objs, schema):
+            return [{name: getattr(o, name) for name in schema} for o in objs]
+
+        return ColumnarCollisions(
+            columns=build_columns(
+                get_rows(collisions, COLLISION_SCHEMA),
+                COLLISION_SCHEMA
+            ),
+            vehicle_columns=build_columns(
+                get_rows([v for c in collisions for v in c.vehicles], VEHICLE_SCHEMA),
+                VEHICLE_SCHEMA
+            ),
+            casualty_columns=build_columns(
+                get_rows([v for c in collisions for v in c.casualties], CASUALTY_SCHEMA),
+                CASUALTY_SCHEMA
+            ),
+            vehicle_offsets=vehicle_offsets,
+            casualty_offsets=casualty_offsets
+        )
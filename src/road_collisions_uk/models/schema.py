@@ -0,0 +1,141 @@
+import numpy as np
+
+from road_collisions_uk.models.collision import Collision
+from road_collisions_uk.models.vehicle import Vehicle
+from road_collisions_uk.models.casualty import Casualty
+
+
+# Slots that are kept as the raw csv string rather than passed through int()
+STRING_FIELDS = {
+    'accident_index',
+    'date',
+    'time',
+    'local_authority_highway',
+    'local_authority_ons_district',
+    'lsoa_of_accident_location',
+    'generic_make_model',
+}
+
+# Slots that are None on the objects when the csv has 'NULL' for the
+# location. Stored as float64 with NaN for missing.
+NULLABLE_FIELDS = {
+    'location_easting_osgr',
+    'location_northing_osgr',
+    'longitude',
+    'latitude',
+}
+
+# Nullable slots that are ints on the objects when present
+NULLABLE_INT_FIELDS = {
+    'location_easting_osgr',
+    'location_northing_osgr',
+}
+
+
+def get_dtype(field):
+    if field in STRING_FIELDS:
+        return np.dtype(object)
+    if field in NULLABLE_FIELDS:
+        return np.dtype(np.float64)
+    return np.dtype(np.int64)
+
+
+def build_schema(slots):
+    return {slot: get_dtype(slot) for slot in slots}
+
+
+COLLISION_SCHEMA = build_schema(Collision.__slots__)
+VEHICLE_SCHEMA = build_schema(Vehicle.__slots__)
+CASUALTY_SCHEMA = build_schema(Casualty.__slots__)
+
+
+# Columns of the DfT accident, vehicle and casualty csvs, in order
+ACCIDENT_CSV_COLUMNS = [
+    'accident_index',
+    'accident_year',
+    'accident_reference',
+    'location_easting_osgr',
+    'location_northing_osgr',
+    'longitude',
+    'latitude',
+    'police_force',
+    'accident_severity',
+    'number_of_vehicles',
+    'number_of_casualties',
+    'date',
+    'day_of_week',
+    'time',
+    'local_authority_district',
+    'local_authority_ons_district',
+    'local_authority_highway',
+    'first_road_class',
+    'first_road_number',
+    'road_type',
+    'speed_limit',
+    'junction_detail',
+    'junction_control',
+    'second_road_class',
+    'second_road_number',
+    'pedestrian_crossing_human_control',
+    'pedestrian_crossing_physical_facilities',
+    'light_conditions',
+    'weather_conditions',
+    'road_surface_conditions',
+    'special_conditions_at_site',
+    'carriageway_hazards',
+    'urban_or_rural_area',
+    'did_police_officer_attend_scene_of_accident',
+    'trunk_road_flag',
+    'lsoa_of_accident_location',
+]
+
+VEHICLE_CSV_COLUMNS = [
+    'accident_index',
+    'accident_year',
+    'accident_reference',
+    'vehicle_reference',
+    'vehicle_type',
+    'towing_and_articulation',
+    'vehicle_manoeuvre',
+    'vehicle_direction_from',
+    'vehicle_direction_to',
+    'vehicle_location_restricted_lane',
+    'junction_location',
+    'skidding_and_overturning',
+    'hit_object_in_carriageway',
+    'vehicle_leaving_carriageway',
+    'hit_object_off_carriageway',
+    'first_point_of_impact',
+    'vehicle_left_hand_drive',
+    'journey_purpose_of_driver',
+    'sex_of_driver',
+    'age_of_driver',
+    'age_band_of_driver',
+    'engine_capacity_cc',
+    'propulsion_code',
+    'age_of_vehicle',
+    'generic_make_model',
+    'driver_imd_decile',
+    'driver_home_area_type',
+]
+
+CASUALTY_CSV_COLUMNS = [
+    'accident_index',
+    'accident_year',
+    'accident_reference',
+    'vehicle_reference',
+    'casualty_reference',
+    'casualty_class',
+    'sex_of_casualty',
+    'age_of_casualty',
+    'age_band_of_casualty',
+    'casualty_severity',
+    'pedestrian_location',
+    'pedestrian_movement',
+    'car_passenger',
+    'bus_or_coach_passenger',
+    'pedestrian_road_maintenance_worker',
+    'casualty_type',
+    'casualty_home_area_type',
+    'casualty_imd_decile',
+]
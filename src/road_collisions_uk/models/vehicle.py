@@ -1,3 +1,6 @@
+from road_collisions_uk.labels import decode
+
+
 class Vehicles():
 
     def __init__(self, *args, **kwargs):
@@ -104,6 +107,13 @@ class Vehicle():
         self.vehicle_reference = int(kwargs['vehicle_reference'])
         self.vehicle_type = int(kwargs['vehicle_type'])
 
+    def get_label(self, field):
+        '''
+        Label of a coded field such as vehicle_type, None if its code has
+        no label
+        '''
+        return decode(field, getattr(self, field))
+
     def serialize(self):
         return {
             'age_band_of_driver': self.age_band_of_driver,
@@ -0,0 +1,88 @@
+import os
+
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    as_completed
+)
+
+from road_collisions_uk.instrumentation import LoadStats
+from road_collisions_uk.partitions import get_partition_paths
+
+
+TABLES = ('accident', 'vehicle', 'casualty')
+
+
+def read_partition(path, table):
+    '''
+    Read one partition of a table, run in the worker processes
+
+    Returns the columns rather than objects since numpy arrays go back to
+    the parent as a handful of buffers rather than one pickle per object
+    '''
+    from road_collisions_uk.ingest import read_table
+    stats = LoadStats()
+    with stats.stage('read_csv', total=1) as stage:
+        columns = read_table([path], table, stage=stage)
+    return columns, stats
+
+
+def load_parallel(data_dir, year=None, workers=None, stats=None):
+    '''
+    Read the partitions in data_dir across a process pool, one task per
+    table per year, and join them
+
+    A single year is still three tasks, its accident, vehicle and
+    casualty partitions are parsed at the same time. The largest
+    partitions are submitted first so the pool doesn't end on one big
+    straggler.
+
+    :param data_dir: dir holding the partitioned csvs
+    :kwarg year: None for all years, an int or an iterable of ints
+    :kwarg workers: number of processes, defaults to the number of cpus
+    :kwarg stats: LoadStats to record the stages in. The read_csv stages
+        of the workers are summed so can add up to more than the wall time
+        of the load_partitions stage
+    :return: ColumnarCollisions
+    '''
+    from road_collisions_uk.ingest import concat_parts
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    if stats is None:
+        stats = LoadStats()
+
+    tasks = [
+        (table, i, path)
+        for table in TABLES
+        for i, path in enumerate(get_partition_paths(data_dir, table, year=year))
+    ]
+    tasks.sort(key=lambda task: os.path.getsize(task[2]), reverse=True)
+
+    parts = {}
+    with stats.stage('load_partitions', total=len(tasks)) as stage:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(read_partition, path, table): (table, i)
+                for table, i, path in tasks
+            }
+            for future in as_completed(futures):
+                columns, part_stats = future.result()
+                parts[futures[future]] = columns
+                stats.merge(part_stats)
+                stage.add_rows(len(columns['accident_index']))
+                stage.update()
+
+    # Back in year order, as a serial load reads them
+    tables = [
+        concat_parts(
+            [parts[key] for key in sorted(k for k in parts if k[0] == table)],
+            table
+        )
+        for table in TABLES
+    ]
+
+    with stats.stage('join') as stage:
+        collisions = ColumnarCollisions.from_columns(*tables)
+        stage.add_rows(
+            len(collisions) + collisions.vehicle_offsets[-1] + collisions.casualty_offsets[-1]
+        )
+    return collisions
@@ -0,0 +1,225 @@
+import csv
+import os
+import shutil
+import tempfile
+
+from road_collisions_base import logger
+
+from road_collisions_uk.utils import (
+    atomic_write_json,
+    file_hash,
+    read_json,
+    replace_dir
+)
+
+
+TABLES = ('accident', 'casualty', 'vehicle')
+
+PARTITIONS_DIR = 'partitions'
+PARTITION_MANIFEST = 'manifest.json'
+
+
+def get_years(year):
+    '''
+    Normalise a year argument to a sorted list of years or None for all
+
+    :param year: None, an int or an iterable of ints such as a range
+    '''
+    if year is None:
+        return None
+    if isinstance(year, int):
+        return [year]
+    return sorted(set(int(y) for y in year))
+
+
+def get_partition_dir(dirpath, table):
+    return os.path.join(dirpath, PARTITIONS_DIR, table)
+
+
+def get_source_path(dirpath, table):
+    return os.path.join(dirpath, f'{table}.csv')
+
+
+def is_partitioned(dirpath, table):
+    '''
+    Whether the partitions of a table are in place and were written from
+    the current version of the source csv
+    '''
+    manifest = read_json(
+        os.path.join(get_partition_dir(dirpath, table), PARTITION_MANIFEST)
+    )
+    if not manifest:
+        return False
+
+    source_path = get_source_path(dirpath, table)
+    if not os.path.exists(source_path):
+        # Source may have been cleaned up, partitions are all we have
+        return True
+
+    stat = os.stat(source_path)
+    return (
+        manifest.get('source_size') == stat.st_size and
+        manifest.get('source_mtime') == stat.st_mtime and
+        manifest.get('sorted', False)
+    )
+
+
+def sort_partition(filepath, key_index):
+    with open(filepath, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader)
+        rows = sorted(reader, key=lambda row: row[key_index])
+
+    with open(filepath, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def partition_table(dirpath, table):
+    '''
+    Split {table}.csv into one csv per accident_year under
+    partitions/{table}/{year}.csv
+
+    Each partition is sorted by accident_index so the tables can be merge
+    joined while streaming. The source is normally already sorted, only
+    partitions that aren't are read back into memory and sorted.
+
+    The partitions are written to a temp dir and swapped in with the
+    manifest already inside so readers never see a partial layout. The
+    manifest has a hash of each partition so whatever is built from them
+    can tell which years actually changed.
+
+    :return: the number of rows written
+    '''
+    source_path = get_source_path(dirpath, table)
+    partition_dir = get_partition_dir(dirpath, table)
+    parent_dir = os.path.dirname(partition_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+
+    logger.info('Partitioning %s by year', source_path)
+
+    stat = os.stat(source_path)
+    tmp_dir = tempfile.mkdtemp(dir=parent_dir, prefix=f'.{table}.tmp-')
+    try:
+        files = {}
+        writers = {}
+        rows = {}
+        last_keys = {}
+        unsorted = set()
+        try:
+            with open(source_path, newline='') as csvfile:
+                reader = csv.reader(csvfile)
+                header = next(reader)
+                year_index = header.index('accident_year')
+                key_index = header.index('accident_index')
+                for row in reader:
+                    row_year = int(row[year_index])
+                    writer = writers.get(row_year)
+                    if writer is None:
+                        files[row_year] = open(
+                            os.path.join(tmp_dir, f'{row_year}.csv'),
+                            'w',
+                            newline=''
+                        )
+                        writer = writers[row_year] = csv.writer(files[row_year])
+                        writer.writerow(header)
+                        rows[row_year] = 0
+                    writer.writerow(row)
+                    rows[row_year] += 1
+
+                    if last_keys.get(row_year, '') > row[key_index]:
+                        unsorted.add(row_year)
+                    last_keys[row_year] = row[key_index]
+        finally:
+            for f in files.values():
+                f.close()
+
+        for unsorted_year in unsorted:
+            sort_partition(
+                os.path.join(tmp_dir, f'{unsorted_year}.csv'),
+                key_index
+            )
+
+        atomic_write_json(
+            os.path.join(tmp_dir, PARTITION_MANIFEST),
+            {
+                'source_size': stat.st_size,
+                'source_mtime': stat.st_mtime,
+                'years': {str(y): rows[y] for y in sorted(rows)},
+                'hashes': {
+                    str(y): file_hash(os.path.join(tmp_dir, f'{y}.csv'))
+                    for y in sorted(rows)
+                },
+                'sorted': True
+            }
+        )
+
+        replace_dir(tmp_dir, partition_dir)
+        return sum(rows.values())
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def ensure_partitioned(dirpath, tables=TABLES, stage=None):
+    '''
+    Partition any tables whose partitions are missing or out of date
+
+    :kwarg stage: StageStats to count the rows written / tables
+        partitioned in
+    :return: the tables that were partitioned
+    '''
+    partitioned = []
+    for table in tables:
+        if not is_partitioned(dirpath, table):
+            rows = partition_table(dirpath, table)
+            partitioned.append(table)
+            if stage is not None:
+                stage.add_rows(rows)
+                stage.update()
+    return partitioned
+
+
+def get_partition_hash(dirpath, table, year):
+    '''
+    sha256 of a year's partition, from the manifest if it has it
+    '''
+    manifest = read_json(
+        os.path.join(get_partition_dir(dirpath, table), PARTITION_MANIFEST)
+    ) or {}
+    partition_hash = manifest.get('hashes', {}).get(str(year))
+    if partition_hash is not None:
+        return partition_hash
+
+    path = os.path.join(get_partition_dir(dirpath, table), f'{year}.csv')
+    if not os.path.exists(path):
+        return None
+    return file_hash(path)
+
+
+def get_partition_years(dirpath, table):
+    manifest = read_json(
+        os.path.join(get_partition_dir(dirpath, table), PARTITION_MANIFEST)
+    ) or {}
+    return sorted(int(y) for y in manifest.get('years', {}))
+
+
+def get_partition_paths(dirpath, table, year=None):
+    '''
+    Get the paths of the partitions of a table that hold the given years
+
+    :param dirpath: dir holding the csvs
+    :param table: one of TABLES
+    :kwarg year: None for all years, an int or an iterable of ints
+    '''
+    years = get_years(year)
+    available = get_partition_years(dirpath, table)
+    if years is not None:
+        years = set(years)
+        available = [y for y in available if y in years]
+
+    return [
+        os.path.join(get_partition_dir(dirpath, table), f'{y}.csv')
+        for y in available
+    ]
@@ -0,0 +1,407 @@
+'''
+Filters given as keyword arguments, field__lookup=value, for example
+
+    collisions.filter(
+        speed_limit__gte=30,
+        police_force__in=[1, 2],
+        date__range=('01/01/2020', '31/03/2020'),
+        hour__in=[7, 8, 9],
+        weekday__lt=5
+    )
+
+A field without a lookup is an equality check.
+'''
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.timeseries import to_timestamp
+from road_collisions_uk.utils import (
+    decode_strings,
+    encode_string
+)
+
+
+LOOKUPS = {
+    'exact',
+    'ne',
+    'in',
+    'not_in',
+    'gt',
+    'gte',
+    'lt',
+    'lte',
+    'range',
+    'isnull',
+}
+
+# Fields stored as dd/mm/YYYY strings that are compared as dates
+DATE_FIELDS = {'date'}
+
+DATE_FORMAT = '%d/%m/%Y'
+
+# Fields compared as datetimes, see road_collisions_uk.timeseries
+TIMESTAMP_FIELDS = {'timestamp'}
+
+
+def parse_lookup(key):
+    '''
+    Split a filter keyword into (field, lookup)
+
+    >>> parse_lookup('speed_limit__gte')
+    ('speed_limit', 'gte')
+    >>> parse_lookup('speed_limit')
+    ('speed_limit', 'exact')
+    '''
+    if '__' in key:
+        field, lookup = key.rsplit('__', 1)
+        if lookup in LOOKUPS:
+            return field, lookup
+    return key, 'exact'
+
+
+def parse_lookups(kwargs):
+    return [
+        parse_lookup(key) + (value,) for key, value in kwargs.items()
+    ]
+
+
+def to_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.strptime(value, DATE_FORMAT).date()
+        except ValueError:
+            return datetime.date.fromisoformat(value)
+    raise ValueError('Cannot compare %r to a date' % (value,))
+
+
+def normalise_value(field, lookup, value):
+    '''
+    Convert the value of a lookup to what the field is compared with, date
+    fields are compared as datetime.date and timestamps as datetime
+    '''
+    if lookup == 'isnull':
+        return value
+    if field in DATE_FIELDS:
+        convert = to_date
+    elif field in TIMESTAMP_FIELDS:
+        convert = to_timestamp
+    else:
+        return value
+    if lookup in {'in', 'not_in', 'range'}:
+        return [convert(v) for v in value]
+    return convert(value)
+
+
+def matches(value, lookup, expected):
+    '''
+    Check a single python value against a lookup
+    '''
+    if lookup == 'exact':
+        return value == expected
+    if lookup == 'ne':
+        return value != expected
+    if lookup == 'in':
+        return value in expected
+    if lookup == 'not_in':
+        return value not in expected
+    if lookup == 'isnull':
+        return (value is None or value != value) == bool(expected)
+    if value is None or value != value:
+        return False
+    if lookup == 'gt':
+        return value > expected
+    if lookup == 'gte':
+        return value >= expected
+    if lookup == 'lt':
+        return value < expected
+    if lookup == 'lte':
+        return value <= expected
+    if lookup == 'range':
+        return expected[0] <= value <= expected[1]
+    raise ValueError('Unknown lookup %s' % (lookup))
+
+
+def record_matches(record, lookups):
+    '''
+    Check an object such as a Collision against parsed lookups
+    '''
+    for field, lookup, expected in lookups:
+        value = getattr(record, field)
+        if field in DATE_FIELDS and lookup != 'isnull':
+            value = to_date(value)
+        expected = normalise_value(field, lookup, expected)
+        if not matches(value, lookup, expected):
+            return False
+    return True
+
+
+def to_date_column(column):
+    '''
+    Parse a column of dd/mm/YYYY strings to datetime64[D]
+    '''
+    return pd.to_datetime(
+        pd.Series(decode_strings(column), dtype=object),
+        format=DATE_FORMAT,
+        errors='coerce'
+    ).to_numpy().astype('datetime64[D]')
+
+
+def to_column_value(field, value):
+    if field in DATE_FIELDS:
+        return np.datetime64(value, 'D')
+    if field in TIMESTAMP_FIELDS:
+        return np.datetime64(value, 's')
+    return value
+
+
+def column_mask(column, lookup, expected):
+    '''
+    Evaluate a lookup over a whole column
+
+    :return: boolean numpy array
+    '''
+    if column.dtype.kind == 'S':
+        # Fixed width bytes from a snapshot, compare as bytes
+        if lookup in {'in', 'not_in', 'range'}:
+            expected = [encode_string(v) for v in expected]
+        elif lookup != 'isnull':
+            expected = encode_string(expected)
+
+    if lookup == 'exact':
+        return column == expected
+    if lookup == 'ne':
+        return column != expected
+    if lookup in {'in', 'not_in'}:
+        if column.dtype == object:
+            # np.isin would turn [1, 'a'] into strs, compare by hash / ==
+            found = pd.Series(column, dtype=object).isin(list(expected)).to_numpy()
+        else:
+            found = np.isin(column, list(expected))
+        return found if lookup == 'in' else ~found
+    if lookup == 'isnull':
+        return pd.isnull(column) == bool(expected)
+
+    if column.dtype == object:
+        # Comparisons on strings, missing values never match
+        present = ~pd.isnull(column)
+        mask = np.zeros(len(column), dtype=bool)
+        mask[present] = column_mask(
+            column[present].astype(str),
+            lookup,
+            expected
+        )
+        return mask
+
+    if lookup == 'gt':
+        return column > expected
+    if lookup == 'gte':
+        return column >= expected
+    if lookup == 'lt':
+        return column < expected
+    if lookup == 'lte':
+        return column <= expected
+    if lookup == 'range':
+        return (column >= expected[0]) & (column <= expected[1])
+    raise ValueError('Unknown lookup %s' % (lookup))
+
+
+def lookup_mask(field, lookup, expected, get_column, index=None):
+    '''
+    Evaluate a parsed lookup over a field, by the index where there is
+    one it can use and over the whole column otherwise
+
+    :param get_column: called for the column, only when the index can't
+        be used
+    :kwarg index: InvertedIndex on the field
+    :return: boolean numpy array
+    '''
+    if lookup in {'exact', 'ne'} and expected is None:
+        lookup, expected = 'isnull', lookup == 'exact'
+
+    expected = normalise_value(field, lookup, expected)
+
+    if index is not None and InvertedIndex.can_use(lookup) and field not in DATE_FIELDS:
+        values = expected if lookup in {'in', 'not_in'} else [expected]
+        # Missing values aren't in the index
+        if not any(pd.isnull(v) for v in values):
+            return index.mask(lookup, expected)
+
+    if lookup in {'in', 'not_in', 'range'}:
+        expected = [to_column_value(field, v) for v in expected]
+    elif lookup != 'isnull':
+        expected = to_column_value(field, expected)
+
+    return column_mask(get_column(), lookup, expected)
+
+
+# Fields indexed for looking collisions up by key, kept in stores
+KEY_INDEXES = (
+    'accident_index',
+    'lsoa_of_accident_location',
+    'local_authority_ons_district',
+)
+
+
+class InvertedIndex():
+    '''
+    Row positions for each distinct value of a column, used by equality
+    and `in` filters on coded columns and for looking up rows by keys
+    such as accident_index or lsoa_of_accident_location
+
+    Values are sorted so finding a value is a binary search, and the
+    positions of each value are in row order. Missing values in object
+    columns aren't indexed. Values of an object column are matched with
+    ==, as a scan of the column would, so an int accident_index is found
+    by an int and not by a str.
+    '''
+
+    def __init__(self, column):
+        self.size = len(column)
+        self._slots = None
+        rows = None
+        if column.dtype == object:
+            present = ~pd.isnull(column)
+            if not present.all():
+                rows = np.flatnonzero(present)
+                column = column[rows]
+        try:
+            self.values, inverse = np.unique(column, return_inverse=True)
+        except TypeError:
+            # Values that can't be ordered, such as ints and strs in one
+            # object column, are found by hash rather than binary search
+            inverse, values = pd.factorize(column)
+            self.values = np.empty(len(values), dtype=object)
+            self.values[:] = list(values)
+            self._slots = self._build_slots()
+        self.positions = np.argsort(inverse, kind='stable')
+        if rows is not None:
+            self.positions = rows[self.positions]
+        self.offsets = np.zeros(len(self.values) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(inverse, minlength=len(self.values)),
+            out=self.offsets[1:]
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    @staticmethod
+    def from_arrays(column, positions, offsets):
+        '''
+        Rebuild an index saved as its positions and offsets, the values
+        are read back from the column it indexes
+        '''
+        index = InvertedIndex.__new__(InvertedIndex)
+        index.size = len(column)
+        index._slots = None
+        index.positions = positions
+        index.offsets = offsets
+        index.values = np.asarray(column[positions[offsets[:-1]]])
+        return index
+
+    def exact_values(self, values):
+        '''
+        The values as the index's dtype, dropping any the column can't
+        hold exactly such as 1.5 in an int column or 300 in an int8 one,
+        since no row can equal them. Casting would match the wrong rows
+        or overflow.
+        '''
+        dtype = self.values.dtype
+        exact = []
+        for value in values:
+            if value is None or isinstance(value, (list, tuple, set, dict)):
+                continue
+            if dtype == object:
+                # Missing values aren't indexed
+                if value == value:
+                    exact.append(value)
+                continue
+            if dtype.kind == 'S':
+                # Longer values would be truncated to the column's width
+                if isinstance(value, str) and '\x00' not in value:
+                    value = value.encode()
+                    if len(value) <= dtype.itemsize:
+                        exact.append(value)
+                continue
+            if isinstance(value, (str, bytes)):
+                continue
+            try:
+                converted = dtype.type(value)
+            except (OverflowError, TypeError, ValueError):
+                continue
+            if converted == value:
+                exact.append(converted)
+        exact_values = np.empty(len(exact), dtype=dtype)
+        exact_values[:] = exact
+        return exact_values
+
+    def _build_slots(self):
+        return {value: i for i, value in enumerate(self.values.tolist())}
+
+    def find(self, values):
+        '''
+        The sorted, distinct slots of self.values equal to any of the
+        values
+        '''
+        values = self.exact_values(values)
+        if not len(values):
+            return np.array([], dtype=np.int64)
+        if self._slots is None:
+            try:
+                found = np.searchsorted(self.values, values)
+                found = found[found < len(self.values)]
+                return np.unique(found[np.isin(self.values[found], values)])
+            except TypeError:
+                # Looking for an int among strs or the other way round,
+                # which can't be ordered against each other
+                self._slots = self._build_slots()
+        found = [self._slots.get(value) for value in values.tolist()]
+        return np.unique(np.array([i for i in found if i is not None], dtype=np.int64))
+
+    def get_positions(self, value):
+        '''
+        Get the row positions of the rows that have value, in row order
+        '''
+        found = self.find([value])
+        if not len(found):
+            return self.positions[:0]
+        found = found[0]
+        return self.positions[self.offsets[found]:self.offsets[found + 1]]
+
+    def lookup(self, values):
+        '''
+        Get the row positions of the rows that have any of the values
+        '''
+        found = self.find(values)
+        if not len(found):
+            return np.array([], dtype=np.int64)
+        return np.concatenate([
+            self.positions[self.offsets[i]:self.offsets[i + 1]]
+            for i in found
+        ])
+
+    def mask(self, lookup, expected):
+        if lookup == 'exact':
+            values = [expected]
+        elif lookup in {'in', 'not_in'}:
+            values = expected
+        elif lookup == 'ne':
+            values = [expected]
+        else:
+            raise ValueError('Index cannot be used for %s' % (lookup))
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.lookup(values)] = True
+        if lookup in {'ne', 'not_in'}:
+            mask = ~mask
+        return mask
+
+    @staticmethod
+    def can_use(lookup):
+        return lookup in {'exact', 'in', 'ne', 'not_in'}
@@ -0,0 +1,144 @@
+'''
+Share loaded collisions between processes without a copy per process
+
+    def count_fatal(collisions):
+        return int((collisions.columns['accident_severity'] == 1).sum())
+
+    with publish(collisions) as shared:
+        counts = shared.map(count_fatal, workers=4)
+
+publish writes a snapshot to shared memory (/dev/shm where there is one)
+and attach memory-maps it read-only, so the columns, offsets and indexes
+are the same pages in every process. Only the path is pickled when a
+SharedCollisions is sent to a worker.
+
+String columns are published as fixed width bytes, see
+road_collisions_uk.snapshot, and only decoded to str for the rows a
+worker materializes. Columns with missing or non-ASCII strings are the
+exception. They're dictionary encoded, and each process holds its own
+array of references to the distinct values.
+'''
+import os
+import shutil
+import tempfile
+import weakref
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from road_collisions_uk.snapshot import (
+    load_snapshot,
+    save_snapshot
+)
+
+
+SHARED_MEMORY_DIR = '/dev/shm'
+
+# How many collisions each map task gets
+MAP_CHUNK_SIZE = 65536
+
+# Collisions attached in this process by path, so each worker attaches
+# once however many tasks it runs
+_attached = {}
+
+
+def get_shared_dir():
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return tempfile.gettempdir()
+
+
+def attach(path):
+    '''
+    Memory-map collisions published at path read-only
+
+    :return: ColumnarCollisions
+    '''
+    if path not in _attached:
+        _attached[path] = load_snapshot(path, mmap=True)
+    return _attached[path]
+
+
+def _map_chunk(path, func, bounds):
+    return func(attach(path).view(*bounds))
+
+
+class SharedCollisions():
+    '''
+    Handle on published collisions, the process that published them
+    removes them on close or when the handle is garbage collected
+    '''
+
+    def __init__(self, path, owner=False):
+        self.path = path
+        self.owner = owner
+        self._finalizer = None
+        if owner:
+            self._finalizer = weakref.finalize(self, shutil.rmtree, path, True)
+
+    def __repr__(self):
+        return 'SharedCollisions(%s)' % (self.path)
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self.owner = False
+        self._finalizer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def attach(self):
+        return attach(self.path)
+
+    def close(self):
+        _attached.pop(self.path, None)
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def map(self, func, chunk_size=MAP_CHUNK_SIZE, workers=None):
+        '''
+        Call func on chunks of the collisions across a process pool
+
+        Each worker attaches once and func gets views of the shared
+        columns, see ColumnarCollisions.view, so nothing is copied.
+
+        :param func: picklable function of a ColumnarCollisions
+        :kwarg chunk_size: collisions per call
+        :kwarg workers: number of processes, defaults to the number of cpus
+        :return: list of the results, in the order of the chunks
+        '''
+        length = len(self.attach())
+        bounds = [
+            (start, min(start + chunk_size, length))
+            for start in range(0, length, chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_map_chunk, repeat(self.path), repeat(func), bounds))
+
+
+def publish(collisions, dirpath=None):
+    '''
+    Write collisions to shared memory for other processes to attach
+
+    :kwarg dirpath: dir to publish in, defaults to /dev/shm or the temp
+        dir where there is no /dev/shm. A dir on disk works too
+    :return: SharedCollisions, close it to free the memory
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    if not isinstance(collisions, ColumnarCollisions):
+        collisions = ColumnarCollisions.from_collisions(collisions)
+
+    path = tempfile.mkdtemp(dir=dirpath or get_shared_dir(), prefix='road_collisions-')
+    try:
+        save_snapshot(collisions, path, strings='bytes')
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    return SharedCollisions(path, owner=True)
@@ -0,0 +1,243 @@
+'''
+Binary columnar snapshots of Collisions
+
+A snapshot is a dir holding one .npy per numeric column plus the CSR
+offsets linking collisions to their vehicles and casualties:
+
+    meta.json
+    vehicle_offsets.npy
+    casualty_offsets.npy
+    collision/<field>.npy
+    vehicle/<field>.npy
+    casualty/<field>.npy
+    indexes/<field>.positions.npy
+    indexes/<field>.offsets.npy
+
+String columns where most values are distinct, such as accident_index
+and lsoa_of_accident_location, are saved as fixed width ASCII bytes in
+<field>.npy. They're memory-mapped like the numeric columns and only
+decoded to str for the rows that are materialized, so loading doesn't
+build a str per row and processes on the same host share the pages.
+
+Strings that repeat a lot, such as dates and districts, are dictionary
+encoded as <field>.codes.npy and <field>.values.json instead. As are
+columns that can't be bytes, with missing or non-ASCII values. The codes
+are memory-mapped, and each load builds one str per distinct value.
+
+The inverted indexes of the collisions are saved as their positions and
+offsets, their values are read back from the columns they index.
+'''
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.query import InvertedIndex
+from road_collisions_uk.utils import (
+    atomic_write_json,
+    read_json,
+    replace_dir
+)
+
+
+SNAPSHOT_VERSION = 2
+
+# Older versions that can still be loaded
+READABLE_VERSIONS = {1, SNAPSHOT_VERSION}
+
+# String columns are dictionary encoded if each distinct value is in at
+# least this many rows on average, otherwise saved as bytes
+DICTIONARY_MIN_REPEATS = 4
+
+META_FILENAME = 'meta.json'
+
+INDEXES_DIR = 'indexes'
+
+TABLES = ('collision', 'vehicle', 'casualty')
+
+
+def _table_columns(collisions):
+    return {
+        'collision': collisions.columns,
+        'vehicle': collisions.vehicle_columns,
+        'casualty': collisions.casualty_columns,
+    }
+
+
+def to_bytes_column(column):
+    '''
+    An object column of str as fixed width ASCII bytes, None if it has
+    missing / non-str / non-ASCII values
+    '''
+    if pd.api.types.infer_dtype(column, skipna=False) != 'string':
+        return None
+    try:
+        return column.astype('S')
+    except UnicodeEncodeError:
+        return None
+
+
+def _save_column(dirpath, name, column, strings='auto'):
+    if column.dtype.kind == 'S':
+        np.save(os.path.join(dirpath, f'{name}.npy'), column)
+        return {'dtype': column.dtype.str, 'encoding': 'bytes'}
+
+    if column.dtype != object:
+        np.save(os.path.join(dirpath, f'{name}.npy'), column)
+        return {'dtype': column.dtype.str, 'encoding': 'plain'}
+
+    if strings == 'bytes':
+        encoded = to_bytes_column(column)
+        if encoded is not None:
+            return _save_column(dirpath, name, encoded)
+
+    codes, values = pd.factorize(column, use_na_sentinel=False)
+    if strings == 'auto' and len(values) * DICTIONARY_MIN_REPEATS > len(column):
+        encoded = to_bytes_column(column)
+        if encoded is not None:
+            return _save_column(dirpath, name, encoded)
+
+    np.save(
+        os.path.join(dirpath, f'{name}.codes.npy'),
+        codes.astype(np.int32)
+    )
+    with open(os.path.join(dirpath, f'{name}.values.json'), 'w') as f:
+        # factorize gives NaN for missing values, keep them None
+        json.dump([None if pd.isnull(v) else v for v in values], f)
+    return {'dtype': 'object', 'encoding': 'dictionary'}
+
+
+def _load_column(dirpath, name, column_meta, mmap):
+    mmap_mode = 'r' if mmap else None
+    if column_meta['encoding'] in {'plain', 'bytes'}:
+        return np.load(os.path.join(dirpath, f'{name}.npy'), mmap_mode=mmap_mode)
+
+    codes = np.load(os.path.join(dirpath, f'{name}.codes.npy'), mmap_mode=mmap_mode)
+    with open(os.path.join(dirpath, f'{name}.values.json')) as f:
+        values = json.load(f)
+    lookup = np.empty(len(values), dtype=object)
+    lookup[:] = values
+    return lookup[codes]
+
+
+def save_snapshot(collisions, path, strings='auto'):
+    '''
+    Write a ColumnarCollisions to path, replacing any existing snapshot
+
+    The snapshot is written to a temp dir next to path and renamed into
+    place so readers never see a partial snapshot.
+
+    :kwarg strings: 'auto' to save mostly distinct string columns as bytes
+        and dictionary encode the rest, 'bytes' to save every string
+        column that can be as bytes so loading decodes none of them
+    '''
+    if strings not in {'auto', 'bytes'}:
+        raise ValueError('Unknown strings %s, expected auto or bytes' % (strings))
+
+    parent_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent_dir, exist_ok=True)
+
+    tmp_dir = tempfile.mkdtemp(
+        dir=parent_dir,
+        prefix='.' + os.path.basename(path) + '.tmp-'
+    )
+    try:
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'length': len(collisions),
+            'tables': {}
+        }
+        for table, columns in _table_columns(collisions).items():
+            table_dir = os.path.join(tmp_dir, table)
+            os.makedirs(table_dir)
+            meta['tables'][table] = [
+                dict(name=name, **_save_column(table_dir, name, column, strings=strings))
+                for name, column in columns.items()
+            ]
+
+        indexes_dir = os.path.join(tmp_dir, INDEXES_DIR)
+        os.makedirs(indexes_dir)
+        meta['indexes'] = sorted(collisions.indexes)
+        for field in meta['indexes']:
+            index = collisions.indexes[field]
+            np.save(os.path.join(indexes_dir, f'{field}.positions.npy'), index.positions)
+            np.save(os.path.join(indexes_dir, f'{field}.offsets.npy'), index.offsets)
+
+        np.save(os.path.join(tmp_dir, 'vehicle_offsets.npy'), collisions.vehicle_offsets)
+        np.save(os.path.join(tmp_dir, 'casualty_offsets.npy'), collisions.casualty_offsets)
+
+        atomic_write_json(os.path.join(tmp_dir, META_FILENAME), meta)
+
+        replace_dir(tmp_dir, path)
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def is_snapshot(path):
+    return os.path.isfile(os.path.join(path, META_FILENAME))
+
+
+def load_snapshot(path, mmap=True):
+    '''
+    Load a snapshot written by save_snapshot
+
+    :kwarg mmap: memory-map the numeric columns rather than reading them
+    :return: ColumnarCollisions
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    meta = read_json(os.path.join(path, META_FILENAME))
+    if not meta:
+        raise FileNotFoundError('No snapshot at %s' % (path))
+    if meta['version'] not in READABLE_VERSIONS:
+        raise ValueError(
+            'Unsupported snapshot version %s' % (meta['version'])
+        )
+
+    mmap_mode = 'r' if mmap else None
+
+    tables = {
+        table: {
+            column_meta['name']: _load_column(
+                os.path.join(path, table),
+                column_meta['name'],
+                column_meta,
+                mmap
+            )
+            for column_meta in meta['tables'][table]
+        }
+        for table in TABLES
+    }
+
+    collisions = ColumnarCollisions(
+        columns=tables['collision'],
+        vehicle_columns=tables['vehicle'],
+        casualty_columns=tables['casualty'],
+        vehicle_offsets=np.load(
+            os.path.join(path, 'vehicle_offsets.npy'),
+            mmap_mode=mmap_mode
+        ),
+        casualty_offsets=np.load(
+            os.path.join(path, 'casualty_offsets.npy'),
+            mmap_mode=mmap_mode
+        )
+    )
+
+    for field in meta.get('indexes', []):
+        collisions.indexes[field] = InvertedIndex.from_arrays(
+            collisions.columns[field],
+            np.load(
+                os.path.join(path, INDEXES_DIR, f'{field}.positions.npy'),
+                mmap_mode=mmap_mode
+            ),
+            np.load(
+                os.path.join(path, INDEXES_DIR, f'{field}.offsets.npy'),
+                mmap_mode=mmap_mode
+            )
+        )
+
+    return collisions
@@ -0,0 +1,165 @@
+'''
+Grid index over OSGB36 eastings / northings (metres) for bounding box,
+radius, nearest neighbour and polygon queries. Collisions with no
+location are left out of the index and never match.
+'''
+import numpy as np
+
+
+DEFAULT_CELL_SIZE = 1000
+
+
+class GridIndex():
+    '''
+    Points bucketed into square cells, the positions of the points in each
+    cell are stored contiguously ordered by cell so each row of cells in a
+    query is one searchsorted
+    '''
+
+    def __init__(self, eastings, northings, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+
+        eastings = np.asarray(eastings, dtype=np.float64)
+        northings = np.asarray(northings, dtype=np.float64)
+        valid = np.flatnonzero(~(np.isnan(eastings) | np.isnan(northings)))
+
+        self.eastings = eastings
+        self.northings = northings
+
+        if len(valid):
+            self.min_col = int(np.floor(eastings[valid].min() / cell_size))
+            self.min_row = int(np.floor(northings[valid].min() / cell_size))
+            max_col = int(np.floor(eastings[valid].max() / cell_size))
+            max_row = int(np.floor(northings[valid].max() / cell_size))
+        else:
+            self.min_col = self.min_row = max_col = max_row = 0
+        self.num_cols = max_col - self.min_col + 1
+        self.num_rows = max_row - self.min_row + 1
+
+        keys = self._cell_keys(eastings[valid], northings[valid])
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.positions = valid[order]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _cols(self, eastings):
+        return np.floor(np.asarray(eastings) / self.cell_size).astype(np.int64) - self.min_col
+
+    def _rows(self, northings):
+        return np.floor(np.asarray(northings) / self.cell_size).astype(np.int64) - self.min_row
+
+    def _cell_keys(self, eastings, northings):
+        return self._rows(northings) * self.num_cols + self._cols(eastings)
+
+    def _candidates(self, min_easting, min_northing, max_easting, max_northing):
+        '''
+        Positions of the points in every cell the bbox touches
+        '''
+        col_start = max(int(self._cols(min_easting)), 0)
+        col_end = min(int(self._cols(max_easting)), self.num_cols - 1)
+        row_start = max(int(self._rows(min_northing)), 0)
+        row_end = min(int(self._rows(max_northing)), self.num_rows - 1)
+        if col_start > col_end or row_start > row_end:
+            return np.array([], dtype=np.int64)
+
+        rows = np.arange(row_start, row_end + 1, dtype=np.int64)
+        starts = np.searchsorted(self.keys, rows * self.num_cols + col_start, side='left')
+        ends = np.searchsorted(self.keys, rows * self.num_cols + col_end, side='right')
+        counts = ends - starts
+        if not counts.sum():
+            return np.array([], dtype=np.int64)
+
+        offsets = np.cumsum(counts) - counts
+        index = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+        return self.positions[index]
+
+    def within_bbox(self, min_easting, min_northing, max_easting, max_northing):
+        '''
+        :return: sorted positions of the points inside the bbox, inclusive
+        '''
+        candidates = self._candidates(min_easting, min_northing, max_easting, max_northing)
+        e = self.eastings[candidates]
+        n = self.northings[candidates]
+        inside = (
+            (e >= min_easting) & (e <= max_easting) &
+            (n >= min_northing) & (n <= max_northing)
+        )
+        return np.sort(candidates[inside])
+
+    def distances(self, easting, northing, positions):
+        return np.hypot(
+            self.eastings[positions] - easting,
+            self.northings[positions] - northing
+        )
+
+    def within_radius(self, easting, northing, radius):
+        '''
+        :return: sorted positions of the points within radius metres
+        '''
+        candidates = self._candidates(
+            easting - radius,
+            northing - radius,
+            easting + radius,
+            northing + radius
+        )
+        inside = self.distances(easting, northing, candidates) <= radius
+        return np.sort(candidates[inside])
+
+    def nearest(self, easting, northing, k=1):
+        '''
+        :return: positions of the k nearest points, nearest first
+        '''
+        k = min(k, len(self))
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+
+        max_radius = self.cell_size * (self.num_cols + self.num_rows + 1) + (
+            abs(easting - self.min_col * self.cell_size) +
+            abs(northing - self.min_row * self.cell_size)
+        )
+        radius = self.cell_size
+        while True:
+            found = self.within_radius(easting, northing, radius)
+            if len(found) >= k or radius > max_radius:
+                break
+            radius *= 2
+
+        distances = self.distances(easting, northing, found)
+        order = np.lexsort((found, distances))[:k]
+        return found[order]
+
+    def within_polygon(self, points):
+        '''
+        :param points: [(easting, northing), ...] vertices of the polygon
+        :return: sorted positions of the points inside the polygon
+        '''
+        polygon = np.asarray(points, dtype=np.float64)
+        candidates = self.within_bbox(
+            polygon[:, 0].min(),
+            polygon[:, 1].min(),
+            polygon[:, 0].max(),
+            polygon[:, 1].max()
+        )
+        inside = points_in_polygon(
+            self.eastings[candidates],
+            self.northings[candidates],
+            polygon
+        )
+        return candidates[inside]
+
+
+def points_in_polygon(xs, ys, polygon):
+    '''
+    Ray casting test of many points against one polygon
+    '''
+    inside = np.zeros(len(xs), dtype=bool)
+    x1, y1 = polygon[-1]
+    for x2, y2 in polygon:
+        crosses = (y2 > ys) != (y1 > ys)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            at_x = (x1 - x2) * (ys - y2) / (y1 - y2) + x2
+        inside ^= crosses & (xs < at_x)
+        x1, y1 = x2, y2
+    return inside
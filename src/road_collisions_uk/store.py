@@ -0,0 +1,218 @@
+'''
+A persisted collision store kept up to date incrementally
+
+The store is one snapshot per year plus a manifest of the hashes of the
+partitions each year was built from:
+
+    store.json
+    years/<year>/   snapshot, see road_collisions_uk.snapshot
+
+refresh_store extracts whatever archives changed, re-partitions the csvs
+they replaced and rebuilds only the years whose partitions hash
+differently to what the store was built from.
+'''
+import os
+import shutil
+
+from road_collisions_base import logger
+
+from road_collisions_uk.ingest import load_dir
+from road_collisions_uk.partitions import (
+    TABLES,
+    ensure_partitioned,
+    get_partition_hash,
+    get_partition_years,
+    get_years
+)
+from road_collisions_uk.query import KEY_INDEXES
+from road_collisions_uk.snapshot import (
+    is_snapshot,
+    load_snapshot,
+    save_snapshot
+)
+from road_collisions_uk.utils import (
+    atomic_write_json,
+    extract_archives,
+    read_json
+)
+
+
+STORE_VERSION = 1
+
+STORE_MANIFEST = 'store.json'
+
+YEARS_DIR = 'years'
+
+
+class RefreshReport():
+    '''
+    What refresh_store did
+    '''
+
+    def __init__(self, **kwargs):
+        self.downloaded = kwargs.get('downloaded', [])
+        self.extracted = kwargs.get('extracted', [])
+        self.partitioned = kwargs.get('partitioned', [])
+        self.rebuilt = kwargs.get('rebuilt', [])
+        self.unchanged = kwargs.get('unchanged', [])
+        self.removed = kwargs.get('removed', [])
+        self.indexes = kwargs.get('indexes', [])
+
+    def __repr__(self):
+        return (
+            'RefreshReport(rebuilt=%s, unchanged=%s, removed=%s)' % (
+                self.rebuilt,
+                self.unchanged,
+                self.removed
+            )
+        )
+
+    @property
+    def changed(self):
+        return bool(self.rebuilt or self.removed)
+
+    def serialize(self):
+        return {
+            'downloaded': self.downloaded,
+            'extracted': self.extracted,
+            'partitioned': self.partitioned,
+            'rebuilt': self.rebuilt,
+            'unchanged': self.unchanged,
+            'removed': self.removed,
+            'indexes': self.indexes,
+        }
+
+
+def get_store_manifest_path(store_dir):
+    return os.path.join(store_dir, STORE_MANIFEST)
+
+
+def get_year_path(store_dir, year):
+    return os.path.join(store_dir, YEARS_DIR, str(year))
+
+
+def read_store_manifest(store_dir):
+    manifest = read_json(get_store_manifest_path(store_dir))
+    if not manifest or manifest.get('version') != STORE_VERSION:
+        return {'version': STORE_VERSION, 'years': {}, 'indexes': []}
+    return manifest
+
+
+def get_store_years(store_dir):
+    return sorted(int(y) for y in read_store_manifest(store_dir)['years'])
+
+
+def get_partition_hashes(data_dir, year):
+    return {
+        table: get_partition_hash(data_dir, table, year) for table in TABLES
+    }
+
+
+def refresh_store(data_dir, store_dir, year=None, indexes=None, download=False, force=False):
+    '''
+    Bring the store at store_dir up to date with the data in data_dir,
+    rebuilding only the years that changed
+
+    The manifest is written after each year so an interrupted refresh
+    keeps the years it finished.
+
+    :param data_dir: dir holding the archives / csvs
+    :param store_dir: dir of the store, created if it doesn't exist
+    :kwarg year: None for all years, an int or an iterable of ints. Years
+        no longer in the data are only removed when refreshing all years
+    :kwarg indexes: fields to keep inverted indexes on, defaults to those
+        the store already has. accident_index, lsoa_of_accident_location
+        and local_authority_ons_district are always indexed
+    :kwarg download: download new / changed objects from S3 first,
+        unless ROAD_COLLISIONS_OFFLINE is set
+    :kwarg force: rebuild every year even if unchanged
+    :return: RefreshReport
+    '''
+    report = RefreshReport()
+
+    if download:
+        from road_collisions_uk.download import download_data, is_offline
+        if not is_offline():
+            report.downloaded = download_data(data_dir=data_dir)
+
+    report.extracted = extract_archives(data_dir)
+    report.partitioned = ensure_partitioned(data_dir)
+
+    manifest = read_store_manifest(store_dir)
+    if indexes is not None:
+        manifest['indexes'] = sorted(set(indexes))
+    manifest['indexes'] = sorted(set(manifest['indexes']) | set(KEY_INDEXES))
+    report.indexes = manifest['indexes']
+
+    available = get_partition_years(data_dir, 'accident')
+    requested = get_years(year)
+    years = available if requested is None else [
+        y for y in available if y in set(requested)
+    ]
+
+    os.makedirs(os.path.join(store_dir, YEARS_DIR), exist_ok=True)
+
+    for partition_year in years:
+        hashes = get_partition_hashes(data_dir, partition_year)
+        year_path = get_year_path(store_dir, partition_year)
+        built = manifest['years'].get(str(partition_year))
+        if (
+            not force and
+            built is not None and
+            built['partitions'] == hashes and
+            is_snapshot(year_path)
+        ):
+            report.unchanged.append(partition_year)
+            continue
+
+        logger.info('Rebuilding %s of %s', partition_year, store_dir)
+
+        collisions = load_dir(data_dir, year=partition_year)
+        collisions.create_index(*manifest['indexes'])
+        save_snapshot(collisions, year_path)
+
+        manifest['years'][str(partition_year)] = {
+            'partitions': hashes,
+            'length': len(collisions)
+        }
+        atomic_write_json(get_store_manifest_path(store_dir), manifest)
+        report.rebuilt.append(partition_year)
+
+    if requested is None:
+        for stale_year in sorted(set(manifest['years']) - set(str(y) for y in available)):
+            del manifest['years'][stale_year]
+            atomic_write_json(get_store_manifest_path(store_dir), manifest)
+            shutil.rmtree(get_year_path(store_dir, stale_year), ignore_errors=True)
+            report.removed.append(int(stale_year))
+
+    atomic_write_json(get_store_manifest_path(store_dir), manifest)
+
+    return report
+
+
+def load_store(store_dir, year=None, mmap=True):
+    '''
+    Load the years of a store into one ColumnarCollisions with the store's
+    indexes built
+
+    :kwarg year: None for all years, an int or an iterable of ints
+    :kwarg mmap: memory-map the snapshots, a single year stays memory
+        mapped while several are copied when joined
+    '''
+    from road_collisions_uk.models.columnar import ColumnarCollisions
+
+    manifest = read_store_manifest(store_dir)
+    years = sorted(int(y) for y in manifest['years'])
+    requested = get_years(year)
+    if requested is not None:
+        years = [y for y in years if y in set(requested)]
+
+    parts = [
+        load_snapshot(get_year_path(store_dir, y), mmap=mmap) for y in years
+    ]
+    collisions = parts[0] if len(parts) == 1 else ColumnarCollisions.concat(parts)
+    # Indexes saved with a single year are used as they are
+    collisions.create_index(
+        *[field for field in manifest['indexes'] if field not in collisions.indexes]
+    )
+    return collisions
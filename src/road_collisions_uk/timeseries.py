@@ -0,0 +1,152 @@
+'''
+Timestamps parsed once from the date (dd/mm/YYYY) and time (HH:MM)
+strings into a datetime64[m] column, plus the hour of day / weekday
+columns and time bucketing derived from it without creating a datetime
+per collision.
+
+Collisions with no parsable date or time get NaT, an hour and weekday
+of -1, and never match a time filter.
+'''
+import datetime
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.utils import decode_strings
+
+
+TIMESTAMP_FORMAT = '%d/%m/%Y %H:%M'
+
+# Fields derived from the timestamp that can be filtered / grouped on
+TIME_FIELDS = ('timestamp', 'hour', 'weekday')
+
+# Bucket sizes for histogram, weeks start on Monday
+FREQUENCIES = ('Y', 'M', 'W', 'D', 'h')
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(date, time):
+    '''
+    Parse a collision's date and time, cached since many collisions share
+    the same date and time
+    '''
+    return datetime.datetime.strptime(f'{date} {time}', TIMESTAMP_FORMAT)
+
+
+def to_timestamp(value):
+    '''
+    Convert a filter value (datetime, date or ISO string) to a datetime
+    '''
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    if isinstance(value, np.datetime64):
+        return pd.Timestamp(value).to_pydatetime()
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.strptime(value, TIMESTAMP_FORMAT)
+        except ValueError:
+            return datetime.datetime.fromisoformat(value)
+    raise ValueError('Cannot compare %r to a timestamp' % (value,))
+
+
+def to_timestamp_column(dates, times):
+    '''
+    Parse columns of dd/mm/YYYY and HH:MM strings to datetime64[m]
+    '''
+    return pd.to_datetime(
+        pd.Series(decode_strings(dates), dtype=object) + ' ' + pd.Series(decode_strings(times), dtype=object),
+        format=TIMESTAMP_FORMAT,
+        errors='coerce'
+    ).to_numpy().astype('datetime64[m]')
+
+
+def get_hours(timestamps):
+    '''
+    Hour of day, 0-23, of each timestamp
+    '''
+    minutes = timestamps.astype(np.int64)
+    hours = (minutes // 60 % 24).astype(np.int8)
+    hours[np.isnat(timestamps)] = -1
+    return hours
+
+
+def get_weekdays(timestamps):
+    '''
+    Day of the week, Monday is 0 as with datetime.weekday, of each
+    timestamp
+    '''
+    days = timestamps.astype('datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday
+    weekdays = ((days + 3) % 7).astype(np.int8)
+    weekdays[np.isnat(timestamps)] = -1
+    return weekdays
+
+
+def get_time_column(timestamps, field):
+    if field == 'timestamp':
+        return timestamps
+    if field == 'hour':
+        return get_hours(timestamps)
+    if field == 'weekday':
+        return get_weekdays(timestamps)
+    raise ValueError('Unknown time field %s' % (field))
+
+
+def bucket(timestamps, freq):
+    '''
+    Truncate timestamps to the start of their bucket
+
+    :param freq: one of Y, M, W, D, h
+    :return: datetime64 array, NaT stays NaT
+    '''
+    if freq not in FREQUENCIES:
+        raise ValueError('Unknown frequency %s, expected one of %s' % (freq, FREQUENCIES))
+
+    if freq != 'W':
+        return timestamps.astype(f'datetime64[{freq}]')
+
+    days = timestamps.astype('datetime64[D]')
+    mondays = days - ((days.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    return mondays
+
+
+def histogram(timestamps, freq, start=None, end=None):
+    '''
+    Count the timestamps in each bucket, including empty buckets between
+    the first and last
+
+    :param freq: one of Y, M, W, D, h
+    :kwarg start: first bucket, defaults to that of the earliest timestamp
+    :kwarg end: last bucket, defaults to that of the latest timestamp
+    :return: pandas Series of counts indexed by the start of each bucket
+    '''
+    buckets = bucket(timestamps[~np.isnat(timestamps)], freq)
+    unit = 'D' if freq == 'W' else freq
+    step = 7 if freq == 'W' else 1
+
+    if start is not None:
+        start = bucket(np.array([to_timestamp(start)], dtype='datetime64[m]'), freq)[0]
+    elif len(buckets):
+        start = buckets.min()
+    if end is not None:
+        end = bucket(np.array([to_timestamp(end)], dtype='datetime64[m]'), freq)[0]
+    elif len(buckets):
+        end = buckets.max()
+
+    if start is None or end is None:
+        return pd.Series([], index=pd.DatetimeIndex([]), dtype=np.int64, name='count')
+
+    num_buckets = max((end - start).astype(np.int64) // step + 1, 0)
+    positions = (buckets - start).astype(np.int64) // step
+    positions = positions[(positions >= 0) & (positions < num_buckets)]
+
+    index = start + np.arange(num_buckets) * np.timedelta64(step, unit)
+    return pd.Series(
+        np.bincount(positions, minlength=num_buckets),
+        index=pd.DatetimeIndex(index.astype('datetime64[s]')),
+        name='count'
+    )
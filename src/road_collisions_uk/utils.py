@@ -1,8 +1,227 @@
+import gc
+import glob
+import hashlib
+import json
 import os
+import shutil
 import tarfile
+import tempfile
 
+from contextlib import contextmanager
 
-def extract_tgz(filepath):
-    tar = tarfile.open(filepath, 'r:gz')
-    tar.extractall(path=os.path.dirname(filepath))
-    tar.close()
+import numpy as np
+
+
+MANIFEST_SUFFIX = '.manifest.json'
+
+
+def file_hash(filepath, chunk_size=1024 * 1024):
+    sha = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+@contextmanager
+def gc_paused():
+    '''
+    Pause the cyclic garbage collector while building lots of objects
+    that can't form cycles, otherwise it keeps scanning the growing heap
+    '''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def decode_strings(column):
+    '''
+    Decode a fixed width bytes column, as memory-mapped from snapshots,
+    into an object column of str. Other columns are returned as they are
+    '''
+    if not isinstance(column, np.ndarray) or column.dtype.kind != 'S':
+        return column
+    return column.astype(str).astype(object)
+
+
+def encode_string(value):
+    '''
+    A str as bytes for comparing with a bytes column, anything else is
+    left alone and never equals any of it
+    '''
+    if isinstance(value, str):
+        return value.encode()
+    return value
+
+
+def atomic_write_json(filepath, data):
+    '''
+    Write json to a temp file next to filepath and rename it into place
+    so readers only ever see a complete file
+    '''
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(filepath) or '.',
+        prefix='.' + os.path.basename(filepath) + '.'
+    )
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(filepath):
+    try:
+        with open(filepath) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def replace_dir(src, dest):
+    '''
+    Move the dir src to dest, replacing whatever is at dest. The old dest
+    is moved aside first so dest is never a mix of the two.
+    '''
+    old_dir = None
+    if os.path.exists(dest):
+        old_dir = tempfile.mkdtemp(
+            dir=os.path.dirname(dest) or '.',
+            prefix='.' + os.path.basename(dest) + '.old-'
+        )
+        os.replace(dest, os.path.join(old_dir, os.path.basename(dest)))
+    os.replace(src, dest)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def get_manifest_path(filepath):
+    return filepath + MANIFEST_SUFFIX
+
+
+def _members_intact(dirpath, members):
+    for name, size in members.items():
+        path = os.path.join(dirpath, name)
+        if not os.path.isfile(path) or os.path.getsize(path) != size:
+            return False
+    return True
+
+
+def needs_extract(filepath):
+    '''
+    Whether the archive at filepath has to be (re)extracted
+
+    Size and mtime are checked first since they're cheap. If they differ
+    but the content hash is unchanged the manifest is refreshed and the
+    archive is not extracted again.
+    '''
+    manifest = read_json(get_manifest_path(filepath))
+    if not manifest:
+        return True
+
+    if not _members_intact(os.path.dirname(filepath), manifest.get('members', {})):
+        return True
+
+    stat = os.stat(filepath)
+    if stat.st_size == manifest.get('size') and stat.st_mtime == manifest.get('mtime'):
+        return False
+
+    if stat.st_size != manifest.get('size'):
+        return True
+
+    if file_hash(filepath) != manifest.get('sha256'):
+        return True
+
+    manifest['mtime'] = stat.st_mtime
+    atomic_write_json(get_manifest_path(filepath), manifest)
+    return False
+
+
+def _remove_stale_extractions(filepath):
+    pattern = os.path.join(
+        os.path.dirname(filepath),
+        '.' + glob.escape(os.path.basename(filepath)) + '.extract-*'
+    )
+    for stale in glob.glob(pattern):
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def extract_archives(dirpath):
+    '''
+    Extract every tgz under dirpath, skipping those whose manifest says
+    they're unchanged
+
+    :return: paths of the archives that were extracted
+    '''
+    extracted = []
+    for filename in sorted(glob.iglob(f'{dirpath}/**', recursive=True)):
+        if os.path.splitext(filename)[-1] not in {'.tgz', '.gz'}:
+            continue
+        if extract_tgz(filename):
+            extracted.append(filename)
+    return extracted
+
+
+def extract_tgz(filepath, force=False):
+    '''
+    Extract a tgz into the directory it lives in
+
+    A manifest of the archive's size, mtime, hash and extracted members is
+    kept next to it so unchanged archives are not extracted again. Members
+    are extracted to a temp dir first and renamed into place, the manifest
+    is only written once every member is in place so an interrupted
+    extraction is redone on the next call.
+
+    :param filepath: path to the archive
+    :kwarg force: extract even if the manifest says it's not needed
+    :return: True if the archive was extracted, False if skipped
+    '''
+    if not force and not needs_extract(filepath):
+        return False
+
+    dirpath = os.path.dirname(filepath)
+    manifest_path = get_manifest_path(filepath)
+
+    _remove_stale_extractions(filepath)
+
+    stat = os.stat(filepath)
+    sha256 = file_hash(filepath)
+
+    tmp_dir = tempfile.mkdtemp(
+        dir=dirpath or '.',
+        prefix='.' + os.path.basename(filepath) + '.extract-'
+    )
+    try:
+        tar = tarfile.open(filepath, 'r:gz')
+        members = [m for m in tar.getmembers() if m.isfile()]
+        tar.extractall(path=tmp_dir, members=members)
+        tar.close()
+
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        for member in members:
+            dest = os.path.join(dirpath, member.name)
+            os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+            os.replace(os.path.join(tmp_dir, member.name), dest)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    atomic_write_json(
+        manifest_path,
+        {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256,
+            'members': {m.name: m.size for m in members}
+        }
+    )
+
+    return True
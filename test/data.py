@@ -0,0 +1,143 @@
+import csv
+import os
+
+from road_collisions_uk.models.schema import (
+    ACCIDENT_CSV_COLUMNS as ACCIDENT_COLUMNS,
+    CASUALTY_CSV_COLUMNS as CASUALTY_COLUMNS,
+    VEHICLE_CSV_COLUMNS as VEHICLE_COLUMNS
+)
+
+
+def accident_row(year, num, num_vehicles, num_casualties):
+    reference = '01%07d' % (num)
+    null_location = num % 7 == 6
+    return {
+        'accident_index': f'{year}{reference}',
+        'accident_year': year,
+        'accident_reference': reference,
+        'location_easting_osgr': 'NULL' if null_location else 500000 + num * 10,
+        'location_northing_osgr': 'NULL' if null_location else 180000 + num * 10,
+        'longitude': 'NULL' if null_location else round(-0.2 + num * 0.001, 6),
+        'latitude': 'NULL' if null_location else round(51.5 + num * 0.001, 6),
+        'police_force': 1 + num % 3,
+        'accident_severity': 1 + num % 3,
+        'number_of_vehicles': num_vehicles,
+        'number_of_casualties': num_casualties,
+        'date': '%02d/%02d/%d' % (1 + num % 28, 1 + num % 12, year),
+        'day_of_week': 1 + num % 7,
+        'time': '%02d:%02d' % (num % 24, (num * 7) % 60),
+        'local_authority_district': 1 + num % 5,
+        'local_authority_ons_district': 'E0900000%d' % (1 + num % 5),
+        'local_authority_highway': 'E0900000%d' % (1 + num % 5),
+        'first_road_class': 3,
+        'first_road_number': 4006,
+        'road_type': 6,
+        'speed_limit': (20, 30, 40, 60, 70)[num % 5],
+        'junction_detail': 0,
+        'junction_control': -1,
+        'second_road_class': -1,
+        'second_road_number': -1,
+        'pedestrian_crossing_human_control': 0,
+        'pedestrian_crossing_physical_facilities': 0,
+        'light_conditions': 1,
+        'weather_conditions': 1 + num % 9,
+        'road_surface_conditions': 1 + num % 5,
+        'special_conditions_at_site': 0,
+        'carriageway_hazards': 0,
+        'urban_or_rural_area': 1 + num % 2,
+        'did_police_officer_attend_scene_of_accident': 1,
+        'trunk_road_flag': 2,
+        'lsoa_of_accident_location': 'E0100%04d' % (num % 10),
+    }
+
+
+def vehicle_row(accident, vehicle_reference):
+    return {
+        'accident_index': accident['accident_index'],
+        'accident_year': accident['accident_year'],
+        'accident_reference': accident['accident_reference'],
+        'vehicle_reference': vehicle_reference,
+        'vehicle_type': (9, 1, 11, 19)[vehicle_reference % 4],
+        'towing_and_articulation': 0,
+        'vehicle_manoeuvre': 18,
+        'vehicle_direction_from': 7,
+        'vehicle_direction_to': 3,
+        'vehicle_location_restricted_lane': 0,
+        'junction_location': 0,
+        'skidding_and_overturning': 0,
+        'hit_object_in_carriageway': 0,
+        'vehicle_leaving_carriageway': 0,
+        'hit_object_off_carriageway': 0,
+        'first_point_of_impact': 1,
+        'vehicle_left_hand_drive': 1,
+        'journey_purpose_of_driver': 6,
+        'sex_of_driver': 1 + vehicle_reference % 2,
+        'age_of_driver': 20 + vehicle_reference,
+        'age_band_of_driver': 5,
+        'engine_capacity_cc': 1598,
+        'propulsion_code': 1,
+        'age_of_vehicle': 4,
+        'generic_make_model': ('FORD FOCUS', 'VAUXHALL CORSA', '-1')[vehicle_reference % 3],
+        'driver_imd_decile': 4,
+        'driver_home_area_type': 1,
+    }
+
+
+def casualty_row(accident, casualty_reference):
+    return {
+        'accident_index': accident['accident_index'],
+        'accident_year': accident['accident_year'],
+        'accident_reference': accident['accident_reference'],
+        'vehicle_reference': 1,
+        'casualty_reference': casualty_reference,
+        'casualty_class': 1,
+        'sex_of_casualty': 1,
+        'age_of_casualty': 23,
+        'age_band_of_casualty': 5,
+        'casualty_severity': 1 + casualty_reference % 3,
+        'pedestrian_location': 0,
+        'pedestrian_movement': 0,
+        'car_passenger': 0,
+        'bus_or_coach_passenger': 0,
+        'pedestrian_road_maintenance_worker': 0,
+        'casualty_type': (9, 0, 3)[casualty_reference % 3],
+        'casualty_home_area_type': 1,
+        'casualty_imd_decile': 4,
+    }
+
+
+def write_sample_data(dirpath, years=(2019, 2020), per_year=10):
+    '''
+    Write accident, vehicle and casualty csvs with the real DfT column
+    layout. Accident n of a year has n % 3 + 1 vehicles and n % 2 + 1
+    casualties.
+    '''
+    os.makedirs(dirpath, exist_ok=True)
+
+    accidents = []
+    vehicles = []
+    casualties = []
+    for year in years:
+        for num in range(per_year):
+            num_vehicles = num % 3 + 1
+            num_casualties = num % 2 + 1
+            accident = accident_row(year, num, num_vehicles, num_casualties)
+            accidents.append(accident)
+            vehicles.extend(
+                vehicle_row(accident, ref) for ref in range(1, num_vehicles + 1)
+            )
+            casualties.extend(
+                casualty_row(accident, ref) for ref in range(1, num_casualties + 1)
+            )
+
+    for filename, columns, rows in (
+        ('accident.csv', ACCIDENT_COLUMNS, accidents),
+        ('vehicle.csv', VEHICLE_COLUMNS, vehicles),
+        ('casualty.csv', CASUALTY_COLUMNS, casualties),
+    ):
+        with open(os.path.join(dirpath, filename), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    return accidents, vehicles, casualties
@@ -1,11 +1,20 @@
 import copy
+import datetime
+import os
+import shutil
+import tempfile
 
 from unittest import TestCase
 
-from road_collisions_uk.models.collision import Collision
+from road_collisions_uk.models.collision import (
+    Collision,
+    Collisions
+)
 from road_collisions_uk.models.vehicle import Vehicles
 from road_collisions_uk.models.casualty import Casualties
 
+from test.data import write_sample_data
+
 
 class CollisionTest(TestCase):
 
@@ -135,3 +144,149 @@ class CollisionTest(TestCase):
                 'weather_conditions': 1.0
             }
         )
+
+    def test_parse_serialized_without_location(self):
+        collision = Collision(
+            **dict(
+                self.TEST_COLLISION_DATA,
+                latitude='NULL',
+                longitude='NULL',
+                location_easting_osgr='NULL',
+                location_northing_osgr='NULL'
+            )
+        )
+        parsed = Collision.parse(collision.serialize())
+        self.assertIsNone(parsed.latitude)
+        self.assertIsNone(parsed.location_easting_osgr)
+        self.assertEqual(parsed.accident_index, collision.accident_index)
+
+    def test_timestamp(self):
+        collision = Collision(
+            **dict(self.TEST_COLLISION_DATA, time='17:45')
+        )
+        self.assertEqual(collision.timestamp, datetime.datetime(2016, 1, 1, 17, 45))
+        self.assertEqual(collision.hour, 17)
+        self.assertEqual(collision.weekday, 4)
+
+    def test_int_accident_index_indexed(self):
+        def build():
+            return Collisions(data=[
+                Collision(**self.TEST_COLLISION_DATA),
+                Collision(**dict(self.TEST_COLLISION_DATA, accident_index=2016010000006)),
+                Collision(**dict(self.TEST_COLLISION_DATA, accident_index='2016010000007')),
+            ])
+
+        scanned = build()
+        indexed = build()
+        indexed.create_index('accident_index')
+        self.assertIs(indexed.get(2016010000005), indexed[0])
+        self.assertIs(indexed.get('2016010000007'), indexed[2])
+        self.assertIsNone(indexed.get('2016010000005'))
+        self.assertIsNone(indexed.get(2016010000007))
+        self.assertEqual(
+            indexed.lookup('accident_index', 2016010000006, '2016010000007', 5).serialize(),
+            scanned.filter(accident_index__in=[2016010000006, '2016010000007', 5]).serialize()
+        )
+        for kwargs in (
+            {'accident_index': 2016010000005},
+            {'accident_index': 2016010000005.0},
+            {'accident_index': '2016010000005'},
+            {'accident_index__in': [2016010000006, '2016010000007']},
+            {'accident_index__not_in': [2016010000006]},
+            {'accident_index__ne': '2016010000007'},
+        ):
+            expected = scanned.filter(**kwargs).serialize()
+            self.assertEqual(indexed.filter(**kwargs).serialize(), expected, kwargs)
+        self.assertEqual(len(scanned.filter(accident_index=2016010000005)), 1)
+
+
+class CollisionsFromDirTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(self.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=6
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_from_dir(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk')
+        self.assertEqual(len(collisions), 12)
+
+    def test_from_dir_year(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', year=2020)
+        self.assertEqual(len(collisions), 6)
+        self.assertEqual(
+            {c.accident_year for c in collisions},
+            {2020}
+        )
+
+        collision = collisions[4]
+        self.assertEqual(len(collision.vehicles), 2)
+        self.assertEqual(len(collision.casualties), 1)
+
+    def test_from_dir_joins_across_years(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk')
+
+        # accident_reference repeats across years, accident_index doesn't
+        for collision in collisions:
+            num = int(collision.accident_index[-7:])
+            self.assertEqual(len(collision.vehicles), num % 3 + 1)
+            self.assertEqual(len(collision.casualties), num % 2 + 1)
+
+    def test_filter_after_changes(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk')
+        self.assertEqual(len(collisions.filter(speed_limit=99)), 0)
+        collisions[0].speed_limit = 99
+        self.assertEqual(collisions.filter(speed_limit=99).serialize(), [collisions[0].serialize()])
+
+        # Changing the list passed in as data
+        data = list(collisions)
+        wrapped = Collisions(data=data)
+        first = data[0]
+        self.assertIs(wrapped.get(first.accident_index), first)
+        self.assertEqual(len(wrapped.filter(speed_limit=99)), 1)
+        data.pop(0)
+        self.assertIsNone(wrapped.get(first.accident_index))
+        self.assertIs(wrapped.get(data[3].accident_index), data[3])
+        self.assertEqual(len(wrapped.filter(speed_limit=99)), 0)
+        self.assertEqual(
+            wrapped.filter(police_force__in=[1, 2]).serialize(),
+            [c.serialize() for c in data if c.police_force in (1, 2)]
+        )
+
+        # Indexes are rebuilt on request after changing fields in place
+        data[3].accident_index = 'changed'
+        wrapped.create_index('accident_index')
+        self.assertIs(wrapped.get('changed'), data[3])
+
+    def test_iter_from_dir(self):
+        streamed = Collisions.iter_from_dir(self.dirpath, region='uk', year=range(2019, 2021))
+        self.assertFalse(isinstance(streamed, (list, Collisions)))
+        self.assertEqual(
+            [c.serialize() for c in streamed],
+            Collisions.from_dir(self.dirpath, region='uk').serialize()
+        )
+
+    def test_iter_from_dir_unsorted_source(self):
+        dirpath = os.path.join(self.dirpath, 'uk')
+        for filename in ('accident.csv', 'vehicle.csv'):
+            with open(os.path.join(dirpath, filename)) as f:
+                lines = f.readlines()
+            with open(os.path.join(dirpath, filename), 'w') as f:
+                f.writelines(lines[:1] + lines[1:][::-1])
+
+        self.assertEqual(
+            sorted(
+                [c.serialize() for c in Collisions.iter_from_dir(self.dirpath, region='uk')],
+                key=lambda c: c['accident_index']
+            ),
+            sorted(
+                Collisions.from_dir(self.dirpath, region='uk').serialize(),
+                key=lambda c: c['accident_index']
+            )
+        )
@@ -0,0 +1,232 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from road_collisions_uk.models.collision import (
+    Collision,
+    Collisions
+)
+from road_collisions_uk.models.columnar import (
+    ColumnarCollisions,
+    compact_column,
+    take_children
+)
+
+from test.data import write_sample_data
+
+
+class ColumnarCollisionsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=10
+        )
+        cls.collisions = Collisions.from_dir(cls.dirpath, region='uk')
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_same_as_objects(self):
+        self.assertIsInstance(self.columnar, ColumnarCollisions)
+        self.assertEqual(len(self.columnar), len(self.collisions))
+        self.assertEqual(self.columnar.serialize(), self.collisions.serialize())
+
+    def test_typed_columns(self):
+        self.assertEqual(self.columnar.columns['speed_limit'].dtype, np.int64)
+        self.assertEqual(self.columnar.columns['latitude'].dtype, np.float64)
+        self.assertEqual(len(self.columnar.vehicle_offsets), len(self.columnar) + 1)
+        self.assertEqual(
+            self.columnar.vehicle_offsets[-1],
+            len(self.columnar.vehicle_columns['vehicle_type'])
+        )
+
+    def test_getitem(self):
+        collision = self.columnar[6]
+        self.assertIsInstance(collision, Collision)
+        self.assertIsInstance(collision.speed_limit, int)
+        self.assertIsNone(collision.latitude)
+        self.assertIsNone(collision.location_easting_osgr)
+        self.assertEqual(len(collision.vehicles), 1)
+        self.assertEqual(len(collision.casualties), 1)
+
+        self.assertEqual(
+            self.columnar[-1].accident_index,
+            self.collisions[-1].accident_index
+        )
+        with self.assertRaises(IndexError):
+            self.columnar[len(self.columnar)]
+
+    def test_immutable(self):
+        with self.assertRaises(TypeError):
+            self.columnar.append(self.collisions[0])
+        with self.assertRaises(TypeError):
+            self.columnar.extend([self.collisions[0]])
+
+    def test_take(self):
+        subset = self.columnar.take(np.array([5, 1, 12]))
+        self.assertEqual(
+            subset.serialize(),
+            [self.collisions[i].serialize() for i in (5, 1, 12)]
+        )
+        self.assertEqual(
+            self.columnar[2:4].serialize(),
+            [c.serialize() for c in self.collisions[2:4]]
+        )
+
+    def test_from_collisions(self):
+        columnar = ColumnarCollisions.from_collisions(self.collisions)
+        self.assertEqual(columnar.serialize(), self.collisions.serialize())
+        self.assertEqual(
+            columnar.to_collisions().serialize(),
+            self.collisions.serialize()
+        )
+
+    def test_parse_many(self):
+        serialized = self.collisions.serialize()
+
+        parsed = Collisions.parse_many(serialized)
+        self.assertIsInstance(parsed[0], Collision)
+        self.assertEqual(parsed.serialize(), serialized)
+
+        columnar = Collisions.parse_many(iter(serialized), columnar=True)
+        self.assertIsInstance(columnar, ColumnarCollisions)
+        self.assertEqual(columnar.serialize(), serialized)
+        self.assertEqual(
+            columnar.vehicle_offsets.tolist(),
+            self.columnar.vehicle_offsets.tolist()
+        )
+
+    def test_from_serialized_chunks(self):
+        serialized = self.collisions.serialize()
+        columnar = ColumnarCollisions.from_serialized(serialized, chunk_size=3)
+        self.assertEqual(columnar.serialize(), serialized)
+        self.assertEqual(len(ColumnarCollisions.from_serialized([])), 0)
+
+    def test_init_from_serialized(self):
+        collision = self.collisions[0]
+        self.assertEqual(
+            Collision(**collision.serialize()).serialize(),
+            collision.serialize()
+        )
+
+    def test_compact(self):
+        compacted = self.columnar.compact()
+        self.assertEqual(compacted.serialize(), self.collisions.serialize())
+        self.assertEqual(compacted.columns['speed_limit'].dtype, np.int8)
+        self.assertEqual(compacted.vehicle_columns['vehicle_type'].dtype, np.int8)
+        self.assertEqual(compacted.columns['latitude'].dtype, np.float64)
+        self.assertLess(compacted.bytes_per_collision, self.columnar.bytes_per_collision)
+
+        makes = compacted.vehicle_columns['generic_make_model'].tolist()
+        first = makes.index(makes[0], 1)
+        self.assertIs(makes[0], makes[first])
+
+        self.assertEqual(
+            compacted.filter(speed_limit__gte=1000, police_force__lt=1000).serialize(),
+            []
+        )
+        self.assertEqual(
+            len(compacted.filter(speed_limit__in=[30, 1000])),
+            len(self.columnar.filter(speed_limit__in=[30, 1000]))
+        )
+
+    def test_compact_column(self):
+        self.assertEqual(compact_column(np.array([-1, 99])).dtype, np.int8)
+        self.assertEqual(compact_column(np.array([-1, 9999])).dtype, np.int16)
+        self.assertEqual(compact_column(np.array([0, 2 ** 40])).dtype, np.int64)
+        self.assertEqual(compact_column(np.array([], dtype=np.int64)).dtype, np.int64)
+        strings = compact_column(np.array(['a', ''.join(['a']), None], dtype=object))
+        self.assertEqual(strings.tolist(), ['a', 'a', None])
+        self.assertIs(strings[0], strings[1])
+        self.assertEqual(
+            compact_column(np.array([None, None], dtype=object)).tolist(),
+            [None, None]
+        )
+        self.assertEqual(len(compact_column(np.array([], dtype=object))), 0)
+
+    def test_compact_indexes(self):
+        indexed = self.columnar.compact()
+        indexed.create_index('accident_index', 'speed_limit', 'police_force')
+        carried = self.columnar.take(np.arange(len(self.columnar)))
+        carried.create_index('speed_limit', 'police_force')
+        carried = carried.compact()
+        self.assertEqual(indexed.columns['speed_limit'].dtype, np.int8)
+        self.assertEqual(indexed.indexes['speed_limit'].values.dtype, np.int8)
+
+        key = self.collisions[4].accident_index
+        for compacted in (indexed, carried):
+            self.assertEqual(compacted.get(key).serialize(), self.collisions[4].serialize())
+            self.assertIsNone(compacted.get(key + '0'))
+            for values in ((30,), (30, 70), (30, 1000), (1000,), (-200, 2 ** 40), (30.0, 30.5)):
+                self.assertEqual(
+                    compacted.lookup('speed_limit', *values).serialize(),
+                    self.collisions.filter(speed_limit__in=list(values)).serialize(),
+                    values
+                )
+            for kwargs in (
+                {'speed_limit': 30},
+                {'speed_limit': 1000},
+                {'speed_limit__in': [20, 1000, 2 ** 40]},
+                {'police_force__in': [2, 3], 'speed_limit__ne': 300},
+            ):
+                self.assertEqual(
+                    compacted.filter(**kwargs).serialize(),
+                    self.collisions.filter(**kwargs).serialize(),
+                    kwargs
+                )
+
+    def test_from_dir_compact(self):
+        compacted = Collisions.from_dir(self.dirpath, region='uk', columnar=True, compact=True)
+        self.assertIn('compact', compacted.load_stats.stages)
+        self.assertEqual(compacted.columns['accident_severity'].dtype, np.int8)
+
+        collisions = Collisions.from_dir(self.dirpath, region='uk', compact=True)
+        self.assertEqual(collisions.serialize(), self.collisions.serialize())
+
+    def test_take_children(self):
+        rows, offsets = take_children(
+            np.array([0, 2, 3, 6]),
+            np.array([2, 0])
+        )
+        self.assertEqual(rows.tolist(), [3, 4, 5, 0, 1])
+        self.assertEqual(offsets.tolist(), [0, 3, 5])
+
+    def test_spatial(self):
+        # Sample accident n is at 500000 + 10n, 180000 + 10n, every 7th has no location
+        # self.collisions is what from_dir returns by default, a list
+        for collisions in (self.columnar, self.collisions):
+            nearby = collisions.within_radius(500050, 180050, 15)
+            self.assertEqual(
+                [c.location_easting_osgr for c in nearby],
+                [500040, 500050] * 2
+            )
+            self.assertEqual(
+                len(collisions.within_bbox(500000, 180000, 500090, 180090)),
+                18
+            )
+            self.assertEqual(
+                [c.location_easting_osgr for c in collisions.nearest(500071, 180071, k=2)],
+                [500070, 500070]
+            )
+            self.assertEqual(
+                len(collisions.within_polygon([(499995, 179995), (500100, 179995), (499995, 180100)])),
+                10
+            )
+
+        bbox = (500000, 180000, 500090, 180090)
+        within = self.collisions.within_bbox(*bbox)
+        self.assertNotIsInstance(within, ColumnarCollisions)
+        self.assertEqual(within.serialize(), self.columnar.within_bbox(*bbox).serialize())
+        # The same objects rather than copies
+        objects = {id(c) for c in self.collisions}
+        self.assertTrue(all(id(c) in objects for c in within))
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+
+from collections import Counter, defaultdict
+from unittest import TestCase
+
+from road_collisions_uk.models.collision import Collisions
+
+from test.data import write_sample_data
+
+
+class GroupByTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=30
+        )
+        cls.collisions = Collisions.from_dir(cls.dirpath, region='uk')
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_count_and_sum(self):
+        counts = Counter()
+        sums = Counter()
+        for c in self.collisions:
+            counts[c.police_force] += 1
+            sums[c.police_force] += c.number_of_casualties
+
+        for collisions in (self.collisions, self.columnar):
+            result = collisions.groupby('police_force').agg(
+                collisions='count',
+                casualties=('number_of_casualties', 'sum'),
+                max_speed=('speed_limit', 'max'),
+                mean_latitude=('latitude', 'mean')
+            )
+            self.assertEqual(result['collisions'].to_dict(), dict(counts))
+            self.assertEqual(result['casualties'].to_dict(), dict(sums))
+            self.assertEqual(list(result.index), sorted(counts))
+            self.assertEqual(result['max_speed'].max(), 70)
+            self.assertFalse(result['mean_latitude'].isnull().any())
+
+    def test_multiple_keys(self):
+        expected = Counter(
+            (c.accident_year, c.speed_limit) for c in self.collisions
+        )
+        result = self.columnar.groupby('accident_year', 'speed_limit').count()
+        self.assertEqual(result.to_dict(), dict(expected))
+
+    def test_breakdown(self):
+        expected = defaultdict(Counter)
+        for c in self.collisions:
+            expected[c.accident_year][c.accident_severity] += 1
+
+        result = self.columnar.groupby('accident_year').breakdown('accident_severity')
+        self.assertEqual(list(result.columns), [1, 2, 3])
+        for year, row in result.iterrows():
+            self.assertEqual(row.to_dict(), dict(expected[year]))
+
+    def test_vehicle_fields(self):
+        expected = Counter()
+        accidents = defaultdict(set)
+        for c in self.collisions:
+            for v in c.vehicles:
+                expected[(v.vehicle_type, c.police_force)] += 1
+                accidents[v.vehicle_type].add(c.accident_index)
+
+        result = self.columnar.groupby('vehicle_type', 'police_force').count()
+        self.assertEqual(result.to_dict(), dict(expected))
+
+        result = self.columnar.groupby('vehicle_type').agg(
+            collisions=('accident_index', 'nunique')
+        )
+        self.assertEqual(
+            result['collisions'].to_dict(),
+            {k: len(v) for k, v in accidents.items()}
+        )
+
+    def test_casualty_fields(self):
+        expected = Counter(
+            cas.casualty_severity for c in self.collisions for cas in c.casualties
+        )
+        self.assertEqual(
+            self.columnar.groupby('casualty_severity').count().to_dict(),
+            dict(expected)
+        )
+        self.assertEqual(
+            self.columnar.groupby('police_force', level='casualty').count().sum(),
+            sum(expected.values())
+        )
+
+    def test_objects_build_only_columns_used(self):
+        for fields, kwargs in (
+            (('police_force',), {'casualties': ('number_of_casualties', 'sum')}),
+            (('vehicle_type', 'police_force'), {'collisions': ('accident_index', 'nunique')}),
+            (('casualty_severity',), {'count': 'count'}),
+            (('weekday', 'hour'), {'count': 'count'}),
+        ):
+            grouped = self.collisions.groupby(*fields)
+            self.assertEqual(
+                grouped.agg(**kwargs).to_dict(),
+                self.columnar.groupby(*fields).agg(**kwargs).to_dict(),
+                fields
+            )
+            built = {
+                name
+                for table in ('columns', 'vehicle_columns', 'casualty_columns')
+                for name in getattr(grouped.collisions, table)._columns
+            }
+            used = {f for f in fields if f not in ('weekday', 'hour')}
+            used |= {f for f, _ in [v for v in kwargs.values() if isinstance(v, tuple)]}
+            if 'hour' in fields:
+                used |= {'date', 'time'}
+            self.assertEqual(built, used, fields)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.columnar.groupby('vehicle_reference')
+        with self.assertRaises(ValueError):
+            self.columnar.groupby('vehicle_type', 'casualty_type')
+        with self.assertRaises(ValueError):
+            self.columnar.groupby('police_force').agg(x=('vehicle_type', 'sum'))
+        self.assertEqual(
+            self.columnar.groupby('casualty.vehicle_reference').count().sum(),
+            self.columnar.casualty_offsets[-1]
+        )
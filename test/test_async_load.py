@@ -0,0 +1,177 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from road_collisions_uk import async_load
+from road_collisions_uk.async_load import aload_dir
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.models.columnar import ColumnarCollisions
+
+from test.data import write_sample_data
+from test.test_utils import write_tgz
+
+
+BUCKET = 'road-collisions-uk'
+
+
+@mock_aws
+class AsyncLoadTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.dirpath, 'uk')
+        source_dir = os.path.join(self.dirpath, 'source')
+        write_sample_data(source_dir, years=(2019, 2020), per_year=10)
+
+        self.s3 = boto3.client('s3', region_name='eu-west-1')
+        self.s3.create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'}
+        )
+        for table in ('accident', 'vehicle', 'casualty'):
+            archive = os.path.join(self.dirpath, f'{table}.tgz')
+            with open(os.path.join(source_dir, f'{table}.csv'), 'rb') as f:
+                write_tgz(archive, {f'{table}.csv': f.read()})
+            self.s3.upload_file(archive, BUCKET, f'{table}.tgz')
+
+        self.expected = Collisions.from_dir(source_dir, columnar=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def aload(self, **kwargs):
+        return asyncio.run(
+            aload_dir(data_dir=self.data_dir, s3=self.s3, download=True, **kwargs)
+        )
+
+    def assertSameCollisions(self, collisions):
+        if not isinstance(collisions, ColumnarCollisions):
+            collisions = ColumnarCollisions.from_collisions(collisions)
+        self.assertEqual(collisions.serialize(), self.expected.serialize())
+
+    def test_aload(self):
+        collisions = self.aload()
+        self.assertIsInstance(collisions, Collisions)
+        self.assertSameCollisions(collisions)
+        self.assertEqual(collisions.load_stats.stages['download'].calls, 3)
+        self.assertEqual(collisions.load_stats.stages['extract'].done, 3)
+
+    def test_stats_merged_from_workers(self):
+        events = []
+        collisions = self.aload(
+            columnar=True,
+            max_workers=3,
+            progress=lambda *args: events.append(args)
+        )
+        stages = collisions.load_stats.stages
+        # 10 accidents, 19 vehicles and 15 casualties a year
+        self.assertEqual(stages['read_csv'].rows, 88)
+        self.assertEqual(stages['read_csv'].calls, 3)
+        self.assertEqual(stages['partition'].rows, 88)
+        self.assertEqual(stages['partition'].done, 3)
+        self.assertEqual(stages['extract'].done, 3)
+        self.assertIn(('read_csv', 6, 6), events)
+
+    def test_table_in_two_archives(self):
+        archive = os.path.join(self.dirpath, 'accident.tgz')
+        self.s3.upload_file(archive, BUCKET, 'accident-copy.tgz')
+        with self.assertRaises(ValueError):
+            self.aload(columnar=True)
+
+    def test_columnar_year(self):
+        collisions = self.aload(columnar=True, year=2020)
+        self.assertIsInstance(collisions, ColumnarCollisions)
+        self.assertEqual(len(collisions), 10)
+        self.assertEqual(set(collisions.columns['accident_year'].tolist()), {2020})
+
+    def test_collisions_aload(self):
+        collisions = asyncio.run(
+            Collisions.aload(data_dir=self.data_dir, s3=self.s3, download=True, columnar=True)
+        )
+        self.assertSameCollisions(collisions)
+
+    def test_second_load_downloads_nothing(self):
+        self.aload(columnar=True)
+
+        collisions = self.aload(columnar=True)
+        self.assertSameCollisions(collisions)
+        self.assertNotIn('download', collisions.load_stats.stages)
+        self.assertEqual(collisions.load_stats.stages['extract'].done, 0)
+
+    def test_offline(self):
+        self.aload(columnar=True)
+
+        with patch.object(async_load, 'download_object', side_effect=AssertionError):
+            collisions = asyncio.run(
+                aload_dir(data_dir=self.data_dir, download=False, columnar=True)
+            )
+        self.assertSameCollisions(collisions)
+
+    def test_backpressure(self):
+        processing = []
+        process_archive = async_load.process_archive
+
+        def slow_process(data_dir, path, year, stats):
+            processing.append(path)
+            time.sleep(0.05)
+            return process_archive(data_dir, path, year, stats)
+
+        with patch.object(async_load, 'process_archive', slow_process):
+            collisions = self.aload(
+                columnar=True,
+                max_downloads=3,
+                max_workers=1,
+                max_pending=1
+            )
+        self.assertSameCollisions(collisions)
+        self.assertEqual(len(processing), 3)
+
+    def test_event_loop_not_blocked(self):
+        process_archive = async_load.process_archive
+
+        def slow_process(data_dir, path, year, stats):
+            time.sleep(0.1)
+            return process_archive(data_dir, path, year, stats)
+
+        async def main():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.ensure_future(ticker())
+            try:
+                collisions = await aload_dir(
+                    data_dir=self.data_dir,
+                    s3=self.s3,
+                    download=True,
+                    columnar=True,
+                    max_workers=1
+                )
+            finally:
+                task.cancel()
+            return collisions, ticks
+
+        with patch.object(async_load, 'process_archive', slow_process):
+            collisions, ticks = asyncio.run(main())
+        self.assertSameCollisions(collisions)
+        # 0.3s of blocking work, the ticker kept running through it
+        self.assertGreater(len(ticks), 10)
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), 0.09)
+
+    def test_download_error_raised(self):
+        with self.assertRaises(ClientError):
+            asyncio.run(
+                aload_dir(data_dir=self.data_dir, s3=self.s3, download=True, bucket='missing')
+            )
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.utils import file_hash
+
+from benchmarks.generate import generate
+from benchmarks.suite import compare
+
+
+class GenerateTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_generate(self):
+        rows = generate(
+            os.path.join(self.dirpath, 'uk'),
+            1001,
+            years=(2019, 2020),
+            chunk_size=300
+        )
+        self.assertEqual(rows['accident'], 1001)
+
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        self.assertEqual(len(collisions), 1001)
+        self.assertEqual(collisions.vehicle_offsets[-1], rows['vehicle'])
+        self.assertEqual(collisions.casualty_offsets[-1], rows['casualty'])
+        self.assertEqual(
+            collisions.groupby('accident_year').count().to_dict(),
+            {2019: 501, 2020: 500}
+        )
+        self.assertEqual(
+            collisions.columns['number_of_vehicles'].tolist(),
+            [len(c.vehicles) for c in collisions]
+        )
+
+    def test_generate_deterministic(self):
+        def get_hashes(dirpath):
+            return {
+                table: file_hash(os.path.join(dirpath, f'{table}.csv'))
+                for table in ('accident', 'vehicle', 'casualty')
+            }
+
+        for name, seed in (('first', 0), ('again', 0), ('other', 1)):
+            generate(os.path.join(self.dirpath, name), 1001, years=(2019, 2020), seed=seed, chunk_size=300)
+
+        first = get_hashes(os.path.join(self.dirpath, 'first'))
+        self.assertEqual(get_hashes(os.path.join(self.dirpath, 'again')), first)
+        other = get_hashes(os.path.join(self.dirpath, 'other'))
+        for table in first:
+            self.assertNotEqual(other[table], first[table], table)
+
+
+class CompareTest(TestCase):
+
+    def test_compare(self):
+        baseline = {'filter': {'seconds': 1.0, 'peak_rss': 100, 'count': 5}}
+        self.assertEqual(
+            compare({'filter': {'seconds': 1.2, 'peak_rss': 110, 'count': 5}}, baseline),
+            []
+        )
+        self.assertEqual(
+            len(compare({'filter': {'seconds': 1.5, 'peak_rss': 200, 'count': 4}}, baseline)),
+            3
+        )
+        self.assertEqual(
+            compare({'parse': {'seconds': 9.0, 'peak_rss': 900, 'count': 1}}, baseline),
+            []
+        )
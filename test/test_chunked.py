@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+
+from collections import Counter
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.chunked import combine
+from road_collisions_uk.models.collision import Collisions
+
+from test.data import write_sample_data
+
+
+def summarise(collisions):
+    return {
+        'collisions': len(collisions),
+        'vehicles': int(collisions.vehicle_offsets[-1]),
+        'severity': collisions.groupby('accident_severity').count(),
+        'years': Counter(collisions.columns['accident_year'].tolist()),
+    }
+
+
+class ChunkedTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2018, 2019, 2020),
+            per_year=10
+        )
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_chunk_per_year(self):
+        chunks = list(Collisions.iter_chunks(self.dirpath, region='uk'))
+        self.assertEqual(
+            [set(c.columns['accident_year'].tolist()) for c in chunks],
+            [{2018}, {2019}, {2020}]
+        )
+        self.assertEqual(
+            [r for c in chunks for r in c.serialize()],
+            self.columnar.serialize()
+        )
+
+    def test_chunk_rows(self):
+        chunks = list(Collisions.iter_chunks(self.dirpath, region='uk', chunk_size=7))
+        self.assertEqual([len(c) for c in chunks], [7, 7, 7, 7, 2])
+        self.assertEqual(
+            [r for c in chunks for r in c.serialize()],
+            self.columnar.serialize()
+        )
+
+        chunks = list(Collisions.iter_chunks(self.dirpath, region='uk', chunk_size=7, year=2019))
+        self.assertEqual([len(c) for c in chunks], [7, 3])
+
+        with self.assertRaises(ValueError):
+            list(Collisions.iter_chunks(self.dirpath, region='uk', chunk_size=0))
+
+    def test_map_reduce(self):
+        expected = summarise(self.columnar)
+        for kwargs in (
+            {},
+            {'chunk_size': 4},
+            {'compact': True},
+            {'workers': 2},
+            {'workers': 2, 'chunk_size': 4},
+        ):
+            result = Collisions.map_reduce(self.dirpath, summarise, region='uk', **kwargs)
+            self.assertEqual(result['collisions'], expected['collisions'], kwargs)
+            self.assertEqual(result['vehicles'], expected['vehicles'], kwargs)
+            self.assertEqual(result['years'], expected['years'], kwargs)
+            pd.testing.assert_series_equal(
+                result['severity'],
+                expected['severity'],
+                check_index_type=False
+            )
+
+    def test_map_reduce_custom_reduce(self):
+        self.assertEqual(
+            Collisions.map_reduce(
+                self.dirpath,
+                len,
+                reduce_func=max,
+                region='uk',
+                chunk_size=12
+            ),
+            12
+        )
+        self.assertIsNone(
+            Collisions.map_reduce(self.dirpath, len, region='uk', year=1999)
+        )
+
+    def test_combine(self):
+        self.assertEqual(combine(1, 2), 3)
+        self.assertEqual(combine(None, 2), 2)
+        self.assertEqual(combine([1], [2]), [1, 2])
+        self.assertEqual(combine((1, [1]), (2, [2])), (3, [1, 2]))
+        self.assertEqual(combine({'a': 1}, {'a': 2, 'b': 3}), {'a': 3, 'b': 3})
+        self.assertEqual(combine(np.array([1, 2]), np.array([3, 4])).tolist(), [4, 6])
+        self.assertEqual(
+            combine(pd.Series({1: 2, 2: 3}), pd.Series({2: 1, 3: 1})).to_dict(),
+            {1: 2, 2: 4, 3: 1}
+        )
+        self.assertEqual(
+            combine(pd.Series({1: 2}), pd.Series({3: 1})).dtype,
+            np.int64
+        )
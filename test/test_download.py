@@ -0,0 +1,202 @@
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from unittest import TestCase
+
+import boto3
+from moto import mock_aws
+
+from road_collisions_uk import download
+from road_collisions_uk.download import (
+    download_data,
+    download_object,
+    ensure_data_downloaded,
+    get_download_record_path,
+    is_downloaded,
+    list_objects
+)
+
+
+BUCKET = 'road-collisions-uk'
+
+
+@mock_aws
+class DownloadTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.s3 = boto3.client('s3', region_name='eu-west-1')
+        self.s3.create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'}
+        )
+        self.content = {
+            'accident.tgz': os.urandom(1000),
+            'vehicle.tgz': os.urandom(3000),
+            'casualty.tgz': b'',
+        }
+        for key, body in self.content.items():
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def get_obj(self, key):
+        return [o for o in list_objects(self.s3, bucket=BUCKET) if o['Key'] == key][0]
+
+    def test_download_data(self):
+        downloaded = download_data(data_dir=self.dirpath, s3=self.s3, max_workers=2)
+        self.assertEqual(sorted(downloaded), sorted(self.content.keys()))
+
+        for key, body in self.content.items():
+            filepath = os.path.join(self.dirpath, key)
+            with open(filepath, 'rb') as f:
+                self.assertEqual(f.read(), body)
+            self.assertTrue(os.path.exists(get_download_record_path(filepath)))
+            self.assertEqual(
+                datetime.datetime.fromtimestamp(os.path.getmtime(filepath)),
+                datetime.datetime.fromtimestamp(self.get_obj(key)['LastModified'].timestamp())
+            )
+
+        self.assertEqual(download_data(data_dir=self.dirpath, s3=self.s3), [])
+        self.assertEqual(
+            [f for f in os.listdir(self.dirpath) if f.startswith('.')],
+            ['.listing.json']
+        )
+
+    def test_truncated_file_redownloaded(self):
+        download_data(data_dir=self.dirpath, s3=self.s3)
+        filepath = os.path.join(self.dirpath, 'vehicle.tgz')
+        with open(filepath, 'r+b') as f:
+            f.truncate(100)
+
+        self.assertEqual(download_data(data_dir=self.dirpath, s3=self.s3), ['vehicle.tgz'])
+        with open(filepath, 'rb') as f:
+            self.assertEqual(f.read(), self.content['vehicle.tgz'])
+
+    def test_changed_object_redownloaded(self):
+        download_data(data_dir=self.dirpath, s3=self.s3)
+        self.s3.put_object(Bucket=BUCKET, Key='accident.tgz', Body=os.urandom(1000))
+
+        self.assertEqual(download_data(data_dir=self.dirpath, s3=self.s3), ['accident.tgz'])
+
+    def test_existing_download_without_record(self):
+        filepath = os.path.join(self.dirpath, 'accident.tgz')
+        with open(filepath, 'wb') as f:
+            f.write(self.content['accident.tgz'])
+
+        self.assertTrue(is_downloaded(filepath, self.get_obj('accident.tgz')))
+        self.assertTrue(os.path.exists(get_download_record_path(filepath)))
+
+    def test_ranged_resume(self):
+        obj = self.get_obj('vehicle.tgz')
+        filepath = os.path.join(self.dirpath, 'vehicle.tgz')
+
+        calls = []
+        get_object = self.s3.get_object
+
+        def flaky_get_object(**kwargs):
+            calls.append(kwargs['Range'])
+            if len(calls) == 2:
+                raise IOError('connection dropped')
+            return get_object(**kwargs)
+
+        self.s3.get_object = flaky_get_object
+        with self.assertRaises(IOError):
+            download_object(self.s3, obj, filepath, bucket=BUCKET, chunk_size=1000, chunk_workers=1)
+        self.assertFalse(os.path.exists(filepath))
+
+        calls.clear()
+        self.s3.get_object = lambda **kwargs: calls.append(kwargs['Range']) or get_object(**kwargs)
+        download_object(self.s3, obj, filepath, bucket=BUCKET, chunk_size=1000, chunk_workers=2)
+
+        self.assertEqual(sorted(calls), ['bytes=1000-1999', 'bytes=2000-2999'])
+        with open(filepath, 'rb') as f:
+            self.assertEqual(f.read(), self.content['vehicle.tgz'])
+
+
+class RaisingS3():
+
+    def __getattr__(self, name):
+        raise AssertionError('S3 should not be used')
+
+
+@mock_aws
+class EnsureDataDownloadedTest(TestCase):
+
+    def setUp(self):
+        download._ensured.clear()
+        self.dirpath = tempfile.mkdtemp()
+        self.s3 = boto3.client('s3', region_name='eu-west-1')
+        self.s3.create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'}
+        )
+        self.s3.put_object(Bucket=BUCKET, Key='accident.tgz', Body=b'abc')
+
+    def tearDown(self):
+        download._ensured.clear()
+        shutil.rmtree(self.dirpath)
+
+    def test_cached_listing_used(self):
+        self.assertEqual(
+            ensure_data_downloaded(data_dir=self.dirpath, s3=self.s3, offline=False),
+            ['accident.tgz']
+        )
+
+        download._ensured.clear()
+        self.assertEqual(
+            ensure_data_downloaded(data_dir=self.dirpath, s3=RaisingS3(), offline=False),
+            []
+        )
+
+    def test_expired_listing_relisted(self):
+        ensure_data_downloaded(data_dir=self.dirpath, s3=self.s3, offline=False)
+        self.s3.put_object(Bucket=BUCKET, Key='vehicle.tgz', Body=b'def')
+
+        download._ensured.clear()
+        self.assertEqual(
+            ensure_data_downloaded(data_dir=self.dirpath, s3=self.s3, offline=False, ttl=-1),
+            ['vehicle.tgz']
+        )
+
+    def test_missing_file_relisted(self):
+        ensure_data_downloaded(data_dir=self.dirpath, s3=self.s3, offline=False)
+        os.remove(os.path.join(self.dirpath, 'accident.tgz'))
+
+        download._ensured.clear()
+        self.assertEqual(
+            ensure_data_downloaded(data_dir=self.dirpath, s3=self.s3, offline=False),
+            ['accident.tgz']
+        )
+
+    def test_offline(self):
+        self.assertEqual(
+            ensure_data_downloaded(data_dir=self.dirpath, s3=RaisingS3(), offline=True),
+            []
+        )
+        self.assertEqual(os.listdir(self.dirpath), [])
+
+
+class ImportTest(TestCase):
+
+    # Generous to not be flaky on slow CI, a network sync takes seconds
+    IMPORT_BUDGET = 0.5
+
+    def test_cold_import(self):
+        script = (
+            'import sys, time\n'
+            'start = time.perf_counter()\n'
+            'import road_collisions_uk\n'
+            'print(time.perf_counter() - start)\n'
+            'print("boto3" in sys.modules)\n'
+        )
+        output = subprocess.check_output([sys.executable, '-c', script]).decode()
+        elapsed, boto3_imported = output.split()
+
+        self.assertLess(float(elapsed), self.IMPORT_BUDGET)
+        self.assertEqual(boto3_imported, 'False')
@@ -0,0 +1,104 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from road_collisions_uk import export
+from road_collisions_uk.models.collision import Collisions
+
+from test.data import write_sample_data
+
+
+class ExportTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=15
+        )
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+        cls.collisions = cls.columnar.to_collisions()
+        cls.expected = cls.collisions.serialize()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_ndjson(self):
+        path = os.path.join(self.dirpath, 'collisions.ndjson')
+        self.assertEqual(self.columnar.to_ndjson(path), 30)
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+        loaded = Collisions.from_ndjson(path)
+        self.assertEqual(loaded.serialize(), self.expected)
+        self.assertEqual(
+            loaded.filter(speed_limit__gte=40).serialize(),
+            self.columnar.filter(speed_limit__gte=40).serialize()
+        )
+
+    def test_ndjson_from_objects_gzip_and_chunks(self):
+        path = os.path.join(self.dirpath, 'collisions.ndjson.gz')
+        self.collisions.to_ndjson(path)
+        with gzip.open(path) as f:
+            self.assertEqual(len(f.read().splitlines()), 30)
+
+        self.assertEqual(
+            export.read_ndjson(path, chunk_size=7).serialize(),
+            self.expected
+        )
+
+        buf = io.BytesIO()
+        export.write_ndjson(self.columnar, buf, chunk_size=4)
+        buf.seek(0)
+        self.assertEqual(export.read_ndjson(buf).serialize(), self.expected)
+
+    def test_empty(self):
+        buf = io.BytesIO()
+        self.assertEqual(export.write_ndjson(self.columnar.take([]), buf), 0)
+        buf.seek(0)
+        self.assertEqual(len(export.read_ndjson(buf)), 0)
+
+        dirpath = os.path.join(self.dirpath, 'empty')
+        export.write_tables(self.columnar.take([]), dirpath)
+        self.assertEqual(len(export.read_tables(dirpath)), 0)
+
+    def test_tables(self):
+        for fmt in ('parquet', 'arrow'):
+            dirpath = os.path.join(self.dirpath, fmt)
+            export.write_tables(self.columnar, dirpath, fmt=fmt, chunk_size=8)
+            self.assertEqual(
+                sorted(os.listdir(dirpath)),
+                sorted(f'{t}.{fmt}' for t in ('casualty', 'collision', 'vehicle'))
+            )
+
+            loaded = export.read_tables(dirpath, fmt=fmt)
+            self.assertEqual(loaded.serialize(), self.expected)
+
+        with self.assertRaises(ValueError):
+            export.write_tables(self.columnar, self.dirpath, fmt='csv')
+
+    def test_collisions_methods(self):
+        dirpath = os.path.join(self.dirpath, 'objects')
+        self.collisions.to_parquet(dirpath)
+        self.assertEqual(Collisions.from_parquet(dirpath).serialize(), self.expected)
+        self.collisions.to_arrow(dirpath)
+        self.assertEqual(Collisions.from_arrow(dirpath).serialize(), self.expected)
+
+        import pyarrow.parquet
+        vehicles = pyarrow.parquet.read_table(os.path.join(dirpath, 'vehicle.parquet'))
+        self.assertEqual(
+            vehicles.column('accident_index').to_pylist(),
+            [c['accident_index'] for c in self.expected for _ in c['vehicles']]
+        )
+        collisions = pyarrow.parquet.read_table(os.path.join(dirpath, 'collision.parquet'))
+        self.assertEqual(collisions.column('latitude').null_count, 4)
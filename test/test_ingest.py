@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from road_collisions_uk.ingest import read_table
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.models.columnar import ColumnarCollisions
+
+from test.data import write_sample_data
+
+
+class IngestTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.accidents, self.vehicles, self.casualties = write_sample_data(
+            self.dirpath,
+            years=(2020,),
+            per_year=14
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_typed_columns(self):
+        for engine in ('c', 'pyarrow'):
+            columns = read_table(
+                [os.path.join(self.dirpath, 'accident.csv')],
+                'accident',
+                engine=engine
+            )
+            self.assertEqual(columns['speed_limit'].dtype, np.int64)
+            self.assertEqual(columns['date'].dtype, object)
+            self.assertIsInstance(columns['date'][0], str)
+            self.assertEqual(columns['latitude'].dtype, np.float64)
+            self.assertTrue(np.isnan(columns['latitude'][6]))
+            self.assertEqual(columns['latitude'][5], 51.505)
+            self.assertNotIn('day_of_week', columns)
+
+    def test_same_as_records(self):
+        dict_rows = [
+            [{k: str(v) for k, v in row.items()} for row in rows]
+            for rows in (self.accidents, self.vehicles, self.casualties)
+        ]
+        expected = ColumnarCollisions.from_records(*dict_rows).serialize()
+
+        for engine in ('c', 'pyarrow'):
+            columnar = ColumnarCollisions.from_columns(
+                *[
+                    read_table(
+                        [os.path.join(self.dirpath, f'{table}.csv')],
+                        table,
+                        engine=engine
+                    ) for table in ('accident', 'vehicle', 'casualty')
+                ]
+            )
+            self.assertEqual(columnar.serialize(), expected)
+
+    def test_empty(self):
+        columns = read_table([], 'vehicle')
+        self.assertEqual(len(columns['vehicle_type']), 0)
+        self.assertEqual(len(Collisions.from_dir(self.dirpath, year=1999)), 0)
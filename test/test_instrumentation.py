@@ -0,0 +1,169 @@
+import os
+import shutil
+import sys
+import tempfile
+
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+from road_collisions_uk.instrumentation import (
+    LoadStats,
+    get_peak_rss,
+    tqdm_progress
+)
+from road_collisions_uk.models.collision import Collisions
+
+from test.data import write_sample_data
+
+try:
+    import tqdm
+except ImportError:
+    tqdm = None
+
+
+class LoadStatsTest(TestCase):
+
+    def test_stage(self):
+        events = []
+        stats = LoadStats(progress=lambda *args: events.append(args))
+
+        with stats.stage('read_csv', total=2) as stage:
+            stage.add_rows(10)
+            stage.update()
+        with stats.stage('read_csv') as stage:
+            stage.add_rows(5)
+            stage.update()
+        stats.finish()
+
+        stage = stats.stages['read_csv']
+        self.assertEqual(stage.rows, 15)
+        self.assertEqual(stage.calls, 2)
+        self.assertGreater(stage.seconds, 0)
+        self.assertGreater(stage.rows_per_second, 0)
+        self.assertGreaterEqual(stage.peak_rss_delta, 0)
+        self.assertEqual(
+            events,
+            [
+                ('read_csv', 0, 2),
+                ('read_csv', 1, 2),
+                ('read_csv', 1, 2),
+                ('read_csv', 1, 2),
+                ('read_csv', 2, 2),
+                ('read_csv', 2, 2),
+            ]
+        )
+        self.assertEqual(stats.serialize()['stages']['read_csv']['rows'], 15)
+
+    def test_merge(self):
+        stats = LoadStats()
+        other = LoadStats()
+        with other.stage('join') as stage:
+            stage.add_rows(3)
+        stats.merge(other)
+        stats.merge(other)
+        self.assertEqual(stats.stages['join'].rows, 6)
+        self.assertEqual(stats.stages['join'].calls, 2)
+        self.assertEqual(stats.stages['join'].peak_rss_delta, other.stages['join'].peak_rss_delta)
+
+    def test_peak_rss_delta(self):
+        stats = LoadStats()
+        with stats.stage('join'):
+            pass
+        # What the stage added to the peak, not the process' peak so far
+        self.assertLess(stats.stages['join'].peak_rss_delta, 2 ** 20)
+        self.assertGreater(get_peak_rss(), 2 ** 20)
+
+    def test_no_resource_module(self):
+        with patch.dict(sys.modules, {'resource': None}):
+            self.assertIsNone(get_peak_rss())
+            stats = LoadStats()
+            with stats.stage('join'):
+                pass
+            stats.finish()
+            stats.log()
+        self.assertIsNone(stats.stages['join'].peak_rss_delta)
+        self.assertIsNone(stats.peak_rss)
+
+    @skipIf(tqdm is None, 'tqdm not installed')
+    def test_tqdm_progress(self):
+        progress = tqdm_progress(disable=True)
+        progress('read_csv', 0, 3)
+        progress('read_csv', 3, 3)
+
+
+class FromDirStatsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=10
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_from_dir(self):
+        events = []
+        collisions = Collisions.from_dir(
+            self.dirpath,
+            region='uk',
+            progress=lambda *args: events.append(args)
+        )
+        stats = collisions.load_stats
+
+        self.assertEqual(
+            list(stats.stages),
+            ['extract', 'partition', 'read_csv', 'join', 'index', 'construct']
+        )
+        # 10 accidents, 19 vehicles and 15 casualties a year
+        self.assertEqual(stats.stages['read_csv'].rows, 88)
+        self.assertEqual(stats.stages['read_csv'].total, 6)
+        self.assertGreater(stats.stages['read_csv'].bytes, 0)
+        self.assertEqual(stats.stages['join'].rows, 88)
+        self.assertEqual(stats.stages['construct'].rows, 20)
+        self.assertEqual(stats.stages['construct'].done, 20)
+        self.assertGreater(stats.peak_rss, 0)
+        self.assertGreaterEqual(
+            stats.total_seconds,
+            sum(s.seconds for s in stats.stages.values())
+        )
+
+        self.assertIn(('read_csv', 6, 6), events)
+        self.assertEqual(events[-1], ('construct', 20, 20))
+
+    def test_columnar_skips_construct(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        self.assertNotIn('construct', collisions.load_stats.stages)
+
+    def test_workers(self):
+        collisions = Collisions.from_dir(
+            self.dirpath,
+            region='uk',
+            columnar=True,
+            workers=2
+        )
+        stages = collisions.load_stats.stages
+        # A task per table per year
+        self.assertEqual(stages['load_partitions'].rows, 88)
+        self.assertEqual(stages['load_partitions'].done, 6)
+        self.assertEqual(stages['read_csv'].rows, 88)
+        self.assertEqual(stages['read_csv'].calls, 6)
+        self.assertEqual(stages['join'].rows, 88)
+
+    def test_partition_rows(self):
+        dirpath = tempfile.mkdtemp()
+        try:
+            write_sample_data(os.path.join(dirpath, 'uk'), years=(2019, 2020), per_year=10)
+            stages = Collisions.from_dir(dirpath, region='uk', columnar=True).load_stats.stages
+            self.assertEqual(stages['partition'].rows, 88)
+            self.assertEqual(stages['partition'].done, 3)
+
+            # Already partitioned
+            stages = Collisions.from_dir(dirpath, region='uk', columnar=True).load_stats.stages
+            self.assertEqual(stages['partition'].rows, 0)
+        finally:
+            shutil.rmtree(dirpath)
@@ -0,0 +1,180 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from road_collisions_uk.labels import (
+    LABELS,
+    MISSING_LABEL,
+    decode,
+    decode_column,
+    get_lookup_table,
+    to_categorical
+)
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.models.columnar import ColumnarCollisions
+from road_collisions_uk.models.schema import (
+    CASUALTY_SCHEMA,
+    COLLISION_SCHEMA,
+    VEHICLE_SCHEMA
+)
+
+from test.data import write_sample_data
+
+
+class LabelsTest(TestCase):
+
+    def test_coded_fields_exist(self):
+        fields = set(COLLISION_SCHEMA) | set(VEHICLE_SCHEMA) | set(CASUALTY_SCHEMA)
+        self.assertEqual(set(LABELS) - fields, set())
+
+    def test_decode(self):
+        self.assertEqual(decode('weather_conditions', 2), 'Raining no high winds')
+        self.assertEqual(decode('vehicle_type', -1), MISSING_LABEL)
+        self.assertIsNone(decode('vehicle_type', 6))
+        self.assertIsNone(decode('vehicle_type', 1000))
+        self.assertIsNone(decode('vehicle_type', None))
+        with self.assertRaises(ValueError):
+            decode('speed_limit', 30)
+
+    def test_decode_column(self):
+        labels = decode_column('accident_severity', np.array([3, 1, -1, 7, -5]))
+        self.assertEqual(
+            labels.tolist(),
+            ['Slight', 'Fatal', MISSING_LABEL, None, None]
+        )
+        # Interned, every decoded label is the same object
+        self.assertIs(labels[0], decode_column('accident_severity', np.array([3]))[0])
+
+    def test_decode_float_column(self):
+        labels = decode_column('accident_severity', np.array([1.0, np.nan]))
+        self.assertEqual(labels.tolist(), ['Fatal', MISSING_LABEL])
+
+    def test_categorical(self):
+        categorical = to_categorical('casualty_severity', np.array([2, 2, 3, 6]))
+        self.assertEqual(
+            list(categorical.categories),
+            [MISSING_LABEL, 'Fatal', 'Serious', 'Slight']
+        )
+        self.assertEqual(categorical[:3].tolist(), ['Serious', 'Serious', 'Slight'])
+        self.assertTrue(pd.isna(categorical[3]))
+
+    def test_lookup_table_shared_labels(self):
+        table = get_lookup_table('vehicle_direction_from')
+        self.assertEqual(table[9], 'unknown (self reported)')
+        self.assertIs(table, get_lookup_table('vehicle_direction_from'))
+
+
+class CollisionLabelsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=10
+        )
+        cls.collisions = Collisions.from_dir(cls.dirpath, region='uk')
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_get_label(self):
+        collision = self.collisions[0]
+        self.assertEqual(
+            collision.get_label('weather_conditions'),
+            decode('weather_conditions', collision.weather_conditions)
+        )
+        vehicle = collision.vehicles[0]
+        self.assertEqual(
+            vehicle.get_label('vehicle_type'),
+            decode('vehicle_type', vehicle.vehicle_type)
+        )
+        casualty = collision.casualties[0]
+        self.assertEqual(
+            casualty.get_label('casualty_severity'),
+            decode('casualty_severity', casualty.casualty_severity)
+        )
+
+    def test_decode_same_as_objects(self):
+        for collisions in (self.collisions, self.columnar):
+            self.assertEqual(
+                collisions.decode('accident_severity').tolist(),
+                [c.get_label('accident_severity') for c in self.collisions]
+            )
+            self.assertEqual(
+                collisions.decode('vehicle_type').tolist(),
+                [v.get_label('vehicle_type') for c in self.collisions for v in c.vehicles]
+            )
+
+    def test_to_dataframe(self):
+        df = self.columnar.to_dataframe()
+        self.assertEqual(len(df), len(self.columnar))
+        self.assertEqual(df['accident_severity'].dtype, np.int64)
+
+        df = self.columnar.to_dataframe(labels=True)
+        self.assertIsInstance(df['accident_severity'].dtype, pd.CategoricalDtype)
+        self.assertEqual(
+            df['accident_severity'].astype(object).tolist(),
+            self.columnar.decode('accident_severity').tolist()
+        )
+        self.assertEqual(df['accident_index'].tolist(), self.columnar.columns['accident_index'].tolist())
+
+    def built_columns(self, func):
+        views = []
+        over_collisions = ColumnarCollisions.over_collisions
+
+        def capture(collisions):
+            views.append(over_collisions(collisions))
+            return views[-1]
+
+        with patch.object(ColumnarCollisions, 'over_collisions', capture):
+            result = func()
+        return result, {
+            (table, name)
+            for view in views
+            for table in ('columns', 'vehicle_columns', 'casualty_columns')
+            for name in getattr(view, table)._columns
+        }
+
+    def test_objects_build_only_columns_used(self):
+        labels, built = self.built_columns(lambda: self.collisions.decode('weather_conditions'))
+        self.assertEqual(labels.tolist(), self.columnar.decode('weather_conditions').tolist())
+        self.assertEqual(built, {('columns', 'weather_conditions')})
+
+        labels, built = self.built_columns(lambda: self.collisions.decode('casualty_severity'))
+        self.assertEqual(labels.tolist(), self.columnar.decode('casualty_severity').tolist())
+        self.assertEqual(built, {('casualty_columns', 'casualty_severity')})
+
+        for table in ('collision', 'vehicle', 'casualty'):
+            df, built = self.built_columns(
+                lambda: self.collisions.to_dataframe(table, labels=True)
+            )
+            self.assertTrue(df.equals(self.columnar.to_dataframe(table, labels=True)), table)
+            self.assertEqual(
+                {t for t, _ in built} - {'columns'},
+                set() if table == 'collision' else {f'{table}_columns'}
+            )
+            if table != 'collision':
+                self.assertIn(('columns', 'accident_index'), built)
+                self.assertNotIn(('columns', 'speed_limit'), built)
+
+    def test_to_dataframe_children(self):
+        vehicles = self.collisions.to_dataframe('vehicle', labels=True)
+        self.assertEqual(len(vehicles), sum(len(c.vehicles) for c in self.collisions))
+        self.assertEqual(
+            vehicles['accident_index'].tolist(),
+            [c.accident_index for c in self.collisions for _ in c.vehicles]
+        )
+        self.assertIsInstance(vehicles['vehicle_type'].dtype, pd.CategoricalDtype)
+
+        with self.assertRaises(ValueError):
+            self.columnar.to_dataframe('driver')
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.models.columnar import ColumnarCollisions
+
+from test.data import write_sample_data
+
+
+class ParallelLoadTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(self.dirpath, 'uk'),
+            years=(2018, 2019, 2020),
+            per_year=8
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_same_as_serial(self):
+        serial = Collisions.from_dir(self.dirpath, region='uk')
+
+        parallel = Collisions.from_dir(self.dirpath, region='uk', workers=2)
+        self.assertNotIsInstance(parallel, ColumnarCollisions)
+        self.assertEqual(parallel.serialize(), serial.serialize())
+
+        parallel = Collisions.from_dir(
+            self.dirpath,
+            region='uk',
+            year=[2018, 2020],
+            columnar=True,
+            workers=2
+        )
+        self.assertIsInstance(parallel, ColumnarCollisions)
+        self.assertEqual(
+            parallel.serialize(),
+            [c.serialize() for c in serial if c.accident_year != 2019]
+        )
+
+    def test_single_year_split_by_table(self):
+        serial = Collisions.from_dir(self.dirpath, region='uk', year=2019, columnar=True)
+        parallel = Collisions.from_dir(
+            self.dirpath,
+            region='uk',
+            year=2019,
+            columnar=True,
+            workers=3
+        )
+        self.assertEqual(parallel.serialize(), serial.serialize())
+        self.assertEqual(parallel.load_stats.stages['load_partitions'].done, 3)
+
+    def test_concat(self):
+        columnar = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        self.assertEqual(
+            ColumnarCollisions.concat(
+                [columnar[:5], columnar[5:6], columnar[6:]]
+            ).serialize(),
+            columnar.serialize()
+        )
+        self.assertEqual(len(ColumnarCollisions.concat([])), 0)
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from road_collisions_uk.partitions import (
+    ensure_partitioned,
+    get_partition_paths,
+    get_partition_years,
+    get_years,
+    is_partitioned
+)
+
+from test.data import write_sample_data
+
+
+class PartitionsTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        write_sample_data(self.dirpath, years=(2018, 2019, 2020), per_year=5)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_get_years(self):
+        self.assertIsNone(get_years(None))
+        self.assertEqual(get_years(2020), [2020])
+        self.assertEqual(get_years(range(2018, 2021)), [2018, 2019, 2020])
+        self.assertEqual(get_years([2020, 2018, 2020]), [2018, 2020])
+
+    def test_partitioned_by_year(self):
+        ensure_partitioned(self.dirpath)
+
+        for table in ('accident', 'casualty', 'vehicle'):
+            self.assertTrue(is_partitioned(self.dirpath, table))
+            self.assertEqual(
+                get_partition_years(self.dirpath, table),
+                [2018, 2019, 2020]
+            )
+
+        paths = get_partition_paths(self.dirpath, 'accident', year=2019)
+        self.assertEqual(
+            [os.path.basename(p) for p in paths],
+            ['2019.csv']
+        )
+        with open(paths[0]) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith('accident_index,accident_year'))
+        self.assertTrue(all(line.startswith('2019') for line in lines[1:]))
+
+    def test_year_range(self):
+        ensure_partitioned(self.dirpath)
+
+        self.assertEqual(
+            [
+                os.path.basename(p) for p in get_partition_paths(
+                    self.dirpath,
+                    'vehicle',
+                    year=range(2019, 2025)
+                )
+            ],
+            ['2019.csv', '2020.csv']
+        )
+        self.assertEqual(
+            get_partition_paths(self.dirpath, 'vehicle', year=1990),
+            []
+        )
+
+    def test_changed_source_repartitioned(self):
+        ensure_partitioned(self.dirpath)
+        write_sample_data(self.dirpath, years=(2021,), per_year=5)
+
+        self.assertFalse(is_partitioned(self.dirpath, 'accident'))
+        ensure_partitioned(self.dirpath)
+        self.assertEqual(
+            get_partition_years(self.dirpath, 'accident'),
+            [2021]
+        )
@@ -0,0 +1,224 @@
+import datetime
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.query import (
+    KEY_INDEXES,
+    InvertedIndex,
+    column_mask,
+    parse_lookup,
+    parse_lookups,
+    record_matches
+)
+
+from test.data import write_sample_data
+
+
+class QueryTest(TestCase):
+
+    FILTERS = [
+        {'speed_limit': 30},
+        {'speed_limit__gte': 40},
+        {'speed_limit__range': (30, 60), 'police_force__ne': 1},
+        {'police_force__in': [1, 3]},
+        {'accident_severity__not_in': {2}},
+        {'latitude__isnull': True},
+        {'latitude__gt': 51.505},
+        {'date': '05/05/2020'},
+        {'date__range': ('01/03/2019', datetime.date(2019, 8, 1))},
+        {'date__lt': '2020-02-01'},
+        {'lsoa_of_accident_location__in': ['E01000001', 'E01000003']},
+        {'geo': [None, None]},
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=20
+        )
+        cls.collisions = Collisions.from_dir(cls.dirpath, region='uk')
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_parse_lookup(self):
+        self.assertEqual(parse_lookup('speed_limit'), ('speed_limit', 'exact'))
+        self.assertEqual(parse_lookup('speed_limit__in'), ('speed_limit', 'in'))
+        self.assertEqual(parse_lookup('a__b'), ('a__b', 'exact'))
+
+    def test_plain_filter_unchanged(self):
+        filtered = self.collisions.filter(speed_limit=30, police_force=2)
+        self.assertEqual(
+            [c.accident_index for c in filtered],
+            [
+                c.accident_index for c in self.collisions
+                if c.speed_limit == 30 and c.police_force == 2
+            ]
+        )
+
+    def test_columnar_matches_objects(self):
+        for kwargs in self.FILTERS:
+            expected = self.collisions.filter(**kwargs).serialize()
+            self.assertEqual(self.columnar.filter(**kwargs).serialize(), expected, kwargs)
+            self.assertTrue(len(expected) > 0, kwargs)
+
+    INEXACT_FILTERS = [
+        {'police_force': 1.5},
+        {'police_force': 2.0},
+        {'police_force': 300},
+        {'police_force': 2 ** 70},
+        {'police_force__ne': 1.5},
+        {'police_force__in': [1, 2, 300]},
+        {'police_force__in': [1.5, 2]},
+        {'police_force__not_in': [1, 300]},
+        {'accident_severity': '1'},
+        {'lsoa_of_accident_location': None},
+        {'lsoa_of_accident_location__ne': None},
+        {'lsoa_of_accident_location__in': ['E01000001', 1]},
+    ]
+
+    def filter_objects(self, kwargs):
+        lookups = parse_lookups(kwargs)
+        return [c.serialize() for c in self.collisions if record_matches(c, lookups)]
+
+    def test_objects_filter_matches_record_matches(self):
+        for kwargs in self.FILTERS + self.INEXACT_FILTERS:
+            self.assertEqual(
+                self.collisions.filter(**kwargs).serialize(),
+                self.filter_objects(kwargs),
+                kwargs
+            )
+
+    def test_inexact_values(self):
+        indexed = self.columnar[:]
+        indexed.create_index('police_force', 'accident_severity', 'lsoa_of_accident_location')
+        compact = self.columnar.compact()
+        self.assertEqual(compact.columns['police_force'].dtype, np.int8)
+        compact_indexed = self.columnar.compact()
+        compact_indexed.create_index('police_force', 'accident_severity', 'lsoa_of_accident_location')
+
+        for kwargs in self.INEXACT_FILTERS:
+            expected = self.filter_objects(kwargs)
+            for collisions in (self.columnar, indexed, compact, compact_indexed):
+                self.assertEqual(collisions.filter(**kwargs).serialize(), expected, kwargs)
+
+        self.assertEqual(len(indexed.filter(police_force=1.5)), 0)
+        self.assertEqual(
+            len(compact_indexed.filter(police_force__in=[1, 2, 300])),
+            len(self.collisions.filter(police_force__in=[1, 2]))
+        )
+
+    def test_indexed_matches_unindexed(self):
+        columnar = self.columnar[:]
+        columnar.create_index('speed_limit', 'police_force', 'accident_severity')
+        for kwargs in self.FILTERS:
+            self.assertEqual(
+                columnar.mask(**kwargs).tolist(),
+                self.columnar.mask(**kwargs).tolist(),
+                kwargs
+            )
+
+    def test_get(self):
+        collision = self.collisions[7]
+        for collisions in (self.collisions, self.columnar):
+            self.assertEqual(
+                collisions.get(collision.accident_index).serialize(),
+                collision.serialize()
+            )
+            self.assertIsNone(collisions.get('missing'))
+            self.assertEqual(collisions.get('missing', 1), 1)
+        self.assertEqual(collision.id, collision.accident_index)
+
+    def test_lookup(self):
+        district = self.collisions[0].local_authority_ons_district
+        lsoas = ['E01000001', 'E01000003', 'missing']
+        for collisions in (self.collisions, self.columnar):
+            self.assertEqual(
+                collisions.lookup('local_authority_ons_district', district).serialize(),
+                self.filter_objects({'local_authority_ons_district': district})
+            )
+            self.assertEqual(
+                collisions.lookup('lsoa_of_accident_location', *lsoas).serialize(),
+                self.filter_objects({'lsoa_of_accident_location__in': lsoas})
+            )
+            self.assertEqual(
+                collisions.lookup('speed_limit', 30, 30.5, 2 ** 40).serialize(),
+                self.filter_objects({'speed_limit': 30})
+            )
+            self.assertEqual(len(collisions.lookup('lsoa_of_accident_location', 'missing')), 0)
+        self.assertIsInstance(self.collisions.lookup('speed_limit', 30), Collisions)
+
+    def test_key_indexes_built_on_load(self):
+        for collisions in (self.collisions, self.columnar):
+            self.assertEqual(set(collisions.indexes), set(KEY_INDEXES))
+        self.assertEqual(
+            Collisions.from_dir(self.dirpath, region='uk', indexes=()).indexes,
+            {}
+        )
+
+        collisions = Collisions.from_dir(self.dirpath, region='uk')
+        index = collisions.indexes['accident_index']
+        self.assertIs(collisions.get_index('accident_index'), index)
+        collisions.create_index('police_force')
+        for kwargs in self.FILTERS:
+            self.assertEqual(
+                collisions.filter(**kwargs).serialize(),
+                self.filter_objects(kwargs),
+                kwargs
+            )
+
+        # Changing the collection drops the indexes rather than leaving
+        # them pointing at the wrong rows
+        collisions.append(self.collisions[0])
+        self.assertEqual(collisions.indexes, {})
+        self.assertEqual(len(collisions.lookup('accident_index', self.collisions[0].id)), 2)
+
+    def test_inverted_index(self):
+        index = InvertedIndex(np.array([3, 1, 3, 2, 1]))
+        self.assertEqual(len(index), 3)
+        self.assertEqual(sorted(index.lookup([3]).tolist()), [0, 2])
+        self.assertEqual(sorted(index.lookup([1, 2, 9]).tolist()), [1, 3, 4])
+        self.assertEqual(index.lookup([9]).tolist(), [])
+        self.assertEqual(index.get_positions(1).tolist(), [1, 4])
+        self.assertEqual(index.get_positions(0).tolist(), [])
+        self.assertEqual(index.get_positions(9).tolist(), [])
+        self.assertEqual(
+            index.mask('ne', 3).tolist(),
+            [False, True, False, True, True]
+        )
+
+    def test_inverted_index_inexact(self):
+        index = InvertedIndex(np.array([3, 1, 3, 2, 1], dtype=np.int8))
+        self.assertEqual(index.lookup([1.5, 300, -1000, 'a', None]).tolist(), [])
+        self.assertEqual(sorted(index.lookup([3.0, 259]).tolist()), [0, 2])
+        self.assertEqual(index.get_positions(2.5).tolist(), [])
+        self.assertEqual(index.get_positions(np.int64(258)).tolist(), [])
+
+    def test_in_mixed_object_column(self):
+        column = np.array([5, 'a', 6, None], dtype=object)
+        self.assertEqual(
+            column_mask(column, 'in', [6, 'a']).tolist(),
+            [False, True, True, False]
+        )
+        self.assertEqual(
+            column_mask(column, 'not_in', [5.0]).tolist(),
+            [False, True, True, True]
+        )
+
+    def test_inverted_index_missing_strings(self):
+        index = InvertedIndex(np.array(['b', None, 'a', None], dtype=object))
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.lookup(['a', 'b']).tolist(), [2, 0])
+        self.assertEqual(index.lookup([None, 1]).tolist(), [])
+        self.assertEqual(index.mask('ne', 'a').tolist(), [True, True, False, True])
@@ -0,0 +1,131 @@
+import os
+import pickle
+import shutil
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from unittest import (
+    TestCase,
+    skipUnless
+)
+
+import numpy as np
+
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.shared import (
+    attach,
+    publish
+)
+
+from test.data import write_sample_data
+
+
+def summarise(collisions):
+    return (
+        len(collisions),
+        int(collisions.columns['speed_limit'].sum()),
+        int(collisions.vehicle_offsets[-1]),
+        isinstance(collisions.columns['speed_limit'].base, np.memmap),
+    )
+
+
+def get_private_memory():
+    '''
+    Anonymous (not file or shared memory backed) RSS of this process
+    '''
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1]) * 1024
+
+
+def string_column_growth(path):
+    '''
+    Attach in a worker and scan every string column, returning how much
+    the worker's private memory grew
+    '''
+    before = get_private_memory()
+    collisions = attach(path)
+    for columns in (collisions.columns, collisions.vehicle_columns, collisions.casualty_columns):
+        for column in columns.values():
+            if column.dtype.kind in 'SO':
+                int((column == b'missing').sum())
+    return get_private_memory() - before
+
+
+class SharedCollisionsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=10
+        )
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_publish_attach(self):
+        with publish(self.columnar, dirpath=self.dirpath) as shared:
+            attached = attach(shared.path)
+            self.assertIs(attached, shared.attach())
+            self.assertEqual(attached.serialize(), self.columnar.serialize())
+            self.assertIsInstance(attached.columns['speed_limit'], np.memmap)
+            with self.assertRaises(ValueError):
+                attached.columns['speed_limit'][0] = 1
+
+            handle = pickle.loads(pickle.dumps(shared))
+            self.assertEqual(handle.path, shared.path)
+            self.assertFalse(handle.owner)
+            self.assertLess(len(pickle.dumps(shared)), 1000)
+
+        self.assertFalse(os.path.exists(shared.path))
+
+    def test_share_objects(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', year=2020)
+        with collisions.share(dirpath=self.dirpath) as shared:
+            self.assertEqual(shared.attach().serialize(), collisions.serialize())
+
+    def test_map(self):
+        with self.columnar.share() as shared:
+            results = shared.map(summarise, chunk_size=6, workers=2)
+
+        self.assertEqual([r[0] for r in results], [6, 6, 6, 2])
+        self.assertEqual(
+            sum(r[1] for r in results),
+            int(self.columnar.columns['speed_limit'].sum())
+        )
+        self.assertEqual(sum(r[2] for r in results), self.columnar.vehicle_offsets[-1])
+        self.assertTrue(all(r[3] for r in results))
+
+    def test_string_columns_shared(self):
+        with publish(self.columnar, dirpath=self.dirpath) as shared:
+            attached = shared.attach()
+            for name in ('accident_index', 'date', 'local_authority_ons_district'):
+                self.assertIsInstance(attached.columns[name], np.memmap)
+                self.assertEqual(attached.columns[name].dtype.kind, 'S')
+            self.assertEqual(attached.vehicle_columns['generic_make_model'].dtype.kind, 'S')
+            self.assertIsInstance(attached[0].accident_index, str)
+
+    @skipUnless(os.path.exists('/proc/self/status'), 'needs /proc/self/status')
+    def test_worker_memory_flat_in_rows(self):
+        growth = {}
+        for rows in (1000, 100000):
+            collisions = self.columnar.take(np.tile(np.arange(len(self.columnar)), rows // len(self.columnar)))
+            with publish(collisions) as shared:
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    growth[rows] = pool.submit(string_column_growth, shared.path).result()
+
+        # An object array of one string column alone would be 8 bytes a row
+        self.assertLess(growth[100000] - growth[1000], 100000 * 2)
+
+    def test_view(self):
+        view = self.columnar.view(3, 9)
+        self.assertEqual(view.serialize(), self.columnar[3:9].serialize())
+        self.assertTrue(np.shares_memory(view.columns['speed_limit'], self.columnar.columns['speed_limit']))
+        self.assertEqual(len(self.columnar.view(5, 2)), 0)
+        self.assertEqual(self.columnar.view(15, 100).serialize(), self.columnar[15:].serialize())
@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.models.columnar import ColumnarCollisions
+from road_collisions_uk.query import KEY_INDEXES
+from road_collisions_uk.snapshot import (
+    META_FILENAME,
+    is_snapshot
+)
+from road_collisions_uk.utils import (
+    decode_strings,
+    read_json
+)
+
+from test.data import write_sample_data
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(self.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=10
+        )
+        self.snapshot_path = os.path.join(self.dirpath, 'snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_round_trip(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        collisions.save(self.snapshot_path)
+        self.assertTrue(is_snapshot(self.snapshot_path))
+
+        loaded = Collisions.load(self.snapshot_path)
+        self.assertIsInstance(loaded.columns['speed_limit'], np.memmap)
+        self.assertIsInstance(loaded.vehicle_offsets, np.memmap)
+        self.assertEqual(loaded.serialize(), collisions.serialize())
+        self.assertEqual(
+            loaded.filter(speed_limit__gte=40).serialize(),
+            collisions.filter(speed_limit__gte=40).serialize()
+        )
+
+        loaded = Collisions.load(self.snapshot_path, mmap=False)
+        self.assertNotIsInstance(loaded.columns['speed_limit'], np.memmap)
+        self.assertEqual(loaded.serialize(), collisions.serialize())
+
+    def test_indexes_saved(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        collisions.create_index('accident_index', 'police_force')
+        collisions.save(self.snapshot_path)
+
+        loaded = Collisions.load(self.snapshot_path)
+        self.assertEqual(set(loaded.indexes), set(KEY_INDEXES) | {'police_force'})
+        for field in loaded.indexes:
+            self.assertEqual(
+                decode_strings(loaded.indexes[field].values).tolist(),
+                collisions.indexes[field].values.tolist()
+            )
+            self.assertEqual(
+                loaded.indexes[field].positions.tolist(),
+                collisions.indexes[field].positions.tolist()
+            )
+        self.assertEqual(
+            loaded.filter(police_force=2).serialize(),
+            collisions.filter(police_force=2).serialize()
+        )
+
+    def get_encodings(self, table='collision'):
+        meta = read_json(os.path.join(self.snapshot_path, META_FILENAME))
+        return {c['name']: c['encoding'] for c in meta['tables'][table]}
+
+    def test_distinct_strings_saved_as_bytes(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        collisions.save(self.snapshot_path)
+
+        encodings = self.get_encodings()
+        self.assertEqual(encodings['accident_index'], 'bytes')
+        self.assertEqual(encodings['lsoa_of_accident_location'], 'bytes')
+        # 5 districts over 20 collisions
+        self.assertEqual(encodings['local_authority_ons_district'], 'dictionary')
+        self.assertEqual(encodings['speed_limit'], 'plain')
+
+        loaded = Collisions.load(self.snapshot_path)
+        self.assertIsInstance(loaded.columns['accident_index'], np.memmap)
+        self.assertEqual(loaded.columns['accident_index'].dtype, np.dtype('S13'))
+        self.assertEqual(loaded.columns['local_authority_ons_district'].dtype, object)
+
+        collision = loaded[3]
+        self.assertIsInstance(collision.accident_index, str)
+        self.assertEqual(collision.serialize(), collisions[3].serialize())
+
+    def test_string_queries_on_bytes(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        collisions.save(self.snapshot_path)
+        loaded = Collisions.load(self.snapshot_path)
+
+        key = collisions[5].accident_index
+        self.assertEqual(loaded.get(key).serialize(), collisions[5].serialize())
+        self.assertIsNone(loaded.get(key + '0'))
+        self.assertIsNone(loaded.get(key[:-1]))
+        self.assertEqual(
+            loaded.lookup('lsoa_of_accident_location', 'E01000003', 'E01000004').serialize(),
+            collisions.lookup('lsoa_of_accident_location', 'E01000003', 'E01000004').serialize()
+        )
+        for kwargs in (
+            {'accident_index': key},
+            {'accident_index__in': [key, 'missing', 1]},
+            {'lsoa_of_accident_location__gte': 'E01000005'},
+            {'lsoa_of_accident_location__ne': 'E01000001'},
+            {'date__range': ('01/03/2019', '01/08/2020')},
+            {'hour__in': [7, 8, 9]},
+        ):
+            self.assertEqual(
+                loaded.filter(**kwargs).serialize(),
+                collisions.filter(**kwargs).serialize(),
+                kwargs
+            )
+
+        self.assertEqual(
+            loaded.groupby('lsoa_of_accident_location').count().to_dict(),
+            collisions.groupby('lsoa_of_accident_location').count().to_dict()
+        )
+        self.assertTrue(
+            loaded.to_dataframe('vehicle').equals(collisions.to_dataframe('vehicle'))
+        )
+
+    def test_missing_strings_dictionary_encoded(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        collisions.columns['lsoa_of_accident_location'][2] = None
+        collisions.save(self.snapshot_path)
+
+        self.assertEqual(self.get_encodings()['lsoa_of_accident_location'], 'dictionary')
+        loaded = Collisions.load(self.snapshot_path)
+        self.assertIsNone(loaded[2].lsoa_of_accident_location)
+        self.assertEqual(loaded.serialize(), collisions.serialize())
+
+    def test_concat_bytes_and_objects(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        collisions.save(self.snapshot_path)
+        loaded = Collisions.load(self.snapshot_path)
+
+        combined = ColumnarCollisions.concat([loaded, collisions])
+        self.assertEqual(combined.columns['accident_index'].dtype, object)
+        self.assertEqual(
+            combined.serialize(),
+            collisions.serialize() + collisions.serialize()
+        )
+
+    def test_save_object_collisions(self):
+        collisions = Collisions.from_dir(self.dirpath, region='uk', year=2020)
+        collisions.save(self.snapshot_path)
+        loaded = Collisions.load(self.snapshot_path)
+        self.assertEqual(loaded.serialize(), collisions.serialize())
+        self.assertEqual(set(loaded.indexes), set(KEY_INDEXES))
+        key = collisions[3].accident_index
+        self.assertEqual(loaded.get(key).serialize(), collisions.get(key).serialize())
+
+    def test_save_replaces(self):
+        Collisions.from_dir(self.dirpath, region='uk').save(self.snapshot_path)
+        Collisions.from_dir(self.dirpath, region='uk', year=2019).save(self.snapshot_path)
+        self.assertEqual(len(Collisions.load(self.snapshot_path)), 10)
+        self.assertEqual(
+            [f for f in os.listdir(self.dirpath) if f.startswith('.')],
+            []
+        )
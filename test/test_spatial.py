@@ -0,0 +1,77 @@
+import math
+
+from unittest import TestCase
+
+import numpy as np
+
+from road_collisions_uk.spatial import (
+    GridIndex,
+    points_in_polygon
+)
+
+
+class GridIndexTest(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.eastings = rng.uniform(400000, 420000, 2000)
+        self.northings = rng.uniform(180000, 195000, 2000)
+        self.eastings[::50] = np.nan
+        self.northings[::50] = np.nan
+        self.index = GridIndex(self.eastings, self.northings, cell_size=1000)
+        self.valid = ~np.isnan(self.eastings)
+
+    def test_nulls_excluded(self):
+        self.assertEqual(len(self.index), self.valid.sum())
+
+    def test_within_bbox(self):
+        bbox = (405123, 183000, 411500, 190250)
+        expected = np.flatnonzero(
+            self.valid &
+            (self.eastings >= bbox[0]) & (self.eastings <= bbox[2]) &
+            (self.northings >= bbox[1]) & (self.northings <= bbox[3])
+        )
+        self.assertEqual(self.index.within_bbox(*bbox).tolist(), expected.tolist())
+        self.assertEqual(self.index.within_bbox(0, 0, 10, 10).tolist(), [])
+
+    def test_within_radius(self):
+        distances = np.hypot(self.eastings - 410000, self.northings - 187000)
+        expected = np.flatnonzero(self.valid & (distances <= 2500))
+        self.assertEqual(
+            self.index.within_radius(410000, 187000, 2500).tolist(),
+            expected.tolist()
+        )
+
+    def test_nearest(self):
+        for point in ((410000, 187000), (0, 0), (400500, 194900)):
+            distances = np.hypot(self.eastings - point[0], self.northings - point[1])
+            distances[~self.valid] = math.inf
+            self.assertEqual(
+                self.index.nearest(*point, k=7).tolist(),
+                np.argsort(distances, kind='stable')[:7].tolist()
+            )
+        self.assertEqual(len(self.index.nearest(0, 0, k=10 ** 6)), len(self.index))
+
+    def test_within_polygon(self):
+        triangle = [(402000, 181000), (418000, 181000), (410000, 194000)]
+        expected = np.flatnonzero(
+            self.valid & points_in_polygon(self.eastings, self.northings, np.array(triangle))
+        )
+        self.assertTrue(len(expected))
+        self.assertEqual(self.index.within_polygon(triangle).tolist(), expected.tolist())
+
+    def test_points_in_polygon(self):
+        square = np.array([(0, 0), (10, 0), (10, 10), (0, 10)], dtype=float)
+        self.assertEqual(
+            points_in_polygon(
+                np.array([5, 15, -1, 9.9]),
+                np.array([5, 5, 5, 0.1]),
+                square
+            ).tolist(),
+            [True, False, False, True]
+        )
+
+    def test_empty(self):
+        index = GridIndex(np.array([np.nan]), np.array([np.nan]))
+        self.assertEqual(index.within_radius(0, 0, 100).tolist(), [])
+        self.assertEqual(index.nearest(0, 0, k=3).tolist(), [])
@@ -0,0 +1,135 @@
+import csv
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+
+from unittest import TestCase
+
+import numpy as np
+
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.query import KEY_INDEXES
+from road_collisions_uk.store import (
+    get_store_years,
+    refresh_store
+)
+
+from test.data import write_sample_data
+
+
+class StoreTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.dirpath, 'uk')
+        self.store_dir = os.path.join(self.dirpath, 'store')
+        write_sample_data(self.data_dir, years=(2019, 2020), per_year=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def touch(self, filename):
+        # Make sure the source looks changed even on coarse mtimes
+        mtime = time.time() + 10
+        os.utime(os.path.join(self.data_dir, filename), (mtime, mtime))
+
+    def test_refresh(self):
+        report = refresh_store(self.data_dir, self.store_dir, indexes=['police_force'])
+        self.assertEqual(report.rebuilt, [2019, 2020])
+        self.assertEqual(sorted(report.partitioned), ['accident', 'casualty', 'vehicle'])
+        self.assertEqual(get_store_years(self.store_dir), [2019, 2020])
+
+        loaded = Collisions.from_store(self.store_dir)
+        expected = Collisions.from_dir(self.dirpath, region='uk', columnar=True)
+        self.assertEqual(loaded.serialize(), expected.serialize())
+        self.assertIn('police_force', loaded.indexes)
+
+        report = refresh_store(self.data_dir, self.store_dir)
+        self.assertFalse(report.changed)
+        self.assertEqual(report.unchanged, [2019, 2020])
+        self.assertEqual(report.partitioned, [])
+        self.assertEqual(report.indexes, sorted(set(KEY_INDEXES) | {'police_force'}))
+
+    def test_key_indexes_saved(self):
+        refresh_store(self.data_dir, self.store_dir)
+
+        loaded = Collisions.from_store(self.store_dir, year=2019)
+        self.assertEqual(set(loaded.indexes), set(KEY_INDEXES))
+        # Read back from the snapshot rather than rebuilt
+        self.assertIsInstance(loaded.indexes['accident_index'].positions, np.memmap)
+
+        expected = Collisions.from_dir(self.dirpath, region='uk', year=2019)
+        collision = expected[3]
+        self.assertEqual(
+            loaded.get(collision.accident_index).serialize(),
+            collision.serialize()
+        )
+        self.assertEqual(
+            loaded.lookup('lsoa_of_accident_location', collision.lsoa_of_accident_location).serialize(),
+            expected.filter(lsoa_of_accident_location=collision.lsoa_of_accident_location).serialize()
+        )
+
+    def test_only_changed_years_rebuilt(self):
+        refresh_store(self.data_dir, self.store_dir)
+
+        path = os.path.join(self.data_dir, 'casualty.csv')
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            if row['accident_year'] == '2020':
+                row['casualty_severity'] = '1'
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        self.touch('casualty.csv')
+
+        report = refresh_store(self.data_dir, self.store_dir)
+        self.assertEqual(report.partitioned, ['casualty'])
+        self.assertEqual(report.rebuilt, [2020])
+        self.assertEqual(report.unchanged, [2019])
+
+        loaded = Collisions.from_store(self.store_dir, year=2020)
+        self.assertEqual(
+            set(loaded.casualty_columns['casualty_severity'].tolist()),
+            {1}
+        )
+
+    def test_new_and_removed_years(self):
+        refresh_store(self.data_dir, self.store_dir)
+
+        write_sample_data(self.data_dir, years=(2020, 2021), per_year=10)
+        for filename in ('accident.csv', 'vehicle.csv', 'casualty.csv'):
+            self.touch(filename)
+
+        report = refresh_store(self.data_dir, self.store_dir)
+        self.assertEqual(report.rebuilt, [2021])
+        self.assertEqual(report.unchanged, [2020])
+        self.assertEqual(report.removed, [2019])
+        self.assertEqual(get_store_years(self.store_dir), [2020, 2021])
+        self.assertFalse(os.path.exists(os.path.join(self.store_dir, 'years', '2019')))
+
+    def test_year_and_force(self):
+        report = refresh_store(self.data_dir, self.store_dir, year=2020)
+        self.assertEqual(report.rebuilt, [2020])
+        self.assertEqual(get_store_years(self.store_dir), [2020])
+
+        report = refresh_store(self.data_dir, self.store_dir, force=True)
+        self.assertEqual(report.rebuilt, [2019, 2020])
+
+    def test_archives(self):
+        archive_path = os.path.join(self.data_dir, 'data.tgz')
+        with tarfile.open(archive_path, 'w:gz') as tar:
+            for filename in ('accident.csv', 'vehicle.csv', 'casualty.csv'):
+                tar.add(os.path.join(self.data_dir, filename), arcname=filename)
+                os.remove(os.path.join(self.data_dir, filename))
+
+        report = refresh_store(self.data_dir, self.store_dir)
+        self.assertEqual(report.extracted, [archive_path])
+        self.assertEqual(report.rebuilt, [2019, 2020])
+
+        report = refresh_store(self.data_dir, self.store_dir)
+        self.assertEqual(report.extracted, [])
+        self.assertEqual(report.rebuilt, [])
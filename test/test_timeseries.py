@@ -0,0 +1,165 @@
+import datetime
+import os
+import shutil
+import tempfile
+
+from collections import Counter
+from unittest import TestCase
+
+import numpy as np
+
+from road_collisions_uk.models.collision import Collisions
+from road_collisions_uk.models.columnar import ColumnarCollisions
+from road_collisions_uk.query import (
+    parse_lookups,
+    record_matches
+)
+from road_collisions_uk.timeseries import (
+    bucket,
+    get_hours,
+    get_weekdays,
+    histogram,
+    to_timestamp_column
+)
+
+from test.data import write_sample_data
+
+
+class TimeseriesTest(TestCase):
+
+    def test_to_timestamp_column(self):
+        timestamps = to_timestamp_column(
+            ['01/01/2016', '29/02/2020', '', '03/03/2021'],
+            ['23:59', '00:00', '12:00', 'NULL']
+        )
+        self.assertEqual(timestamps.dtype, np.dtype('datetime64[m]'))
+        self.assertEqual(
+            timestamps[:2].tolist(),
+            [datetime.datetime(2016, 1, 1, 23, 59), datetime.datetime(2020, 2, 29, 0, 0)]
+        )
+        self.assertTrue(np.isnat(timestamps[2:]).all())
+        self.assertEqual(get_hours(timestamps).tolist(), [23, 0, -1, -1])
+        self.assertEqual(get_weekdays(timestamps).tolist(), [4, 5, -1, -1])
+
+    def test_weekdays(self):
+        days = np.arange('2021-01-01', '2021-01-15', dtype='datetime64[D]')
+        self.assertEqual(
+            get_weekdays(days.astype('datetime64[m]')).tolist(),
+            [d.weekday() for d in days.tolist()]
+        )
+
+    def test_bucket_weeks_start_monday(self):
+        timestamps = np.array(
+            ['2021-01-03T10:00', '2021-01-04T00:00', '2021-01-10T23:59'],
+            dtype='datetime64[m]'
+        )
+        self.assertEqual(
+            bucket(timestamps, 'W').tolist(),
+            [datetime.date(2020, 12, 28), datetime.date(2021, 1, 4), datetime.date(2021, 1, 4)]
+        )
+        with self.assertRaises(ValueError):
+            bucket(timestamps, 'fortnight')
+
+    def test_histogram(self):
+        timestamps = np.array(
+            ['2021-01-01T10:00', '2021-03-05T00:00', '2021-03-31T23:59', 'NaT'],
+            dtype='datetime64[m]'
+        )
+        counts = histogram(timestamps, 'M')
+        self.assertEqual(counts.tolist(), [1, 0, 2])
+        self.assertEqual(counts.index[0], datetime.datetime(2021, 1, 1))
+
+        counts = histogram(timestamps, 'Y', start='2020-06-01')
+        self.assertEqual(counts.tolist(), [0, 3])
+        self.assertEqual(len(histogram(timestamps[3:], 'D')), 0)
+
+
+class ColumnarTimeTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirpath = tempfile.mkdtemp()
+        write_sample_data(
+            os.path.join(cls.dirpath, 'uk'),
+            years=(2019, 2020),
+            per_year=40
+        )
+        cls.collisions = Collisions.from_dir(cls.dirpath, region='uk')
+        cls.columnar = Collisions.from_dir(cls.dirpath, region='uk', columnar=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirpath)
+
+    def test_timestamps(self):
+        self.assertEqual(
+            self.columnar.timestamps.tolist(),
+            [c.timestamp for c in self.collisions]
+        )
+
+    def test_filter(self):
+        for kwargs in (
+            {'hour__in': [7, 8, 9]},
+            {'weekday__gte': 5},
+            {'hour__range': (13, 17), 'weekday': 2},
+            {'timestamp__gte': datetime.datetime(2020, 6, 1, 12)},
+            {'timestamp__range': ('2019-03-01', '2019-09-01T06:00')},
+        ):
+            lookups = parse_lookups(kwargs)
+            expected = [c.accident_index for c in self.collisions if record_matches(c, lookups)]
+            self.assertTrue(expected, kwargs)
+            for collisions in (self.collisions, self.columnar):
+                self.assertEqual(
+                    [c.accident_index for c in collisions.filter(**kwargs)],
+                    expected,
+                    kwargs
+                )
+
+    def test_between(self):
+        start = datetime.datetime(2019, 5, 1)
+        end = datetime.date(2020, 2, 1)
+        expected = [
+            c.accident_index for c in self.collisions
+            if start <= c.timestamp < datetime.datetime(2020, 2, 1)
+        ]
+        result = self.columnar.between(start, end)
+        self.assertTrue(expected)
+        self.assertEqual([c.accident_index for c in result], expected)
+        self.assertIsNotNone(result._timestamps)
+
+        # The default list backed Collisions
+        result = self.collisions.between(start, end)
+        self.assertNotIsInstance(result, ColumnarCollisions)
+        self.assertEqual([c.accident_index for c in result], expected)
+
+    def test_histogram(self):
+        expected = Counter(c.timestamp.replace(day=1, hour=0, minute=0) for c in self.collisions)
+        for collisions in (self.columnar, self.collisions):
+            counts = collisions.histogram('M')
+            self.assertEqual(counts.sum(), len(self.collisions))
+            self.assertEqual(
+                {k.to_pydatetime(): v for k, v in counts.items() if v},
+                dict(expected)
+            )
+        self.assertTrue(
+            self.collisions.histogram('D', start='2019-03-01', end='2019-04-01').equals(
+                self.columnar.histogram('D', start='2019-03-01', end='2019-04-01')
+            )
+        )
+
+    def test_filter_missing_time(self):
+        collisions = Collisions(data=list(self.collisions))
+        original = collisions[0].time
+        collisions[0].time = None
+        try:
+            # Collision.hour can't parse a missing time, the hour column has -1
+            self.assertEqual(len(collisions.filter(hour__gte=0)), len(collisions) - 1)
+        finally:
+            collisions[0].time = original
+
+    def test_groupby_hour(self):
+        expected = Counter((c.weekday, c.hour) for c in self.collisions)
+        self.assertEqual(
+            self.columnar.groupby('weekday', 'hour').count().to_dict(),
+            dict(expected)
+        )
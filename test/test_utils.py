@@ -0,0 +1,82 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+
+from unittest import TestCase
+
+from road_collisions_uk.utils import (
+    extract_tgz,
+    get_manifest_path,
+    read_json
+)
+
+
+def write_tgz(filepath, files):
+    with tarfile.open(filepath, 'w:gz') as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+
+
+class ExtractTgzTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.archive = os.path.join(self.dirpath, 'accident.tgz')
+        write_tgz(self.archive, {'accident.csv': b'a,b\n1,2\n'})
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_extract_writes_manifest(self):
+        self.assertTrue(extract_tgz(self.archive))
+
+        with open(os.path.join(self.dirpath, 'accident.csv'), 'rb') as f:
+            self.assertEqual(f.read(), b'a,b\n1,2\n')
+
+        manifest = read_json(get_manifest_path(self.archive))
+        self.assertEqual(manifest['size'], os.path.getsize(self.archive))
+        self.assertEqual(manifest['members'], {'accident.csv': 8})
+
+    def test_unchanged_skipped(self):
+        self.assertTrue(extract_tgz(self.archive))
+        self.assertFalse(extract_tgz(self.archive))
+
+    def test_touched_but_same_content_skipped(self):
+        extract_tgz(self.archive)
+        stat = os.stat(self.archive)
+        os.utime(self.archive, (stat.st_atime + 10, stat.st_mtime + 10))
+
+        self.assertFalse(extract_tgz(self.archive))
+        self.assertEqual(
+            read_json(get_manifest_path(self.archive))['mtime'],
+            os.stat(self.archive).st_mtime
+        )
+
+    def test_changed_archive_extracted(self):
+        extract_tgz(self.archive)
+        write_tgz(self.archive, {'accident.csv': b'a,b\n3,4\n5,6\n'})
+
+        self.assertTrue(extract_tgz(self.archive))
+        with open(os.path.join(self.dirpath, 'accident.csv'), 'rb') as f:
+            self.assertEqual(f.read(), b'a,b\n3,4\n5,6\n')
+
+    def test_partial_extraction_redone(self):
+        extract_tgz(self.archive)
+        with open(os.path.join(self.dirpath, 'accident.csv'), 'wb') as f:
+            f.write(b'a,b')
+
+        self.assertTrue(extract_tgz(self.archive))
+
+    def test_missing_manifest_redone(self):
+        extract_tgz(self.archive)
+        os.remove(get_manifest_path(self.archive))
+
+        self.assertTrue(extract_tgz(self.archive))
+        self.assertEqual(
+            [f for f in os.listdir(self.dirpath) if f.startswith('.')],
+            []
+        )